@@ -4,19 +4,28 @@ Flask Web Interface for Student Assistant Agent
 Main application file with routes and API endpoints
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
 from datetime import datetime
 import os
 import json
 import secrets
 from memory import (
-    log_message, get_conversation_messages, search_memory, 
+    close_connections, shutdown_message_writer, log_message, get_conversation_messages, search_memory_ranked, 
     get_message_count, clear_history, get_conversation_summary,
     create_project, get_projects, get_project, update_project, delete_project,
-    get_project_summary, generate_project_summary
+    get_project_summary
+)
+from chat_tools import (run_chat_message, stream_chat_message, clear_web_cache, get_web_cache_stats,
+                        clear_search_cache, get_search_cache_stats, get_search_provider, shutdown_web_fanout)
+from chat_limits import ChatBusyError, chat_limiter
+from llm_backend import close_backend, get_backend, get_llm_metrics
+from jobs import get_job, submit_summary_job, shutdown_jobs
+from tool_router import tool_router
+from semantic_memory import stop_indexing
+from canvas_tools import (
+    get_assignments, get_announcements, get_calendar_events, get_courses,
+    clear_canvas_cache, get_canvas_cache_stats
 )
-from chat_tools import run_chat_message
-from canvas_tools import get_assignments, get_announcements, get_calendar_events, get_courses
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
@@ -44,8 +53,9 @@ def api_chat():
         if not message:
             return jsonify({'error': 'Message cannot be empty'}), 400
         
-        # Process the message through the agent
-        response = run_chat_message(message, project_id)
+        # Process the message through the agent, one turn at a time per project
+        with chat_limiter.acquire(project_id):
+            response = run_chat_message(message, project_id)
         
         # Return the response
         return jsonify({
@@ -55,9 +65,60 @@ def api_chat():
             'project_id': project_id
         })
         
+    except ChatBusyError as e:
+        return _busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _busy_response(error: ChatBusyError):
+    """429 response telling the client when to retry."""
+    return jsonify({'error': str(error)}), 429, {'Retry-After': str(error.retry_after)}
+
+def _sse(event: dict) -> str:
+    """Format an event dict as a Server-Sent Events message."""
+    return f"data: {json.dumps(event)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def api_chat_stream():
+    """Handle chat messages, streaming the reply as Server-Sent Events"""
+    data = request.get_json() or {}
+    message = data.get('message', '').strip()
+    project_id = data.get('project_id')
+    
+    if not message:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    
+    # Admit the turn before streaming starts so a busy project gets a real 429
+    try:
+        turn = chat_limiter.acquire(project_id)
+    except ChatBusyError as e:
+        return _busy_response(e)
+    
+    def generate():
+        try:
+            for event in stream_chat_message(message, project_id):
+                yield _sse(event)
+            turn.release()
+            yield _sse({
+                'type': 'done',
+                'timestamp': datetime.now().isoformat(),
+                'message_count': get_message_count(project_id),
+                'project_id': project_id
+            })
+        except Exception as e:
+            yield _sse({'type': 'error', 'error': str(e)})
+        finally:
+            turn.release()
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Also covers clients that disconnect before the stream starts
+    response.call_on_close(turn.release)
+    return response
+
 # Project Management Endpoints
 @app.route('/api/projects', methods=['GET'])
 def api_get_projects():
@@ -171,7 +232,7 @@ def api_get_project_summary(project_id):
 
 @app.route('/api/projects/<int:project_id>/summary', methods=['POST'])
 def api_generate_project_summary(project_id):
-    """Generate a new summary for a project"""
+    """Queue summary generation for a project (poll /api/jobs/<job_id> for the result)"""
     try:
         project = get_project(project_id)
         if not project:
@@ -182,16 +243,28 @@ def api_generate_project_summary(project_id):
         if message_count < 5:
             return jsonify({'error': 'Project needs at least 5 messages to generate a summary'}), 400
         
-        summary = generate_project_summary(project_id)
-        if not summary:
-            return jsonify({'error': 'Failed to generate summary'}), 500
+        job_id = submit_summary_job(project_id)
         
         return jsonify({
             'success': True,
             'project_id': project_id,
-            'summary': summary,
-            'message': 'Project summary generated successfully'
-        })
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}',
+            'message': 'Project summary generation started'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """Get the status and result of a background job"""
+    try:
+        job = get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'job': job})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -208,15 +281,16 @@ def api_memory_search():
         if not term:
             return jsonify({'error': 'Search term cannot be empty'}), 400
         
-        results = search_memory(term, limit=limit, project_id=project_id)
+        results = search_memory_ranked(term, limit=limit, project_id=project_id)
         
-        # Format results for JSON response
+        # Format results for JSON response (best match first)
         formatted_results = []
-        for role, content, timestamp in results:
+        for result in results:
             formatted_results.append({
-                'role': role,
-                'content': content,
-                'timestamp': timestamp
+                'role': result['role'],
+                'content': result['content'],
+                'timestamp': result['timestamp'],
+                'snippet': result['snippet']
             })
         
         return jsonify({
@@ -333,6 +407,76 @@ def api_canvas_courses():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/canvas/cache', methods=['GET'])
+def api_canvas_cache_stats():
+    """Get Canvas response cache statistics"""
+    try:
+        return jsonify({'cache': get_canvas_cache_stats()})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/canvas/cache', methods=['DELETE'])
+def api_canvas_cache_clear():
+    """Invalidate cached Canvas responses (optionally for one endpoint prefix)"""
+    try:
+        endpoint = request.args.get('endpoint')
+        removed = clear_canvas_cache(endpoint)
+        return jsonify({
+            'success': True,
+            'removed': removed,
+            'message': 'Canvas cache cleared'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/web/cache', methods=['GET'])
+def api_web_cache_stats():
+    """Get web page cache statistics"""
+    try:
+        return jsonify({'cache': get_web_cache_stats()})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/web/cache', methods=['DELETE'])
+def api_web_cache_clear():
+    """Remove all cached web pages"""
+    try:
+        removed = clear_web_cache()
+        return jsonify({
+            'success': True,
+            'removed': removed,
+            'message': 'Web page cache cleared'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/web/search-cache', methods=['GET'])
+def api_search_cache_stats():
+    """Get web search cache and SerpAPI quota statistics"""
+    try:
+        return jsonify({'cache': get_search_cache_stats()})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/web/search-cache', methods=['DELETE'])
+def api_search_cache_clear():
+    """Remove all cached web search results"""
+    try:
+        removed = clear_search_cache()
+        return jsonify({
+            'success': True,
+            'removed': removed,
+            'message': 'Web search cache cleared'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/system/status', methods=['GET'])
 def api_system_status():
     """Get system status and health check"""
@@ -341,6 +485,11 @@ def api_system_status():
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
             'memory_count': get_message_count(),
+            'llm': get_llm_metrics(),
+            'llm_backend': get_backend().stats(),
+            'chat_limits': chat_limiter.stats(),
+            'search': get_search_provider().stats(),
+            'routing': tool_router.stats(),
             'version': '1.0.0'
         })
         
@@ -355,6 +504,21 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+def shutdown_app() -> None:
+    """Drain background work and close shared pools before the process exits.
+    
+    Queued and running jobs finish first (they may log messages), then the
+    embedding indexer stops, queued chat messages are committed, and the LLM
+    clients, web fetch loop and database connections are closed. Safe to
+    call more than once.
+    """
+    shutdown_jobs(wait=True)
+    stop_indexing()
+    shutdown_message_writer()
+    close_backend()
+    shutdown_web_fanout()
+    close_connections()
+
 if __name__ == '__main__':
     # Ensure templates and static directories exist
     os.makedirs('templates', exist_ok=True)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the Student Assistant web interface
+
+The chat and Canvas routes run as coroutines: model calls go through the
+async Ollama client and web searches through an async HTTP client, so a
+slow generation doesn't hold a worker thread. Every other route
+(dashboard, projects, memory, jobs, ...) is served by the Flask app from
+app.py through a WSGI adapter, so the JSON API is identical in both modes.
+
+Run with: uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --loop uvloop
+"""
+
+import asyncio
+import json
+import os
+import warnings
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app import app as flask_app, _sse, shutdown_app
+from chat_tools import arun_chat_message, astream_chat_message, close_async_web_client
+from chat_limits import ChatBusyError, chat_limiter
+from canvas_tools import get_assignments, get_announcements, get_calendar_events, get_courses
+from llm_backend import get_backend
+from memory import get_message_count
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    # uvicorn's own adapter works but is deprecated in favour of a2wsgi
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from uvicorn.middleware.wsgi import WSGIMiddleware
+
+WSGI_THREADS = int(os.getenv("WEB_THREADS", "16"))  # Threads serving the Flask routes
+
+class Request:
+    """The parts of an HTTP request the async routes need."""
+
+    def __init__(self, scope: dict, body: bytes):
+        self.scope = scope
+        self.body = body
+        self.args = {key: values[-1] for key, values in parse_qs(scope.get("query_string", b"").decode()).items()}
+
+    def get_json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+class JSONResponse:
+    def __init__(self, body: dict, status: int = 200, headers: Dict[str, str] = None):
+        self.body = json.dumps(body).encode()
+        self.status = status
+        self.headers = headers or {}
+
+    async def send(self, send, receive):
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(self.body)).encode())]
+        headers.extend((key.lower().encode(), value.encode()) for key, value in self.headers.items())
+        await send({
+            "type": "http.response.start",
+            "status": self.status,
+            "headers": headers,
+        })
+        await send({"type": "http.response.body", "body": self.body})
+
+class EventStreamResponse:
+    """Server-Sent Events response; stops generating if the client disconnects."""
+
+    def __init__(self, events: AsyncIterator[str], on_close: Optional[Callable[[], None]] = None):
+        self.events = events
+        self.on_close = on_close
+
+    async def send(self, send, receive):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+
+        async def wait_for_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        disconnect = asyncio.create_task(wait_for_disconnect())
+        try:
+            async for event in self.events:
+                if disconnect.done():
+                    print("🔌 Client disconnected, stopping stream")
+                    break
+                await send({"type": "http.response.body", "body": event.encode(), "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            disconnect.cancel()
+            await self.events.aclose()
+            if self.on_close is not None:
+                self.on_close()
+
+Handler = Callable[[Request], Awaitable[object]]
+
+class AsyncApp:
+    """Minimal ASGI router: async routes first, everything else to the WSGI app."""
+
+    def __init__(self, wsgi_app):
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.fallback = WSGIMiddleware(wsgi_app, workers=WSGI_THREADS)
+
+    def route(self, path: str, methods=("GET",)):
+        def decorator(handler: Handler) -> Handler:
+            for method in methods:
+                self.routes[(method, path)] = handler
+            return handler
+        return decorator
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        handler = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if handler is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        try:
+            response = await handler(Request(scope, body))
+        except Exception as e:
+            print(f"❌ {scope['method']} {scope['path']} failed: {e!r}")
+            response = JSONResponse({'error': str(e)}, 500)
+        await response.send(send, receive)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Async clients belong to this event loop, so close them here
+                await close_async_web_client()
+                await get_backend().aclose()
+                await asyncio.to_thread(shutdown_app)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+app = AsyncApp(flask_app)
+
+def _busy_response(error: ChatBusyError) -> JSONResponse:
+    """429 response telling the client when to retry."""
+    return JSONResponse({'error': str(error)}, 429, {'Retry-After': str(error.retry_after)})
+
+@app.route('/api/chat', methods=['POST'])
+async def api_chat(request: Request):
+    """Handle chat messages from the frontend"""
+    data = request.get_json() or {}
+    message = data.get('message', '').strip()
+    project_id = data.get('project_id')
+
+    if not message:
+        return JSONResponse({'error': 'Message cannot be empty'}, 400)
+
+    try:
+        turn = await chat_limiter.aacquire(project_id)
+    except ChatBusyError as e:
+        return _busy_response(e)
+    async with turn:
+        response = await arun_chat_message(message, project_id)
+
+    return JSONResponse({
+        'response': response,
+        'timestamp': datetime.now().isoformat(),
+        'message_count': await asyncio.to_thread(get_message_count, project_id),
+        'project_id': project_id
+    })
+
+@app.route('/api/chat/stream', methods=['POST'])
+async def api_chat_stream(request: Request):
+    """Handle chat messages, streaming the reply as Server-Sent Events"""
+    data = request.get_json() or {}
+    message = data.get('message', '').strip()
+    project_id = data.get('project_id')
+
+    if not message:
+        return JSONResponse({'error': 'Message cannot be empty'}, 400)
+
+    # Admit the turn before streaming starts so a busy project gets a real 429
+    try:
+        turn = await chat_limiter.aacquire(project_id)
+    except ChatBusyError as e:
+        return _busy_response(e)
+
+    async def generate():
+        events = astream_chat_message(message, project_id)
+        try:
+            async for event in events:
+                yield _sse(event)
+            turn.release()
+            yield _sse({
+                'type': 'done',
+                'timestamp': datetime.now().isoformat(),
+                'message_count': await asyncio.to_thread(get_message_count, project_id),
+                'project_id': project_id
+            })
+        except Exception as e:
+            yield _sse({'type': 'error', 'error': str(e)})
+        finally:
+            await events.aclose()
+            turn.release()
+
+    return EventStreamResponse(generate(), on_close=turn.release)
+
+# Canvas routes await the cached, connection-pooled Canvas client in a worker
+# thread, so concurrent requests share its response cache and ETag revalidation
+@app.route('/api/canvas/assignments')
+async def api_canvas_assignments(request: Request):
+    """Get Canvas assignments"""
+    kwargs = {key: request.args[key] for key in ('due_date', 'status') if request.args.get(key)}
+    assignments = await asyncio.to_thread(get_assignments, **kwargs)
+    return JSONResponse({'assignments': assignments})
+
+@app.route('/api/canvas/announcements')
+async def api_canvas_announcements(request: Request):
+    """Get Canvas announcements"""
+    kwargs = {'unread_only': request.args.get('unread_only', 'false').lower() == 'true'}
+    if request.args.get('course_id'):
+        kwargs['course_id'] = request.args['course_id']
+    announcements = await asyncio.to_thread(get_announcements, **kwargs)
+    return JSONResponse({'announcements': announcements})
+
+@app.route('/api/canvas/events')
+async def api_canvas_events(request: Request):
+    """Get Canvas calendar events"""
+    kwargs = {key: request.args[key] for key in ('start_date', 'end_date') if request.args.get(key)}
+    events = await asyncio.to_thread(get_calendar_events, **kwargs)
+    return JSONResponse({'events': events})
+
+@app.route('/api/canvas/courses')
+async def api_canvas_courses(request: Request):
+    """Get Canvas courses"""
+    courses = await asyncio.to_thread(get_courses)
+    return JSONResponse({'courses': courses})
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chat latency for a quiet project while another project is hammered.
+
+Many threads send messages to one project as fast as they can while a
+second project sends a message at a time. The fake model can generate
+only a few replies at once, like a single Ollama host. Without limits
+the hammered project's turns fill the model's queue and the quiet
+project waits behind them; with ChatLimiter the hammered project runs
+one turn at a time and its excess messages get a 429.
+
+Usage: python benchmarks/bench_chat_limits.py [hammer_threads] [seconds]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "bench_chat_limits.db")
+os.environ["MEMORY_SEARCH_MODE"] = "keyword"
+
+import app as web_app  # noqa: E402
+from chat_limits import ChatLimiter, ChatTurn  # noqa: E402
+from llm_backend import FakeBackend, set_backend  # noqa: E402
+from memory import create_project  # noqa: E402
+
+MODEL_PARALLEL = 4        # Replies the fake model generates at once
+GENERATION_SECONDS = 0.2  # Time per reply
+
+_model_slots = threading.Semaphore(MODEL_PARALLEL)
+
+class NoLimits:
+    """Admits every turn immediately (the behaviour before ChatLimiter)."""
+
+    def acquire(self, project_id=None):
+        return ChatTurn(self, project_id)
+
+    def _finish(self, key):
+        pass
+
+def slow_model(messages, tools):
+    with _model_slots:
+        time.sleep(GENERATION_SECONDS)
+    return "ok"
+
+def run(label: str, limiter, hammer_threads: int, seconds: float):
+    web_app.chat_limiter = limiter
+    client = web_app.app.test_client()
+    busy = create_project(f"busy-{label}", "", "")
+    quiet = create_project(f"quiet-{label}", "", "")
+    stop = time.time() + seconds
+    statuses = {}
+    quiet_latencies = []
+
+    def hammer():
+        while time.time() < stop:
+            status = client.post("/api/chat", json={"message": "again", "project_id": busy}).status_code
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 429:
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=hammer) for _ in range(hammer_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    while time.time() < stop:
+        start = time.perf_counter()
+        client.post("/api/chat", json={"message": "quick question", "project_id": quiet})
+        quiet_latencies.append(time.perf_counter() - start)
+    for thread in threads:
+        thread.join()
+
+    print(f"{label:<12} quiet project p50={statistics.median(quiet_latencies) * 1000:5.0f}ms "
+          f"max={max(quiet_latencies) * 1000:5.0f}ms  busy project responses={statuses}")
+
+def main():
+    hammer_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    set_backend(FakeBackend(responder=slow_model))
+    print(f"🧪 {hammer_threads} threads hammering one project for {seconds:.0f}s, "
+          f"model runs {MODEL_PARALLEL} replies at a time ({GENERATION_SECONDS * 1000:.0f}ms each)")
+    run("no limits", NoLimits(), hammer_threads, seconds)
+    run("ChatLimiter", ChatLimiter(), hammer_threads, seconds)
+
+if __name__ == "__main__":
+    main()
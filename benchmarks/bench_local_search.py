@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: building and querying the local corpus search index.
+
+Generates a corpus of course files (HTML lecture pages exported from
+Canvas, Markdown and plain-text notes) and measures:
+
+  build        first full index of the corpus
+  refresh      incremental refresh with nothing changed
+  edit         incremental refresh after editing, adding and deleting files
+  search       LocalIndex.search latency for typical questions
+  tool call    search_web_enhanced end to end through LocalIndexProvider
+
+Usage: python benchmarks/bench_local_search.py [documents]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "bench_local_search.db")
+
+import chat_tools  # noqa: E402
+from local_index import LocalIndex  # noqa: E402
+from search_providers import LocalIndexProvider  # noqa: E402
+
+SUBJECTS = {
+    "biology": "cell mitochondria membrane enzyme protein dna replication transcription krebs cycle glycolysis",
+    "history": "revolution empire treaty war parliament monarchy colonial trade reform independence",
+    "physics": "force momentum energy velocity acceleration newton gravity friction wave quantum",
+    "computing": "algorithm complexity recursion tree graph hash sorting binary search pointer memory",
+    "economics": "supply demand market price elasticity inflation monetary fiscal equilibrium cost",
+}
+FILLER = ("the lecture covers key ideas with examples and exercises students should review before "
+          "the exam including definitions proofs diagrams and worked problems").split()
+QUERIES = ["What is the krebs cycle?", "binary search tree complexity", "causes of the revolution",
+           "price elasticity of demand", "newton second law momentum", "dna replication enzyme",
+           "hash table memory", "monetary policy inflation", "quantum wave", "colonial trade treaty"]
+
+def make_text(rng: random.Random, subject: str, words: int) -> str:
+    vocabulary = SUBJECTS[subject].split()
+    return " ".join(rng.choice(vocabulary) if rng.random() < 0.25 else rng.choice(FILLER) for _ in range(words))
+
+def write_document(directory: str, rng: random.Random, number: int) -> None:
+    subject = rng.choice(list(SUBJECTS))
+    text = make_text(rng, subject, rng.randint(400, 3000))
+    kind = number % 3
+    if kind == 0:
+        path = os.path.join(directory, subject, f"lecture-{number}.html")
+        body = "".join(f"<p>{text[i:i + 600]}</p>" for i in range(0, len(text), 600))
+        content = (f"<html><head><title>{subject.title()} lecture {number}</title></head><body>"
+                   f"<nav>Home | Modules | Grades</nav><main><h1>Lecture {number}</h1>{body}</main></body></html>")
+    elif kind == 1:
+        path = os.path.join(directory, subject, f"notes_{number}.md")
+        content = f"# {subject.title()} notes {number}\n\n{text}\n"
+    else:
+        path = os.path.join(directory, subject, f"reading-{number}.txt")
+        content = text
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<10} {(time.perf_counter() - start) * 1000:8.0f}ms  {result}")
+    return result
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    corpus = os.path.join(_tmp, "corpus")
+    rng = random.Random(11)
+    for number in range(documents):
+        write_document(corpus, rng, number)
+    size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(corpus) for name in names)
+    print(f"🧪 {documents} documents, {size / 1024 / 1024:.1f}MB")
+
+    index = LocalIndex(corpus)
+    timed("build", index.refresh)
+    timed("refresh", index.refresh)
+
+    files = sorted(os.path.join(root, name) for root, _, names in os.walk(corpus) for name in names)
+    for path in [path for path in files if not path.endswith(".html")][:10]:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(" additional revision material")
+    for path in files[-5:]:
+        os.remove(path)
+    for number in range(documents, documents + 5):
+        write_document(corpus, rng, number)
+    timed("edit", index.refresh)
+    print(f"📊 {index.stats()['documents']} documents, {index.stats()['passages']} passages indexed")
+
+    latencies = []
+    for _ in range(20):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"search     p50={statistics.median(latencies) * 1000:.2f}ms  "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms")
+
+    chat_tools.set_search_provider(LocalIndexProvider(index))
+    start = time.perf_counter()
+    for query in QUERIES:
+        response, _ = chat_tools.search_web_enhanced(query)
+    print(f"tool call  {(time.perf_counter() - start) / len(QUERIES) * 1000:.2f}ms/search")
+    print(response[:600])
+
+if __name__ == "__main__":
+    main()
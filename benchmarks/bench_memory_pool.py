@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SQLite connections and latency per chat turn, with and without pooling.
+
+Replays the memory.py calls that run_chat_message makes for a plain (no tool)
+turn against a throwaway database and reports connections opened per turn and
+per-turn latency percentiles.
+
+Usage: python benchmarks/bench_memory_pool.py [turns]
+"""
+
+import os
+import sys
+import statistics
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_memory.db")
+
+import memory  # noqa: E402
+
+def chat_turn(project_id: int):
+    """The memory calls made by one run_chat_message turn."""
+    memory.log_message("user", "What is due this week?", project_id)
+    memory.should_update_summary(project_id, message_threshold=10**9)
+    memory.get_conversation_messages(limit=6, project_id=project_id)
+    memory.get_project(project_id)
+    memory.get_project_summary(project_id)
+    memory.log_message("assistant", "You have two assignments due on Friday.", project_id)
+
+def run(label: str, turns: int, max_idle: int):
+    memory.close_connections()
+    pool = memory.ConnectionPool(memory.DATABASE_PATH, max_idle=max_idle)
+    memory._pools[memory.DATABASE_PATH] = pool
+    
+    timings = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        chat_turn(1)
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    stats = pool.stats()
+    timings.sort()
+    print(f"{label:<28} connections/turn={stats['opened'] / turns:6.2f}  "
+          f"p50={statistics.median(timings):6.3f}ms  "
+          f"p95={timings[int(len(timings) * 0.95) - 1]:6.3f}ms  "
+          f"mean={statistics.mean(timings):6.3f}ms")
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"🧪 {turns} chat turns against {memory.DATABASE_PATH}")
+    run("before (connect per call)", turns, max_idle=0)
+    run("after (pooled connections)", turns, max_idle=memory.POOL_MAX_IDLE)
+    memory.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one Ollama host vs an OllamaPool over several hosts.
+
+Starts local fake Ollama servers (each generating 2 replies at a time)
+and streams concurrent chat requests through a single OllamaBackend and
+through an OllamaPool. The last pool run stops one host partway through
+(it starts answering 503) to show failover and circuit breaking.
+
+Usage: python benchmarks/bench_ollama_pool.py [requests] [hosts]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import llm_backend  # noqa: E402
+from fake_ollama import start_fake_ollama  # noqa: E402
+
+CONCURRENCY = 12
+MESSAGES = [{"role": "user", "content": "Summarize my week"}]
+
+def run(label: str, backend, count: int, during=None):
+    timings, errors = [], []
+
+    def one(i):
+        if during and i == count // 3:
+            during()
+        start = time.perf_counter()
+        try:
+            "".join(chunk.message.content for chunk in backend.chat(MESSAGES, stream=True))
+            timings.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        list(executor.map(one, range(count)))
+    total = time.perf_counter() - start
+    print(f"{label:<30} total={total:6.2f}s  throughput={len(timings) / total:6.1f} req/s  "
+          f"p50={statistics.median(timings) * 1000:6.0f}ms  errors={len(errors)}")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    host_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    # Quiet the per-call metrics output
+    llm_backend.record_llm_metrics = lambda *args, **kwargs: {}
+
+    servers = [start_fake_ollama(parallel=2) for _ in range(host_count)]
+    urls = [f"http://127.0.0.1:{server.server_port}" for server in servers]
+    print(f"🧪 {count} streamed chats, {CONCURRENCY} concurrent, {host_count} fake hosts")
+
+    run("single host", llm_backend.OllamaBackend(host=urls[0]), count)
+
+    pool = llm_backend.OllamaPool(urls, max_concurrency=2, health_interval=0)
+    pool.check_health()
+    run(f"pool of {host_count}", pool, count)
+
+    def stop_host():
+        servers[-1].failing = True
+
+    before = [server.requests for server in servers]
+    run(f"pool of {host_count}, 1 host fails", pool, count, during=stop_host)
+    served = [server.requests - b for server, b in zip(servers, before)]
+    print(f"requests per host: {served}")
+    for host in pool.stats()["hosts"]:
+        print(f"  {host['host']}  circuit_open={host['circuit_open']}  failures={host['consecutive_failures']}")
+    pool.close()
+
+if __name__ == "__main__":
+    main()
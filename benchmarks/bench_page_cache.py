@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: web page fetching with and without the persistent page cache.
+
+Serves generated HTML pages from a local HTTP server (with ETag and
+Last-Modified, answering 304 to conditional requests, plus mirror URLs
+that return the same page) and runs simulated searches that each fetch a
+few popular pages, the way search_web_enhanced does:
+
+  no cache      every search downloads and parses its pages
+  cold/warm     the first pass fills the cache, the second is served from it
+  revalidated   after the TTL expires, pages are revalidated with 304s
+
+Usage: python benchmarks/bench_page_cache.py [searches] [pages]
+"""
+
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "bench_page_cache.db")
+
+import chat_tools  # noqa: E402
+from memory import get_connection  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+
+URLS_PER_SEARCH = 3
+LAST_MODIFIED = "Mon, 06 Oct 2025 12:00:00 GMT"
+
+def make_page(number: int) -> bytes:
+    paragraphs = "".join(
+        f"<p>Section {i} of topic {number}. This paragraph explains the topic in some detail, "
+        f"with enough words to look like a real article about subject number {number}.</p>"
+        for i in range(60)
+    )
+    return (f"<html><head><title>Topic {number}</title><script>var x = {number};</script></head>"
+            f"<body><nav>Home | About</nav><main><h1>Topic {number}</h1>{paragraphs}</main>"
+            f"<footer>Footer</footer></body></html>").encode()
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # /page/<n> and /mirror/<n> serve the same document
+        number = int(self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1])
+        body = make_page(number)
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self.server.requests += 1
+        if self.headers.get("If-None-Match") == etag:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.server.bytes_sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    server.daemon_threads = True
+    server.requests = server.not_modified = server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_searches(base: str, searches: int, pages: int) -> list:
+    """URL lists for each search; popular pages recur, some via mirrors or tracking links."""
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(pages)]
+    result = []
+    for _ in range(searches):
+        urls = []
+        for number in rng.choices(range(pages), weights=weights, k=URLS_PER_SEARCH):
+            variant = rng.random()
+            if variant < 0.2:
+                urls.append(f"{base}/mirror/{number}")
+            elif variant < 0.4:
+                urls.append(f"{base}/page/{number}?utm_source=search#intro")
+            else:
+                urls.append(f"{base}/page/{number}")
+        result.append(urls)
+    return result
+
+def run(label: str, server, searches: list):
+    server.requests = server.not_modified = server.bytes_sent = 0
+    start = time.perf_counter()
+    for urls in searches:
+        for url in urls:
+            chat_tools.process_webpage_content(url)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed * 1000:7.0f}ms  requests={server.requests:4d}  "
+          f"304s={server.not_modified:4d}  downloaded={server.bytes_sent / 1024:7.0f}KB")
+
+class NoCache(PageCache):
+    """Never finds or keeps anything (fetching as before the cache)."""
+
+    def lookup(self, url):
+        return None
+
+    def store(self, *args, **kwargs):
+        pass
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    server = start_server()
+    plan = make_searches(f"http://127.0.0.1:{server.server_address[1]}", searches, pages)
+    print(f"🧪 {searches} searches x {URLS_PER_SEARCH} pages drawn from {pages} popular pages")
+
+    chat_tools._page_cache = NoCache()
+    run("no cache", server, plan)
+
+    cache = chat_tools._page_cache = PageCache()
+    cache.clear()
+    run("cold", server, plan)
+    run("warm", server, plan)
+    # Expire everything; each fetch now revalidates with If-None-Match
+    cache.ttl = 0
+    with get_connection() as conn:
+        conn.execute("UPDATE web_pages SET expires_at = 0")
+    run("revalidated", server, plan)
+
+    stats = cache.stats()
+    print(f"📊 cache: {stats['pages']} pages, {stats['unique_texts']} unique texts "
+          f"({stats['deduplicated']} deduplicated), {stats['bytes'] / 1024:.0f}KB stored, "
+          f"hit rate {stats['hit_rate']:.0%}, {stats['bytes_saved'] / 1024:.0f}KB not downloaded")
+
+if __name__ == "__main__":
+    main()
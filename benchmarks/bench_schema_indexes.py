@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query plans and latency of the message queries before/after indexes.
+
+Builds a synthetic database (1M messages over 50 projects by default), migrates
+it to the pre-index schema, times the hot memory.py queries, then applies the
+index migration and times them again.
+
+Usage: python benchmarks/bench_schema_indexes.py [messages] [projects]
+"""
+
+import os
+import sys
+import statistics
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRATCH_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(SCRATCH_DIR, "import.db")
+
+import memory  # noqa: E402
+
+# memory migrates DATABASE_PATH on import; benchmark a separate, unmigrated file
+memory.DATABASE_PATH = os.path.join(SCRATCH_DIR, "bench_schema.db")
+
+PRE_INDEX_VERSION = 2
+
+QUERIES = [
+    ("recent history (project)",
+     "SELECT role, content FROM messages WHERE project_id = ? ORDER BY timestamp DESC LIMIT 6", (7,)),
+    ("message count (project)",
+     "SELECT COUNT(*) FROM messages WHERE project_id = ?", (7,)),
+    ("search by role (project)",
+     "SELECT role, content, timestamp FROM messages WHERE content LIKE ? AND role = ? AND project_id = ? "
+     "ORDER BY timestamp DESC LIMIT 5", ("%exam%", "user", 7)),
+    ("last 7 days (project)",
+     "SELECT role, content FROM messages WHERE timestamp >= datetime('2026-01-01', '-7 days') AND project_id = ? "
+     "ORDER BY timestamp", (7,)),
+]
+
+def populate(messages: int, projects: int):
+    with memory.get_connection() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO projects (id, name) VALUES (?, ?)",
+            [(i, f"Project {i}") for i in range(1, projects + 1)]
+        )
+        conn.execute(f"""
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {messages})
+            INSERT INTO messages (role, content, timestamp, project_id)
+            SELECT CASE n % 2 WHEN 0 THEN 'user' ELSE 'assistant' END,
+                   'message ' || n || CASE WHEN n % 97 = 0 THEN ' about the exam' ELSE ' about homework' END,
+                   datetime('2025-01-01', '+' || (n * 30) || ' seconds'),
+                   (n % {projects}) + 1
+            FROM seq
+        """)
+
+def measure(label: str, repeat: int = 20):
+    print(f"\n== {label} ==")
+    with memory.get_connection() as conn:
+        for name, sql, params in QUERIES:
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{name:<26} median={statistics.median(timings):9.3f}ms  plan: {plan}")
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    projects = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    memory.migrate(target_version=PRE_INDEX_VERSION)
+    print(f"🧪 Populating {messages:,} messages across {projects} projects...")
+    start = time.perf_counter()
+    populate(messages, projects)
+    print(f"   done in {time.perf_counter() - start:.1f}s")
+    
+    measure(f"schema v{PRE_INDEX_VERSION} (no indexes)")
+    start = time.perf_counter()
+    version = memory.migrate()
+    print(f"\n🔧 Migrated to v{version} in {time.perf_counter() - start:.1f}s")
+    measure(f"schema v{version} (indexed)")
+    memory.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: paid SerpAPI requests with and without the search result cache.
+
+GoogleSearch is replaced by a local stand-in that answers after a fixed
+latency and counts the requests it would have been billed for. A workload
+of chat turns (several threads at once) searches for a set of topics,
+phrased differently each time ("What is the krebs cycle?" and "krebs
+cycle" share a cache entry; "How does the krebs cycle work" doesn't):
+
+  no cache    every search is a paid request (the previous behaviour)
+  cache       normalized queries are served from the cache, and identical
+              queries in flight at the same time share one request
+  quota       the cache expires and the monthly quota is nearly spent:
+              searches past the quota get the expired results
+
+Usage: python benchmarks/bench_search_cache.py [searches] [threads]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "bench_search_cache.db")
+os.environ["SERPAPI_KEY"] = "local-stand-in"
+
+import chat_tools  # noqa: E402
+import search_providers  # noqa: E402
+from memory import get_connection  # noqa: E402
+from search_cache import SearchCache  # noqa: E402
+from search_providers import SerpAPIProvider  # noqa: E402
+
+SERPAPI_LATENCY = 0.3  # Seconds per stand-in request
+
+TOPICS = ["krebs cycle", "photosynthesis light reactions", "french revolution causes", "binary search tree",
+          "supply and demand curve", "mitochondria function", "pythagorean theorem proof", "cold war timeline",
+          "big o notation", "newton second law", "shakespeare sonnet structure", "dna replication"]
+PHRASINGS = ["{}", "What is the {}?", "{} ", "Tell me about the {}", "{}!", "How does the {} work"]
+
+class StandInGoogleSearch:
+    """Local stand-in for serpapi.GoogleSearch: fixed latency, counts billed requests."""
+
+    requests = 0
+    lock = threading.Lock()
+
+    def __init__(self, params: dict):
+        self.params = params
+
+    def get_dict(self) -> dict:
+        with StandInGoogleSearch.lock:
+            StandInGoogleSearch.requests += 1
+        time.sleep(SERPAPI_LATENCY)
+        query = self.params["q"]
+        return {
+            "search_metadata": {"status": "Success"},
+            "organic_results": [
+                {"position": i, "title": f"{query} - result {i}", "link": f"https://example.edu/{i}",
+                 "snippet": f"All about {query}.", "displayed_link": "example.edu"}
+                for i in range(1, 6)
+            ],
+        }
+
+class NoCache(SearchCache):
+    """Every search is a paid request (the behaviour before the cache)."""
+
+    def get(self, query, location, fetch):
+        return fetch(), None
+
+def make_workload(searches: int) -> list:
+    rng = random.Random(3)
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    return [rng.choice(PHRASINGS).format(topic) for topic in rng.choices(TOPICS, weights=weights, k=searches)]
+
+def run(label: str, cache: SearchCache, workload: list, threads: int):
+    chat_tools.set_search_provider(SerpAPIProvider(cache))
+    StandInGoogleSearch.requests = 0
+    notices = 0
+
+    def search(query):
+        response, _ = chat_tools.search_web_enhanced(query, include_content=False)
+        return response.startswith("⚠️")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        notices = sum(executor.map(search, workload))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:6.2f}s  paid requests={StandInGoogleSearch.requests:4d}  "
+          f"stale results shown={notices}")
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    search_providers.GoogleSearch = StandInGoogleSearch
+    workload = make_workload(searches)
+    print(f"🧪 {searches} searches over {len(TOPICS)} topics, {threads} at a time, "
+          f"{SERPAPI_LATENCY * 1000:.0f}ms per paid request")
+
+    run("no cache", NoCache(monthly_quota=0), workload, threads)
+    cache = SearchCache(monthly_quota=0)
+    run("cache", cache, workload, threads)
+    stats = cache.stats()
+    print(f"📊 {stats['entries']} cached searches, hit rate {stats['hit_rate']:.0%}, "
+          f"{stats['coalesced']} queries joined an identical one in flight")
+
+    # Expire everything and leave budget for 3 more paid requests this month
+    quota = SearchCache(monthly_quota=cache.usage() + 3)
+    with get_connection() as conn:
+        conn.execute("UPDATE web_searches SET expires_at = 0")
+    run("quota", quota, workload, threads)
+    stats = quota.stats()
+    print(f"📊 {stats['budget_refusals']} requests refused by the quota, "
+          f"{stats['stale_served']} served from expired results, {stats['quota_remaining']} left this month")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chat turns with and without pre-computed tool routing.
+
+The fake model takes a fixed time per call (prompt processing dominates on
+a small local model) and asks for the right tools whenever a message needs
+them, like a well-behaved tool-calling model. Canvas and web tools are
+replaced by instant stand-ins. Every message of a labeled set, tool
+requests and questions that need no tools, is sent once per mode:
+
+  off         the model picks tools: tool turns take two model calls
+  rules       obvious requests are routed by keyword rules: one call
+  classifier  rules, then the nearest-example classifier
+
+and the rules' and classifier's routes are checked against the labels
+(precision: routed turns whose tools match; recall: tool turns routed).
+
+Usage: python benchmarks/bench_tool_routing.py [model_latency_seconds]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "bench_tool_routing.db")
+os.environ["MEMORY_SEARCH_MODE"] = "keyword"
+
+import chat_tools  # noqa: E402
+from llm_backend import FakeBackend, set_backend  # noqa: E402
+from memory import create_project  # noqa: E402
+from tool_router import ExampleClassifier, ToolRouter, match_rules  # noqa: E402
+
+# Message -> tools a correct turn uses (empty: answered without tools)
+LABELED = {
+    "What assignments do I have due this week?": {"get_assignments"},
+    "what's due tomorrow": {"get_assignments"},
+    "Any homework due today?": {"get_assignments"},
+    "Do I have any overdue assignments?": {"get_assignments"},
+    "show my upcoming deadlines": {"get_assignments"},
+    "What courses am I enrolled in?": {"get_courses"},
+    "list my classes": {"get_courses"},
+    "Any new announcements?": {"get_announcements"},
+    "What's on my calendar tomorrow?": {"get_calendar_events"},
+    "my schedule this week": {"get_calendar_events"},
+    "What's due today and any new announcements?": {"get_assignments", "get_announcements"},
+    "Search the web for krebs cycle diagram": {"search_web"},
+    "google french revolution timeline": {"search_web"},
+    "Anything I have to hand in tonight?": {"get_assignments"},
+    "has my professor posted anything new": {"get_announcements"},
+    "Can you help me with my physics assignment?": set(),
+    "Explain why the sky is blue": set(),
+    "Write an outline for my history essay due friday": set(),
+    "Is it due to the weather that class was cancelled?": set(),
+    "What is the difference between mitosis and meiosis?": set(),
+    "How should I study for my calculus exam?": set(),
+    "Thanks, that was helpful!": set(),
+    "Summarize the announcement about the midterm": set(),
+    "what is a derivative": set(),
+    # Tool words outside a Canvas context
+    "What events led to World War 1?": set(),
+    "What's the schedule for the Olympics?": set(),
+    "any events in Paris this weekend?": set(),
+    "When is the deadline for filing taxes?": set(),
+    "What is due process?": set(),
+    "what classes of drugs treat hypertension?": set(),
+    "are courses on Coursera worth it?": set(),
+    "Is there any news from Ukraine?": set(),
+    "Google Docs won't open my file": set(),
+    "google stock price": set(),
+    "Is my homework answer x=5 right?": set(),
+    "What did my teacher mean by the homework question 3?": set(),
+    "what are the events in my novel": set(),
+}
+
+def stand_in_tool(name):
+    def tool(timeout=None, **kwargs):
+        return f"{name} results for {kwargs}"
+    return tool
+
+def responder(messages, tools):
+    # Answer once tool results are in context; otherwise ask for the labeled tools
+    if messages[-1].get("role") == "tool":
+        return "Here is what I found."
+    message = messages[-1]["content"]
+    needed = LABELED.get(message, set())
+    if needed and tools:
+        return "", [(name, {"query": message} if name == "search_web" else {}) for name in sorted(needed)]
+    return "Sure, here is an answer."
+
+def run(label: str, router: ToolRouter, backend: FakeBackend, project_id: int):
+    chat_tools.tool_router = router
+    backend.calls.clear()
+    latencies = {True: [], False: []}
+    for message, tools in LABELED.items():
+        start = time.perf_counter()
+        chat_tools.run_chat_message(message, project_id)
+        latencies[bool(tools)].append(time.perf_counter() - start)
+    print(f"{label:<11} tool turns {statistics.mean(latencies[True]) * 1000:5.0f}ms  "
+          f"other turns {statistics.mean(latencies[False]) * 1000:5.0f}ms  model calls {len(backend.calls)}")
+    return router
+
+def accuracy(label: str, route):
+    routed = correct = 0
+    for message, tools in LABELED.items():
+        result = route(message)
+        if result is None:
+            continue
+        routed += 1
+        if {name for name, _ in result.calls} == tools:
+            correct += 1
+        else:
+            print(f"  ✗ {message!r} -> {result.describe()}")
+    tool_turns = sum(1 for tools in LABELED.values() if tools)
+    print(f"{label:<11} precision {correct}/{routed}  recall {correct}/{tool_turns}")
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    for name in ("get_assignments", "get_announcements", "get_calendar_events", "get_courses"):
+        setattr(chat_tools, name, stand_in_tool(name))
+    chat_tools.search_web_enhanced = lambda query, location="", **kwargs: (f"results for {query}",) * 2
+
+    backend = FakeBackend(responder, latency=latency)
+    set_backend(backend)
+    tool_turns = sum(1 for tools in LABELED.values() if tools)
+    print(f"🧪 {len(LABELED)} messages ({tool_turns} need tools), {latency * 1000:.0f}ms per model call")
+
+    estimate = None
+    for mode in ("off", "rules", "classifier"):
+        router = ToolRouter(mode)
+        # Saved-time estimates come from the tool-choice calls measured with routing off
+        router.tool_choice_seconds = estimate
+        router = run(mode, router, backend, create_project(f"bench-{mode}", "", ""))
+        stats = router.stats()
+        estimate = router.tool_choice_seconds if mode == "off" else estimate
+        if mode != "off":
+            print(f"📊 routed {stats['routed']}, ~{stats['saved_seconds']}s saved, model still asked for tools {stats['extra_tool_calls']}, "
+                  f"by rule {stats['by_rule']}")
+
+    classifier = ExampleClassifier()
+    accuracy("rules", match_rules)
+    accuracy("classifier", lambda message: match_rules(message) or classifier.classify(message))
+
+if __name__ == "__main__":
+    main()
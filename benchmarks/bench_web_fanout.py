@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fetching a search's pages with a thread pool vs the async fan-out.
+
+A local HTTP server serves article pages after a controllable delay
+(/delay/<seconds>/<n>) and a "drip" page that trickles script bytes slowly
+enough never to hit the read timeout (/drip/<n>), like a stalled site.
+Each scenario fetches a search's worth of pages two ways:
+
+  thread pool  the previous process_urls_concurrently: a new
+               ThreadPoolExecutor(max_workers=3) per search and
+               as_completed(timeout=deadline)
+  fan-out      chat_tools.process_urls_concurrently: async fetches on the
+               shared fan-out loop under one deadline
+
+Reports wall time, pages returned, whether the call raised, and how many
+drip responses the server was still sending when the call returned.
+
+Usage: python benchmarks/bench_web_fanout.py [deadline_seconds]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "bench_web_fanout.db")
+
+import chat_tools  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+
+DRIP_CHUNK = b"<script>" + b"x" * 1024 + b"</script>"
+DRIP_INTERVAL = 0.1  # Seconds between drip chunks (well under the 3s read timeout)
+
+def make_page(number: int) -> bytes:
+    paragraphs = "".join(f"<p>Paragraph {i} of article {number}, long enough to be worth summarizing.</p>"
+                         for i in range(40))
+    return f"<html><body><main><h1>Article {number}</h1>{paragraphs}</main></body></html>".encode()
+
+class DelayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[0] == "drip":
+            self._drip()
+            return
+        time.sleep(float(parts[1]))
+        body = make_page(int(parts[2]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _drip(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        with self.server.lock:
+            self.server.dripping += 1
+        try:
+            self.wfile.write(b"<html><head>")
+            for _ in range(200):
+                time.sleep(DRIP_INTERVAL)
+                self.wfile.write(DRIP_CHUNK)
+                self.wfile.flush()
+        except OSError:
+            pass  # Client went away
+        finally:
+            with self.server.lock:
+                self.server.dripping -= 1
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DelayHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.dripping = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def thread_pool_fetch(urls_data: list, max_chars: int, deadline: float) -> list:
+    """The previous implementation, with the hard-coded 10s timeout as a parameter."""
+    content_summaries = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        future_to_data = {
+            executor.submit(chat_tools.process_webpage_content, url, max_chars): (idx, title, url)
+            for idx, title, url in urls_data
+        }
+        for future in as_completed(future_to_data, timeout=deadline):
+            idx, title, url = future_to_data[future]
+            try:
+                content = future.result(timeout=1)
+                content_summaries.append((idx, title, content))
+            except Exception:
+                content_summaries.append((idx, title, f"❌ Timeout processing {title}"))
+    return chat_tools._format_content_summaries(content_summaries)
+
+def fanout_fetch(urls_data: list, max_chars: int, deadline: float) -> list:
+    return chat_tools.process_urls_concurrently(urls_data, max_chars, deadline=deadline)
+
+class NoCache(PageCache):
+    """Never finds or keeps anything, so every run downloads its pages."""
+
+    def lookup(self, url):
+        return None
+
+    def store(self, *args, **kwargs):
+        pass
+
+def run(label: str, fetch, server, urls_data: list, deadline: float, repeat: int):
+    elapsed, pages, errors = [], 0, 0
+    dripping = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            summaries = fetch(urls_data, 400, deadline)
+            pages += sum(1 for line in summaries if line.startswith("📄"))
+        except Exception:
+            errors += 1
+        elapsed.append(time.perf_counter() - start)
+        time.sleep(0.3)  # Let the server notice closed connections
+        dripping = max(dripping, server.dripping)
+        while server.dripping:
+            time.sleep(0.1)
+    print(f"  {label:<12} {sum(elapsed) / repeat * 1000:7.0f}ms/search  pages={pages / repeat:.1f}  "
+          f"raised={errors}/{repeat}  drips still streaming={dripping}")
+
+def main():
+    deadline = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    chat_tools._page_cache = NoCache()
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    scenarios = {
+        "fast pages": [(i, f"Page {i}", f"{base}/delay/0.05/{i}") for i in range(1, 4)],
+        "one stalled": [(1, "Page 1", f"{base}/delay/0.1/1"), (2, "Page 2", f"{base}/delay/0.2/2"),
+                        (3, "Stalled", f"{base}/drip/3")],
+        "5 pages": [(i, f"Page {i}", f"{base}/delay/{0.1 * i:.1f}/{i}") for i in range(1, 6)],
+    }
+    print(f"🧪 deadline {deadline:.1f}s per search")
+    for name, urls_data in scenarios.items():
+        repeat = 1 if any("drip" in url for _, _, url in urls_data) else 10
+        print(f"{name}:")
+        run("thread pool", thread_pool_fetch, server, urls_data, deadline, repeat)
+        run("fan-out", fanout_fetch, server, urls_data, deadline, repeat)
+    chat_tools.shutdown_web_fanout()
+
+if __name__ == "__main__":
+    main()
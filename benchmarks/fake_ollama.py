@@ -0,0 +1,127 @@
+"""
+Minimal fake Ollama server for benchmarks and load tests.
+
+Implements just enough of the API for the app's clients: /api/tags for
+health checks and /api/chat (streaming NDJSON or a single JSON reply).
+Each request "generates" a fixed number of tokens with a fixed delay, and
+a semaphore limits how many requests are generated at once, like a GPU
+serving a few parallel slots. Set server.failing = True to make chat
+requests fail with 503. The messages of the last 1000 chat requests are
+kept in server.prompts, so tests can compare consecutive prompts.
+"""
+
+import json
+import threading
+from collections import deque
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, body: dict, status: int = 200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": m, "model": m} for m in self.server.models]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/api/chat":
+            self._send_json({"error": "not found"}, 404)
+            return
+        server = self.server
+        if server.failing:
+            self._send_json({"error": "model runner has unexpectedly stopped"}, 503)
+            return
+        with server.lock:
+            server.requests += 1
+            server.prompts.append(body.get("messages", []))
+        tokens = [f" token{i}" for i in range(server.tokens)]
+        final = {
+            "model": body["model"], "done": True, "done_reason": "stop",
+            "message": {"role": "assistant", "content": ""},
+            "prompt_eval_count": 100, "eval_count": len(tokens),
+        }
+
+        with server.slots:
+            if not body.get("stream", True):
+                time.sleep(server.token_delay * len(tokens))
+                final["message"]["content"] = "".join(tokens)
+                self._send_json(final)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write(chunk: dict):
+                data = (json.dumps(chunk) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            for token in tokens:
+                time.sleep(server.token_delay)
+                write({"model": body["model"], "done": False, "message": {"role": "assistant", "content": token}})
+            write(final)
+            self.wfile.write(b"0\r\n\r\n")
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 drops connections under load
+
+def start_fake_ollama(models=("qwen3:4b",), tokens: int = 20, token_delay: float = 0.01,
+                      parallel: int = 4, port: int = 0) -> ThreadingHTTPServer:
+    """Start a fake Ollama server on a free local port in a daemon thread.
+
+    Args:
+        models: Model names reported by /api/tags
+        tokens: Tokens generated per reply
+        token_delay: Seconds per generated token
+        parallel: Requests generated concurrently; the rest wait
+        port: Port to listen on (a free one if 0)
+
+    Returns:
+        The running server; its URL is f"http://127.0.0.1:{server.server_port}"
+    """
+    server = FakeOllamaServer(("127.0.0.1", port), FakeOllamaHandler)
+    server.models = list(models)
+    server.tokens = tokens
+    server.token_delay = token_delay
+    server.slots = threading.Semaphore(parallel)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.prompts = deque(maxlen=1000)  # Bounded for long load tests
+    server.failing = False
+    # Short poll interval so shutdown() returns quickly in tests
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--parallel", type=int, default=4)
+    args = parser.parse_args()
+
+    server = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay,
+                               parallel=args.parallel, port=args.port)
+    # Print the port so a parent process can read it
+    print(server.server_port, flush=True)
+    threading.Event().wait()
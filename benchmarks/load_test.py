@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Load test: Flask (threaded dev server), gunicorn (start_web.py) and the
+ASGI app (uvicorn asgi_app:app).
+
+Starts a fake Ollama server and each web server as subprocesses with a
+scratch database, then simulates concurrent users who each send a few
+chat messages in a row. Reports throughput, latency percentiles,
+time to first token (streaming), errors and the server's peak thread
+count.
+
+Usage: python benchmarks/load_test.py [--users 50] [--requests 4] [--stream]
+                                      [--servers flask,gunicorn,asgi] [--token-delay 0.02]
+                                      [--server-log server.log]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_COMMANDS = {
+    "flask": [sys.executable, "-c",
+              "import sys; from app import app; app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"],
+    "gunicorn": [sys.executable, "start_web.py", "--server", "gunicorn", "--host", "127.0.0.1", "--port"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi_app:app", "--host", "127.0.0.1", "--log-level", "warning",
+             "--port"],
+}
+PORT = 5099
+
+def start_fake_ollama(args) -> tuple:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "fake_ollama.py"), "--tokens", str(args.tokens),
+         "--token-delay", str(args.token_delay), "--parallel", str(args.users * 2)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    port = int(process.stdout.readline())
+    return process, f"http://127.0.0.1:{port}"
+
+def start_server(name: str, ollama_url: str, db_path: str, log) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_PATH=db_path, OLLAMA_HOSTS=ollama_url, LLM_BACKEND="ollama")
+    process = subprocess.Popen(SERVER_COMMANDS[name] + [str(PORT)], cwd=ROOT, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/api/system/status", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+class ThreadSampler(threading.Thread):
+    """Track the peak thread count of a process and its children from /proc (Linux only)."""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = None
+        self.running = True
+
+    @staticmethod
+    def _threads(pid: int) -> int:
+        with open(f"/proc/{pid}/status") as f:
+            threads = next(int(line.split()[1]) for line in f if line.startswith("Threads:"))
+        try:
+            with open(f"/proc/{pid}/task/{pid}/children") as f:
+                children = [int(child) for child in f.read().split()]
+        except OSError:
+            children = []
+        for child in children:
+            try:
+                threads += ThreadSampler._threads(child)
+            except (OSError, StopIteration):
+                pass
+        return threads
+
+    def run(self):
+        while self.running:
+            try:
+                self.peak = max(self.peak or 0, self._threads(self.pid))
+            except (OSError, StopIteration):
+                return
+            time.sleep(0.05)
+
+async def simulate_user(client: httpx.AsyncClient, user: int, args, latencies, first_tokens, errors):
+    for i in range(args.requests):
+        payload = {"message": f"User {user} question {i}: what should I study today?"}
+        start = time.perf_counter()
+        try:
+            if args.stream:
+                first_token = None
+                async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if first_token is None and '"type": "token"' in line:
+                            first_token = time.perf_counter() - start
+                        if '"type": "error"' in line:
+                            raise RuntimeError(line)
+                        if '"type": "done"' in line:
+                            break
+                if first_token is not None:
+                    first_tokens.append(first_token)
+            else:
+                response = await client.post("/api/chat", json=payload)
+                response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(e)
+
+async def run_load(args) -> dict:
+    latencies, first_tokens, errors = [], [], []
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_user(client, user, args, latencies, first_tokens, errors) for user in range(args.users)
+        ))
+        total = time.perf_counter() - start
+    return {"total": total, "latencies": latencies, "first_tokens": first_tokens, "errors": errors}
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="concurrent users")
+    parser.add_argument("--requests", type=int, default=4, help="messages per user")
+    parser.add_argument("--stream", action="store_true", help="use /api/chat/stream")
+    parser.add_argument("--servers", default="flask,gunicorn,asgi")
+    parser.add_argument("--tokens", type=int, default=20, help="tokens per fake reply")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds per fake token")
+    parser.add_argument("--server-log", help="append server output to this file")
+    args = parser.parse_args()
+    log = open(args.server_log, "a") if args.server_log else subprocess.DEVNULL
+
+    ollama, ollama_url = start_fake_ollama(args)
+    endpoint = "/api/chat/stream" if args.stream else "/api/chat"
+    print(f"🧪 {args.users} users x {args.requests} messages to {endpoint}, "
+          f"fake model {args.tokens} tokens x {args.token_delay * 1000:.0f}ms")
+    try:
+        for name in args.servers.split(","):
+            with tempfile.TemporaryDirectory() as tmp:
+                server = start_server(name, ollama_url, os.path.join(tmp, "load_test.db"), log)
+                sampler = ThreadSampler(server.pid)
+                sampler.start()
+                try:
+                    result = asyncio.run(run_load(args))
+                finally:
+                    sampler.running = False
+                    server.terminate()
+                    server.wait(timeout=10)
+
+            done = len(result["latencies"])
+            line = (f"{name:<8} throughput={done / result['total']:6.1f} req/s  "
+                    f"p50={percentile(result['latencies'], 0.5) * 1000:6.0f}ms  "
+                    f"p95={percentile(result['latencies'], 0.95) * 1000:6.0f}ms  ")
+            if args.stream:
+                line += f"ttft_p50={percentile(result['first_tokens'], 0.5) * 1000:6.0f}ms  "
+            line += f"errors={len(result['errors'])}  peak_threads={sampler.peak}"
+            print(line)
+            if result["errors"]:
+                print(f"       first error: {result['errors'][0]!r}")
+    finally:
+        ollama.terminate()
+
+if __name__ == "__main__":
+    main()
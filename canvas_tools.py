@@ -1,7 +1,14 @@
 import os
+import threading
+import time
 import requests
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from urllib3.exceptions import ReadTimeoutError
+from utils import create_http_session
 
 # Force reload environment variables to avoid caching issues
 load_dotenv(override=True)
@@ -14,50 +21,354 @@ HEADERS = {
     "Authorization": f"Bearer {CANVAS_TOKEN}"
 }
 
+# Response cache TTLs in seconds, matched by endpoint prefix (first match wins)
+CANVAS_CACHE_TTLS = [
+    ("/api/v1/courses", 6 * 60 * 60),
+    ("/api/v1/users/self/todo", 5 * 60),
+    ("/api/v1/announcements", 10 * 60),
+    ("/api/v1/calendar_events", 15 * 60),
+]
+# Keep-alive connections to the Canvas host (shared by the web routes and LLM tools)
+CANVAS_HTTP_POOL_SIZE = int(os.environ.get("CANVAS_HTTP_POOL_SIZE", "8"))
+_session = create_http_session(pool_size=CANVAS_HTTP_POOL_SIZE, max_hosts=2, retries=3, backoff=0.5)
+# Requests with a deadline (LLM tool calls) retry once without backoff, so retries can't outlast it
+CANVAS_DEADLINE_RETRIES = 1
+_deadline_session = create_http_session(pool_size=CANVAS_HTTP_POOL_SIZE, max_hosts=2,
+                                        retries=CANVAS_DEADLINE_RETRIES, backoff=0)
+
+# Pagination: Canvas returns ~10 items per page unless asked for more
+CANVAS_PER_PAGE = 100
+CANVAS_REQUEST_TIMEOUT = 10     # Seconds per Canvas request (less when the caller's time is nearly up)
+CANVAS_MAX_PAGES = 50           # Safety cap on pages followed per request
+CANVAS_PREFETCH_PAGES = 4       # Pages fetched ahead concurrently when the page count is known
+_page_executor = ThreadPoolExecutor(max_workers=CANVAS_PREFETCH_PAGES, thread_name_prefix="canvas-page")
+
+CANVAS_CACHE_DEFAULT_TTL = 5 * 60
+CANVAS_CACHE_MAX_BYTES = 5 * 1024 * 1024  # Approximate size of cached response bodies
+
+class CanvasCache:
+    """LRU cache of Canvas API responses with per-endpoint TTLs.
+    
+    Entries are bounded by the total size of the response bodies. Expired
+    entries that came with an ETag are kept so the next request can be
+    revalidated with If-None-Match instead of downloading the data again.
+    """
+    
+    def __init__(self, max_bytes: int = CANVAS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> dict(data, etag, size, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+    
+    @staticmethod
+    def key(endpoint: str, params: dict = None) -> tuple:
+        return endpoint, tuple(sorted((params or {}).items()))
+    
+    @staticmethod
+    def ttl_for(endpoint: str) -> int:
+        for prefix, ttl in CANVAS_CACHE_TTLS:
+            if endpoint.startswith(prefix):
+                return ttl
+        return CANVAS_CACHE_DEFAULT_TTL
+    
+    def lookup(self, key: tuple):
+        """Return (fresh data or None, etag to revalidate with or None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(key)
+            if entry["expires_at"] > time.monotonic():
+                self.hits += 1
+                return entry["data"], None
+            self.misses += 1
+            return None, entry["etag"]
+    
+    def revalidate(self, key: tuple, ttl: int):
+        """Extend an entry after a 304 Not Modified and return its data."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["expires_at"] = time.monotonic() + ttl
+            self.revalidated += 1
+            return entry["data"]
+    
+    def store(self, key: tuple, data, etag: str, size: int, ttl: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = {"data": data, "etag": etag, "size": size, "expires_at": time.monotonic() + ttl}
+            self._size += size
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+    
+    def _discard(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._size -= entry["size"]
+    
+    def invalidate(self, endpoint_prefix: str = None) -> int:
+        """Drop cached responses, optionally only those under an endpoint prefix."""
+        with self._lock:
+            keys = [key for key in self._entries if endpoint_prefix is None or key[0].startswith(endpoint_prefix)]
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+_cache = CanvasCache()
+
+def clear_canvas_cache(endpoint_prefix: str = None) -> int:
+    """Invalidate cached Canvas responses.
+    
+    Args:
+        endpoint_prefix: Only clear endpoints starting with this (all if None)
+    
+    Returns:
+        Number of cached responses removed
+    """
+    return _cache.invalidate(endpoint_prefix)
+
+def get_canvas_cache_stats() -> dict:
+    """Get Canvas response cache counters (entries, bytes, hits, misses, hit rate)"""
+    return _cache.stats()
+
 def _check_canvas_config():
     """Helper function to check if Canvas is configured"""
     if not CANVAS_TOKEN or not CANVAS_BASE_URL:
         return False, "Canvas API not configured properly. Check your .env file."
     return True, None
 
-def _make_canvas_request(endpoint):
-    """Helper function to make Canvas API requests"""
+def _fetch_canvas_page(endpoint, params=None, deadline=None):
+    """Fetch one page of a Canvas API response (served from cache when fresh).
+    
+    Args:
+        deadline: time.monotonic() by which the request must finish (None for
+            the usual CANVAS_REQUEST_TIMEOUT)
+    
+    Returns:
+        Tuple of ((data, links), error) where links is the parsed Link header
+    """
     is_configured, error_msg = _check_canvas_config()
     if not is_configured:
         return None, error_msg
     
+    key = CanvasCache.key(endpoint, params)
+    ttl = CanvasCache.ttl_for(endpoint)
+    page, etag = _cache.lookup(key)
+    if page is not None:
+        return page, None
+    
+    headers = dict(HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    
+    session, timeout = _session, CANVAS_REQUEST_TIMEOUT
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None, "Canvas API request timed out"
+        # Every attempt has to fit in the time left
+        session, timeout = _deadline_session, min(timeout, remaining / (CANVAS_DEADLINE_RETRIES + 1))
+    
     try:
-        response = requests.get(f"{CANVAS_BASE_URL}{endpoint}", headers=HEADERS, timeout=10)
+        response = session.get(f"{CANVAS_BASE_URL}{endpoint}", headers=headers, params=params, timeout=timeout)
+        if response.status_code == 304:
+            page = _cache.revalidate(key, ttl)
+            if page is not None:
+                return page, None
+            return _fetch_canvas_page(endpoint, params, deadline)
         if response.status_code != 200:
             return None, f"Canvas API error: {response.status_code} - {response.text[:100]}"
-        return response.json(), None
+        links = {rel: link["url"] for rel, link in response.links.items()}
+        page = (response.json(), links)
+        _cache.store(key, page, response.headers.get("ETag"), len(response.content), ttl)
+        return page, None
     except requests.exceptions.Timeout:
         return None, "Canvas API request timed out"
+    except requests.exceptions.ConnectionError as e:
+        # Read timeouts that used up the retries arrive wrapped in a connection error
+        if e.args and isinstance(getattr(e.args[0], "reason", None), ReadTimeoutError):
+            return None, "Canvas API request timed out"
+        return None, f"Unexpected error: {e}"
     except Exception as e:
         return None, f"Unexpected error: {e}"
 
-def get_assignments(due_date: str = None, status: str = None):
+def _link_endpoint(url):
+    """Turn an absolute Link header URL back into an endpoint path with query."""
+    parsed = urlparse(url)
+    return urlunparse(("", "", parsed.path, "", parsed.query, ""))
+
+def _numbered_page_endpoints(next_url, last_url):
+    """Endpoints for pages next..last when Canvas uses numeric page links.
+    
+    Returns None when the page count isn't known (no rel="last", or opaque
+    bookmark page tokens), in which case pages must be followed one by one.
+    """
+    if not next_url or not last_url:
+        return None
+    next_parsed, last_parsed = urlparse(next_url), urlparse(last_url)
+    next_query, last_query = parse_qs(next_parsed.query), parse_qs(last_parsed.query)
+    try:
+        first, last = int(next_query["page"][0]), int(last_query["page"][0])
+    except (KeyError, ValueError):
+        return None
+    
+    # One page past the cap, so callers can tell the list was cut short
+    last = min(last, first + CANVAS_MAX_PAGES - 1)
+    endpoints = []
+    for number in range(first, last + 1):
+        next_query["page"] = [str(number)]
+        endpoints.append(_link_endpoint(next_parsed._replace(query=urlencode(next_query, doseq=True)).geturl()))
+    return endpoints
+
+class CanvasItems:
+    """Items of a paginated Canvas endpoint, fetched page by page as they're iterated.
+    
+    After iteration, ``truncated`` is None if every page was read, or
+    explains why the list ended early (a failing page, or the
+    CANVAS_MAX_PAGES cap), so tools can tell the model the list is partial.
+    """
+    
+    def __init__(self, first_page, deadline=None):
+        self.first_page = first_page
+        self.deadline = deadline
+        self.count = 0
+        self.truncated = None
+    
+    def __iter__(self):
+        for item in self._items():
+            self.count += 1
+            yield item
+    
+    def _page_result(self, future):
+        timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            return None, "Canvas API request timed out"
+    
+    def _stop(self, reason):
+        self.truncated = f"showing the first {self.count} items; {reason}"
+        print(f"⚠️ Canvas pagination stopped: {reason}")
+    
+    def _items(self):
+        data, links = self.first_page
+        yield from data or []
+        
+        numbered = _numbered_page_endpoints(links.get("next"), links.get("last"))
+        if numbered is not None:
+            # Page count known: keep a window of pages in flight, yield in order
+            capped = len(numbered) > CANVAS_MAX_PAGES - 1
+            numbered = numbered[:CANVAS_MAX_PAGES - 1]
+            pending = deque()
+            remaining = iter(numbered)
+            for page_endpoint in remaining:
+                pending.append(_page_executor.submit(_fetch_canvas_page, page_endpoint, None, self.deadline))
+                if len(pending) >= CANVAS_PREFETCH_PAGES:
+                    break
+            for number in range(2, len(numbered) + 2):
+                page, page_error = self._page_result(pending.popleft())
+                next_endpoint = next(remaining, None)
+                if next_endpoint:
+                    pending.append(_page_executor.submit(_fetch_canvas_page, next_endpoint, None, self.deadline))
+                if page_error:
+                    self._stop(f"Canvas returned an error on page {number} ({page_error})")
+                    return
+                yield from page[0] or []
+            if capped:
+                self._stop(f"stopped after {CANVAS_MAX_PAGES} pages")
+            return
+        
+        # Page count unknown: follow rel="next" one page at a time
+        next_url = links.get("next")
+        for number in range(2, CANVAS_MAX_PAGES + 1):
+            if not next_url:
+                return
+            page, page_error = _fetch_canvas_page(_link_endpoint(next_url), None, self.deadline)
+            if page_error:
+                self._stop(f"Canvas returned an error on page {number} ({page_error})")
+                return
+            yield from page[0] or []
+            next_url = page[1].get("next")
+        if next_url:
+            self._stop(f"stopped after {CANVAS_MAX_PAGES} pages")
+
+def _note_truncation(result, items):
+    """Add a partial-list notice to a tool result when pagination ended early."""
+    if items.truncated is None:
+        return result
+    notice = f"⚠️ Incomplete list: {items.truncated}"
+    return result + [notice] if isinstance(result, list) else f"{result} ({notice})"
+
+def _paginate_canvas_request(endpoint, params=None, timeout=None):
+    """Fetch every page of a paginated Canvas API endpoint.
+    
+    Asks for CANVAS_PER_PAGE items per page and follows Link rel="next"
+    headers. When the Link header also gives the last page number, the
+    remaining pages are prefetched concurrently, a few at a time. Items are
+    yielded page by page, so large lists are never fully buffered.
+    
+    Args:
+        endpoint: Canvas API path
+        params: Query parameters
+        timeout: Seconds for all pages together; pages still missing when
+            it runs out end the list early (no overall limit if None)
+    
+    Returns:
+        Tuple of (CanvasItems, error). Only a failure on the first page is
+        reported as an error; a later failing page, or the page cap, ends the
+        iteration early and sets the items' truncated reason.
+    """
+    params = dict(params or {})
+    params.setdefault("per_page", CANVAS_PER_PAGE)
+    
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    first_page, error = _fetch_canvas_page(endpoint, params, deadline)
+    if error:
+        return None, error
+    return CanvasItems(first_page, deadline), None
+
+def get_assignments(due_date: str = None, status: str = None, timeout: float = None):
     """
     Get Canvas assignments from the TODO list
     
     Args:
         due_date: Filter by due date - 'today', 'tomorrow', 'this_week', or specific date (YYYY-MM-DD)
         status: Filter by status - 'overdue', 'upcoming' (default: all)
+        timeout: Seconds for all Canvas requests (no overall limit if None)
     
     Returns:
         List of assignments or error message
     """
-    data, error = _make_canvas_request("/api/v1/users/self/todo")
+    data, error = _paginate_canvas_request("/api/v1/users/self/todo", timeout=timeout)
     if error:
         return error
     
-    if not data:
-        return "No assignments found."
-    
     assignments = []
     today = datetime.now().date()
+    found_any = False
     
     for item in data:
+        found_any = True
         if "assignment" not in item:
             continue
             
@@ -102,35 +413,30 @@ def get_assignments(due_date: str = None, status: str = None):
         due_str = due_date_obj.strftime("%m/%d/%Y") if due_date_obj else "No due date"
         assignments.append(f"{assignment_name} (Due: {due_str})")
     
-    return assignments if assignments else f"No assignments found matching the criteria."
+    if not found_any:
+        return _note_truncation("No assignments found.", data)
+    return _note_truncation(assignments if assignments else f"No assignments found matching the criteria.", data)
 
-def get_announcements(unread_only: bool = False, course_id: str = None):
+def get_announcements(unread_only: bool = False, course_id: str = None, timeout: float = None):
     """
     Get Canvas announcements
     
     Args:
         unread_only: Only return unread announcements (default: False)
         course_id: Get announcements for specific course (default: all courses)
+        timeout: Seconds for all Canvas requests (no overall limit if None)
     
     Returns:
         List of announcements or error message
     """
-    endpoint = "/api/v1/announcements"
-    params = []
-    
+    params = {}
     if course_id:
-        params.append(f"context_codes[]=course_{course_id}")
-    
-    if params:
-        endpoint += "?" + "&".join(params)
+        params["context_codes[]"] = f"course_{course_id}"
     
-    data, error = _make_canvas_request(endpoint)
+    data, error = _paginate_canvas_request("/api/v1/announcements", params, timeout)
     if error:
         return error
     
-    if not data:
-        return "No announcements found."
-    
     announcements = []
     for announcement in data:
         title = announcement.get("title", "Untitled announcement")
@@ -149,15 +455,16 @@ def get_announcements(unread_only: bool = False, course_id: str = None):
         # Apply unread filter (Canvas API doesn't always provide read status reliably)
         announcements.append(f"{title} (Posted: {posted_str})")
     
-    return announcements if announcements else "No announcements found."
+    return _note_truncation(announcements if announcements else "No announcements found.", data)
 
-def get_calendar_events(start_date: str = None, end_date: str = None):
+def get_calendar_events(start_date: str = None, end_date: str = None, timeout: float = None):
     """
     Get Canvas calendar events
     
     Args:
         start_date: Start date for events - 'today', 'tomorrow', or specific date (YYYY-MM-DD)
         end_date: End date for events (default: same as start_date or today)
+        timeout: Seconds for all Canvas requests (no overall limit if None)
     
     Returns:
         List of calendar events or error message
@@ -187,15 +494,12 @@ def get_calendar_events(start_date: str = None, end_date: str = None):
     else:
         end_obj = start_obj
     
-    endpoint = f"/api/v1/calendar_events?start_date={start_obj}&end_date={end_obj}"
+    params = {"start_date": str(start_obj), "end_date": str(end_obj)}
     
-    data, error = _make_canvas_request(endpoint)
+    data, error = _paginate_canvas_request("/api/v1/calendar_events", params, timeout)
     if error:
         return error
     
-    if not data:
-        return f"No calendar events found for {start_obj.strftime('%m/%d/%Y')}."
-    
     events = []
     for event in data:
         title = event.get("title", "Untitled event")
@@ -213,24 +517,26 @@ def get_calendar_events(start_date: str = None, end_date: str = None):
         
         events.append(f"{title} at {time_str}")
     
-    return events if events else f"No calendar events found for the specified date range."
+    if not events:
+        if start_obj == end_obj:
+            return _note_truncation(f"No calendar events found for {start_obj.strftime('%m/%d/%Y')}.", data)
+        return _note_truncation(f"No calendar events found for the specified date range.", data)
+    return _note_truncation(events, data)
 
-def get_courses():
+def get_courses(timeout: float = None):
     """
     Get list of current Canvas courses
     
+    Args:
+        timeout: Seconds for all Canvas requests (no overall limit if None)
+    
     Returns:
         List of courses or error message
     """
-    endpoint = "/api/v1/courses?enrollment_state=active"
-    
-    data, error = _make_canvas_request(endpoint)
+    data, error = _paginate_canvas_request("/api/v1/courses", {"enrollment_state": "active"}, timeout)
     if error:
         return error
     
-    if not data:
-        return "No courses found."
-    
     courses = []
     for course in data:
         course_name = course.get("name", "Unnamed course")
@@ -241,4 +547,4 @@ def get_courses():
         else:
             courses.append(course_name)
     
-    return courses if courses else "No active courses found."
+    return _note_truncation(courses if courses else "No active courses found.", data)
@@ -0,0 +1,178 @@
+# chat_limits.py
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Chat turns (one or two LLM calls plus tools) running at once in this process
+CHAT_MAX_IN_FLIGHT = int(os.getenv("CHAT_MAX_IN_FLIGHT", "16"))
+# Messages per project allowed to wait for the project's current turn to finish
+CHAT_PROJECT_QUEUE = int(os.getenv("CHAT_PROJECT_QUEUE", "4"))
+# Seconds a queued message waits for its project before giving up
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "30"))
+
+ADMISSION_POLL_SECONDS = 0.05  # How often async waiters re-check their place in the queue
+
+class ChatBusyError(Exception):
+    """A chat turn was refused because its project or the assistant is busy (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ChatTurn:
+    """Admission to run one chat turn; release() it when the reply is complete.
+
+    Usable as a (sync or async) context manager. Releasing more than once
+    is harmless, so streaming responses can release both when the stream
+    ends and when the server closes the response.
+    """
+
+    def __init__(self, limiter: "ChatLimiter", key):
+        self._limiter = limiter
+        self._key = key
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._finish(self._key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+class ChatLimiter:
+    """Serializes chat turns per project and caps turns in flight overall.
+
+    Messages for the same project run one at a time in arrival order, so
+    a turn's user message, history read and reply aren't interleaved with
+    another tab's. Only a few may wait per project (bounded by count and
+    time); the rest are refused at once. A turn that reaches the front of
+    its project's queue then needs one of the global in-flight slots, and
+    is refused immediately if none is free rather than queueing behind
+    other projects. Waiting messages don't hold slots, so one busy project
+    can't starve the others.
+    """
+
+    def __init__(self, max_in_flight: int = CHAT_MAX_IN_FLIGHT, max_queued: int = CHAT_PROJECT_QUEUE,
+                 queue_timeout: float = CHAT_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._waiting: Dict[object, Deque[object]] = {}  # project -> tickets in arrival order
+        self._running = set()                              # projects with a turn in progress
+        self._in_flight = 0
+        self.rejected = 0
+
+    def _enqueue(self, key) -> object:
+        queue = self._waiting.setdefault(key, deque())
+        if len(queue) >= self.max_queued:
+            self.rejected += 1
+            raise ChatBusyError("Too many messages waiting for this project, please retry shortly")
+        ticket = object()
+        queue.append(ticket)
+        return ticket
+
+    def _try_start(self, key, ticket) -> bool:
+        """Start the turn if it's this ticket's turn; raises if no slot is free."""
+        queue = self._waiting[key]
+        if queue[0] is not ticket or key in self._running:
+            return False
+        queue.popleft()
+        if not queue:
+            del self._waiting[key]
+        if self._in_flight >= self.max_in_flight:
+            self.rejected += 1
+            self._condition.notify_all()
+            raise ChatBusyError("The assistant is at capacity, please retry shortly")
+        self._in_flight += 1
+        self._running.add(key)
+        return True
+
+    def _abandon(self, key, ticket) -> None:
+        queue = self._waiting.get(key)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._waiting[key]
+        self._condition.notify_all()
+
+    def _timeout_error(self) -> ChatBusyError:
+        self.rejected += 1
+        return ChatBusyError("Timed out waiting for the previous message in this project",
+                             retry_after=int(self.queue_timeout))
+
+    def _finish(self, key) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._running.discard(key)
+            self._condition.notify_all()
+
+    def acquire(self, project_id: Optional[int] = None) -> ChatTurn:
+        """Wait for this project's turn and a free slot.
+
+        Args:
+            project_id: Project the message belongs to (None for the default project)
+
+        Returns:
+            ChatTurn to release when the reply is complete
+
+        Raises:
+            ChatBusyError: If the project's queue is full, the wait times
+                out, or every in-flight slot is taken
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            ticket = self._enqueue(project_id)
+            try:
+                while not self._try_start(project_id, ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._timeout_error()
+                    self._condition.wait(remaining)
+            except BaseException:
+                self._abandon(project_id, ticket)
+                raise
+        return ChatTurn(self, project_id)
+
+    async def aacquire(self, project_id: Optional[int] = None) -> ChatTurn:
+        """Async version of acquire() that waits without blocking the event loop."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            ticket = self._enqueue(project_id)
+        try:
+            while True:
+                with self._condition:
+                    if self._try_start(project_id, ticket):
+                        return ChatTurn(self, project_id)
+                    if time.monotonic() >= deadline:
+                        raise self._timeout_error()
+                await asyncio.sleep(ADMISSION_POLL_SECONDS)
+        except BaseException:
+            with self._condition:
+                self._abandon(project_id, ticket)
+            raise
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "waiting": sum(len(queue) for queue in self._waiting.values()),
+                "rejected": self.rejected,
+            }
+
+chat_limiter = ChatLimiter()
@@ -1,21 +1,81 @@
 # chat_tools.py
 
-from ollama import chat
 from canvas_tools import get_assignments, get_announcements, get_calendar_events, get_courses
 from memory import (
-    log_message, get_conversation_messages, search_memory, get_project,
-    get_project_summary, generate_project_summary, should_update_summary
+    log_message, get_history_window, search_memory, get_project,
+    get_project_summary, should_update_summary
 )
+from jobs import submit_summary_job
+import asyncio
 import json
 import os
-import re
-import requests
-from bs4 import BeautifulSoup
+import threading
+import time
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
-from typing import Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from serpapi import GoogleSearch
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from semantic_memory import hybrid_search, schedule_indexing
+from utils import BackgroundEventLoop, create_async_http_client, create_http_session
+from context_builder import HISTORY_DROP_BLOCK, build_context, fit_tool_results
+from chat_limits import CHAT_MAX_IN_FLIGHT
+from llm_backend import get_backend
+from page_cache import PageCache
+from search_cache import SearchCache
+from search_providers import SEARCH_RESULT_COUNT, SearchProvider, SerpAPIProvider, create_search_provider
+from html_extract import PAGE_TEXT_LIMIT, PageTextExtractor, extract_text
+from tool_router import tool_router
+
+# Autonomous memory search: 'hybrid' (BM25 + vector similarity) or 'keyword' (BM25 only)
+MEMORY_SEARCH_MODE = os.getenv("MEMORY_SEARCH_MODE", "hybrid")
+
+# Messages of history fetched per turn (those since the project summary, dropped in
+# blocks of HISTORY_DROP_BLOCK once over the limit); build_context trims them to the token budget
+CONTEXT_HISTORY_LIMIT = 20
+
+# Tool execution: independent tool calls from one model response run in parallel,
+# on a pool big enough for every admitted chat turn's tools at once
+TOOL_CALLS_PER_TURN = 4
+TOOL_MAX_WORKERS = CHAT_MAX_IN_FLIGHT * TOOL_CALLS_PER_TURN
+DEFAULT_TOOL_TIMEOUT = 15  # seconds, from when the tool starts running
+TOOL_TIMEOUTS = {
+    "search_memory": 5,
+    "search_web": 25,
+}
+TOOL_TIMEOUT_MARGIN = 1.0  # Tools get this much less than their timeout, so partial results arrive in time
+
+_tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+# Keep-alive session for webpage fetching; one retry keeps slow sites from stalling searches
+WEB_HTTP_POOL_SIZE = int(os.getenv("WEB_HTTP_POOL_SIZE", "4"))
+WEB_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+_web_session = create_http_session(pool_size=WEB_HTTP_POOL_SIZE, max_hosts=32, retries=1, backoff=0.2, headers=WEB_HEADERS)
+
+# Async counterparts, created on first use inside each event loop (the ASGI app's and the fan-out loop)
+_async_web_clients = {}
+
+WEB_CONTENT_LIMIT = 100000  # Bytes of a page read before parsing
+
+# Page fan-out: the top results' pages are fetched together, and whatever has
+# arrived when the deadline passes is used (the rest are cancelled)
+WEB_CONTENT_PAGES = min(int(os.getenv("WEB_CONTENT_PAGES", "3")), SEARCH_RESULT_COUNT)
+WEB_FETCH_DEADLINE = float(os.getenv("WEB_FETCH_DEADLINE", "10"))  # Seconds for all pages of a search
+FANOUT_GRACE_SECONDS = 2  # Extra wait for cancelled fetches to unwind before giving up on the loop
+
+# Sync callers run the async fan-out here, so searches share one keep-alive client
+_fanout_loop = BackgroundEventLoop(name="web-fanout")
+
+# Extracted page text persisted across searches, revalidated with ETag/Last-Modified
+_page_cache = PageCache()
+
+# SerpAPI results persisted by normalized query, with single-flight and quota tracking
+_search_cache = SearchCache()
+
+# Search backend for search_web (SEARCH_PROVIDER), created on first use
+_search_provider: Optional[SearchProvider] = None
+_search_provider_lock = threading.Lock()
 
 TOOLS = [  # same tool schema from chat.py
     {
@@ -243,54 +303,135 @@ def fetch_webpage_content(url: str, timeout: int = 5) -> str:
         timeout: Request timeout in seconds (reduced from 10 to 5)
         
     Returns:
-        Clean text content from the webpage
+        Clean text content from the webpage (from the page cache when fresh)
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        cached = _page_cache.lookup(url)
+        if cached and cached["fresh"]:
+            return cached["text"]
         
-        response = requests.get(url, headers=headers, timeout=timeout, stream=True)
-        response.raise_for_status()
-        
-        # Limit content size to prevent processing huge files
-        content_limit = 100000  # 100KB max
-        content = b''
-        for chunk in response.iter_content(chunk_size=8192):
-            content += chunk
-            if len(content) > content_limit:
-                break
-        
-        # Parse HTML content
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Remove script and style elements quickly
-        for script in soup(["script", "style", "nav", "header", "footer", "aside", "iframe"]):
-            script.decompose()
-        
-        # Extract text from main content areas (prioritized approach)
-        main_content = (
-            soup.find('main') or 
-            soup.find('article') or 
-            soup.find('div', class_=re.compile(r'content|main|article|post', re.I)) or
-            soup.find('div', id=re.compile(r'content|main|article|post', re.I)) or
-            soup.body
-        )
-        
-        if main_content:
-            text = main_content.get_text(separator=' ', strip=True)
-        else:
-            text = soup.get_text(separator=' ', strip=True)
+        # Close the response so the connection goes back to the pool even when we stop early
+        with _web_session.get(url, timeout=timeout, stream=True,
+                              headers=PageCache.conditional_headers(cached)) as response:
+            if response.status_code == 304 and cached:
+                _page_cache.revalidate(url, cached["raw_bytes"])
+                return cached["text"]
+            response.raise_for_status()
+            
+            # Parse as the page arrives and stop reading once there is enough main text
+            extractor = PageTextExtractor(content_type=response.headers.get("Content-Type"))
+            for chunk in response.iter_content(chunk_size=8192):
+                extractor.feed_bytes(chunk)
+                if extractor.done or extractor.bytes_fed > WEB_CONTENT_LIMIT:
+                    break
         
-        # Quick text cleanup
-        text = re.sub(r'\s+', ' ', text).strip()
+        return _cache_page_text(url, extractor, response.headers)
         
-        # Return first 3000 chars to avoid processing huge content
-        return text[:3000] if len(text) > 3000 else text
+    except Exception as e:
+        return f"❌ Could not fetch content from {url}: {str(e)}"
+
+def get_async_web_client():
+    """Get the shared async HTTP client for web search and page fetches."""
+    # Connections belong to the event loop that opened them, so keep one client per loop
+    loop = asyncio.get_running_loop()
+    client = _async_web_clients.get(loop)
+    if client is None:
+        for stale in [other for other in _async_web_clients if other.is_closed()]:
+            _async_web_clients.pop(stale, None)
+        client = _async_web_clients[loop] = create_async_http_client(pool_size=WEB_HTTP_POOL_SIZE, headers=WEB_HEADERS)
+    return client
+
+async def close_async_web_client() -> None:
+    """Close the current event loop's async HTTP client (on ASGI shutdown)."""
+    client = _async_web_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def shutdown_web_fanout() -> None:
+    """Close the fan-out loop's HTTP client and stop the loop (on app shutdown)."""
+    _fanout_loop.stop(close_async_web_client)
+
+async def afetch_webpage_content(url: str, timeout: int = 5) -> str:
+    """Async version of fetch_webpage_content for the ASGI app."""
+    try:
+        cached = await asyncio.to_thread(_page_cache.lookup, url)
+        if cached and cached["fresh"]:
+            return cached["text"]
+        
+        async with get_async_web_client().stream("GET", url, timeout=timeout,
+                                                 headers=PageCache.conditional_headers(cached)) as response:
+            if response.status_code == 304 and cached:
+                await asyncio.to_thread(_page_cache.revalidate, url, cached["raw_bytes"])
+                return cached["text"]
+            response.raise_for_status()
+            
+            extractor = PageTextExtractor(content_type=response.headers.get("Content-Type"))
+            async for chunk in response.aiter_bytes(chunk_size=8192):
+                # Parsing is CPU-bound; keep it off the event loop
+                await asyncio.to_thread(extractor.feed_bytes, chunk)
+                if extractor.done or extractor.bytes_fed > WEB_CONTENT_LIMIT:
+                    break
+        
+        return await asyncio.to_thread(_cache_page_text, url, extractor, response.headers)
         
     except Exception as e:
         return f"❌ Could not fetch content from {url}: {str(e)}"
 
+def _cache_page_text(url: str, extractor: PageTextExtractor, headers) -> str:
+    text = extractor.get_text()
+    _page_cache.store(url, text, etag=headers.get("ETag"), last_modified=headers.get("Last-Modified"),
+                      raw_bytes=extractor.bytes_fed)
+    return text
+
+def get_web_cache_stats() -> dict:
+    """Get web page cache counters (pages, bytes, hit rate, bytes saved)"""
+    return _page_cache.stats()
+
+def clear_web_cache() -> int:
+    """Remove all cached web pages.
+    
+    Returns:
+        Number of cached pages removed
+    """
+    return _page_cache.clear()
+
+def get_search_provider() -> SearchProvider:
+    """Get the search_web backend: SerpAPI, the local corpus index, or local first with SerpAPI fallback."""
+    global _search_provider
+    with _search_provider_lock:
+        if _search_provider is None:
+            _search_provider = create_search_provider(SerpAPIProvider(_search_cache, async_client=get_async_web_client))
+        return _search_provider
+
+def set_search_provider(provider: SearchProvider) -> None:
+    """Replace the search_web backend (e.g. with a LocalIndexProvider for offline use)."""
+    global _search_provider
+    with _search_provider_lock:
+        _search_provider = provider
+
+def get_search_cache_stats() -> dict:
+    """Get web search cache counters (hit rate, coalesced queries, SerpAPI quota usage)"""
+    return _search_cache.stats()
+
+def clear_search_cache() -> int:
+    """Remove all cached web search results.
+    
+    Returns:
+        Number of cached searches removed
+    """
+    return _search_cache.clear()
+
+def extract_page_text(content: bytes) -> str:
+    """Extract the main readable text from an HTML page.
+    
+    Args:
+        content: Raw HTML bytes
+        
+    Returns:
+        Cleaned text, at most 3000 characters
+    """
+    return extract_text(content, limit=PAGE_TEXT_LIMIT)
+
 def summarize_content_with_ai(content: str, max_length: int = 400) -> str:
     """Fast content summarization without AI calls for better performance.
     
@@ -333,28 +474,44 @@ def process_webpage_content(url: str, max_chars: int = 500) -> str:
     try:
         # Fetch the webpage content
         raw_content = fetch_webpage_content(url, timeout=3)  # Even shorter timeout
+        return _summarize_page(url, raw_content, max_chars)
         
-        if raw_content.startswith("❌"):
-            return raw_content
-        
-        # Filter out very short content
-        if len(raw_content.strip()) < 50:
-            return f"📄 Content too brief from {url}"
-        
-        # Use simple summarization instead of AI
-        summary = summarize_content_with_ai(raw_content, max_chars)
-        
-        return f"📄 {summary}"
+    except Exception as e:
+        return f"❌ Error processing {url}: {str(e)}"
+
+async def aprocess_webpage_content(url: str, max_chars: int = 500) -> str:
+    """Async version of process_webpage_content."""
+    try:
+        raw_content = await afetch_webpage_content(url, timeout=3)
+        return _summarize_page(url, raw_content, max_chars)
         
     except Exception as e:
         return f"❌ Error processing {url}: {str(e)}"
 
-def process_urls_concurrently(urls_data: list, max_chars: int = 500) -> list:
+def _summarize_page(url: str, raw_content: str, max_chars: int) -> str:
+    if raw_content.startswith("❌"):
+        return raw_content
+    
+    # Filter out very short content
+    if len(raw_content.strip()) < 50:
+        return f"📄 Content too brief from {url}"
+    
+    # Use simple summarization instead of AI
+    summary = summarize_content_with_ai(raw_content, max_chars)
+    
+    return f"📄 {summary}"
+
+def process_urls_concurrently(urls_data: list, max_chars: int = 500, deadline: float = None) -> list:
     """Process multiple URLs concurrently for much better performance.
     
+    Runs aprocess_urls_concurrently on the shared fan-out event loop, so
+    pages are fetched on its keep-alive client and slow pages are cancelled
+    at the deadline instead of holding up the search.
+    
     Args:
         urls_data: List of tuples (idx, title, url)
         max_chars: Maximum characters per content summary
+        deadline: Seconds for all pages together (WEB_FETCH_DEADLINE by default)
         
     Returns:
         List of formatted content summaries
@@ -362,25 +519,55 @@ def process_urls_concurrently(urls_data: list, max_chars: int = 500) -> list:
     if not urls_data:
         return []
     
-    content_summaries = []
+    deadline = WEB_FETCH_DEADLINE if deadline is None else deadline
+    try:
+        return _fanout_loop.run(aprocess_urls_concurrently(urls_data, max_chars, deadline),
+                                timeout=deadline + FANOUT_GRACE_SECONDS)
+    except TimeoutError:
+        return _format_content_summaries([
+            (idx, title, f"❌ Timeout processing {title}") for idx, title, _ in urls_data
+        ])
+
+async def aprocess_urls_concurrently(urls_data: list, max_chars: int = 500, deadline: float = None) -> list:
+    """Fetch and summarize pages concurrently under one overall deadline.
     
-    # Process URLs concurrently with a ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        # Submit all tasks
-        future_to_data = {
-            executor.submit(process_webpage_content, url, max_chars): (idx, title, url)
-            for idx, title, url in urls_data
-        }
+    Pages that haven't finished when the deadline passes are cancelled
+    (closing their connections) and reported as timed out; the pages that
+    did finish are returned right away.
+    
+    Args:
+        urls_data: List of tuples (idx, title, url)
+        max_chars: Maximum characters per content summary
+        deadline: Seconds for all pages together (WEB_FETCH_DEADLINE by default)
         
-        # Collect results as they complete
-        for future in as_completed(future_to_data, timeout=10):  # 10 second total timeout
-            idx, title, url = future_to_data[future]
-            try:
-                content = future.result(timeout=1)  # 1 second per result
-                content_summaries.append((idx, title, content))
-            except Exception as e:
-                content_summaries.append((idx, title, f"❌ Timeout processing {title}"))
+    Returns:
+        List of formatted content summaries
+    """
+    if not urls_data:
+        return []
+    
+    deadline = WEB_FETCH_DEADLINE if deadline is None else deadline
+    tasks = [asyncio.create_task(aprocess_webpage_content(url, max_chars)) for _, _, url in urls_data]
+    try:
+        await asyncio.wait(tasks, timeout=deadline)
+    finally:
+        # Also runs if the caller is cancelled, so no fetch outlives the search
+        stragglers = [task for task in tasks if not task.done()]
+        for task in stragglers:
+            task.cancel()
+        if stragglers:
+            await asyncio.gather(*stragglers, return_exceptions=True)
     
+    content_summaries = []
+    for (idx, title, _), task in zip(urls_data, tasks):
+        if task.cancelled():
+            content_summaries.append((idx, title, f"❌ Timeout processing {title}"))
+        else:
+            content_summaries.append((idx, title, task.result()))
+    
+    return _format_content_summaries(content_summaries)
+
+def _format_content_summaries(content_summaries: list) -> list:
     # Sort by original index to maintain order
     content_summaries.sort(key=lambda x: x[0])
     
@@ -392,94 +579,148 @@ def process_urls_concurrently(urls_data: list, max_chars: int = 500) -> list:
     
     return formatted_summaries
 
-def search_web_enhanced(query: str, location: str = "United States", include_content: bool = True) -> Tuple[str, str]:
+def search_web_enhanced(query: str, location: str = "United States", include_content: bool = True,
+                        timeout: float = None) -> Tuple[str, str]:
     """Enhanced web search with optional webpage content reading.
     
     Args:
         query: The search query
         location: Location for localized results
         include_content: Whether to fetch and summarize webpage content
+        timeout: Seconds for the whole search; page fetches get what's left
+            (at most WEB_FETCH_DEADLINE)
         
     Returns:
         Tuple of (full_response_for_user, condensed_version_for_memory)
     """
+    started = time.monotonic()
     try:
-        # Get API key from environment variable
-        api_key = os.getenv('SERPAPI_KEY')
-        if not api_key:
-            error_msg = "❌ Web search unavailable: SERPAPI_KEY environment variable not set"
-            return error_msg, error_msg
+        results, notice = get_search_provider().search(query, location)
         
-        params = {
-            "q": query,
-            "location": location,
-            "hl": "en",
-            "gl": "us",
-            "google_domain": "google.com",
-            "api_key": api_key,
-            "num": 5  # Limit to 5 results
-        }
-        
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
-        # Check for errors
-        if "error" in results:
-            error_msg = f"❌ Search error: {results['error']}"
+        error_msg, basic_results, urls_processed = _format_search_results(query, results, include_content, notice)
+        if error_msg:
             return error_msg, error_msg
         
-        # Format the basic results
-        organic_results = results.get("organic_results", [])
-        if not organic_results:
-            no_results_msg = f"🔍 No web search results found for '{query}'"
-            return no_results_msg, no_results_msg
+        # Process webpage content concurrently if requested
+        content_summaries = []
+        if include_content and urls_processed:
+            content_summaries = _indexed_content_summaries(results, urls_processed, max_chars=400)
+            if content_summaries is None:
+                print(f"🔄 Processing {len(urls_processed)} websites concurrently...")
+                
+                # Use concurrent processing instead of sequential
+                content_summaries = process_urls_concurrently(urls_processed, max_chars=400,
+                                                              deadline=_fetch_deadline(started, timeout))
         
-        # Build basic search results
-        formatted_results = [f"🌐 Web search results for '{query}':\n"]
-        urls_processed = []
+        return _search_response(query, results, basic_results, content_summaries, include_content, urls_processed)
         
-        for i, result in enumerate(organic_results[:5], 1):  # Top 5 results
-            title = result.get("title", "No title")
-            link = result.get("link", "")
-            snippet = result.get("snippet", "No description available")
-            
-            # Truncate long snippets
-            if len(snippet) > 200:
-                snippet = snippet[:197] + "..."
-            
-            formatted_results.append(f"{i}. **{title}**")
-            formatted_results.append(f"   {snippet}")
-            formatted_results.append(f"   🔗 {link}\n")
-            
-            # Collect URLs for content processing (top 3 only to avoid being slow)
-            if include_content and i <= 3 and link:
-                urls_processed.append((i, title, link))
+    except Exception as e:
+        error_msg = f"❌ Enhanced web search failed: {str(e)}"
+        return error_msg, error_msg
+
+async def asearch_web_enhanced(query: str, location: str = "United States", include_content: bool = True,
+                               timeout: float = None) -> Tuple[str, str]:
+    """Async version of search_web_enhanced, on the shared async HTTP client."""
+    started = time.monotonic()
+    try:
+        results, notice = await get_search_provider().asearch(query, location)
         
-        basic_results = "\n".join(formatted_results)
+        error_msg, basic_results, urls_processed = _format_search_results(query, results, include_content, notice)
+        if error_msg:
+            return error_msg, error_msg
         
-        # Process webpage content concurrently if requested
-        full_response = basic_results
+        content_summaries = []
         if include_content and urls_processed:
-            print(f"🔄 Processing {len(urls_processed)} websites concurrently...")
-            
-            # Use concurrent processing instead of sequential
-            content_summaries = process_urls_concurrently(urls_processed, max_chars=400)
-            
-            if content_summaries:
-                full_response += "\n📖 **Webpage Content Summaries:**\n" + "\n".join(content_summaries)
+            content_summaries = _indexed_content_summaries(results, urls_processed, max_chars=400)
+            if content_summaries is None:
+                print(f"🔄 Processing {len(urls_processed)} websites concurrently...")
+                content_summaries = await aprocess_urls_concurrently(urls_processed, max_chars=400,
+                                                                     deadline=_fetch_deadline(started, timeout))
         
-        # Create condensed version for memory (memory-safe)
-        num_results = len(organic_results)
-        memory_version = f"🌐 Web search: '{query}' - Found {num_results} results"
-        if include_content:
-            memory_version += f" with content summaries from top {len(urls_processed)} websites"
-        
-        return full_response, memory_version
+        return _search_response(query, results, basic_results, content_summaries, include_content, urls_processed)
         
     except Exception as e:
         error_msg = f"❌ Enhanced web search failed: {str(e)}"
         return error_msg, error_msg
 
+def _fetch_deadline(started: float, timeout: Optional[float]) -> float:
+    """Seconds the page fan-out may take within a search's overall timeout."""
+    if timeout is None:
+        return WEB_FETCH_DEADLINE
+    return max(0.0, min(WEB_FETCH_DEADLINE, started + timeout - time.monotonic()))
+
+def _indexed_content_summaries(results: dict, urls_processed: list, max_chars: int) -> Optional[list]:
+    """Content summaries from text the provider returned (local index results), or None to fetch the pages."""
+    organic_results = results.get("organic_results", [])
+    if not all("content" in organic_results[idx - 1] for idx, _, _ in urls_processed):
+        return None
+    return _format_content_summaries([
+        (idx, title, _summarize_page(url, organic_results[idx - 1]["content"], max_chars))
+        for idx, title, url in urls_processed
+    ])
+
+def _format_search_results(query: str, results: dict, include_content: bool,
+                           notice: str = None) -> Tuple[Optional[str], str, list]:
+    """Format SerpAPI results.
+    
+    Args:
+        query: The search query
+        results: SerpAPI response (or cached results)
+        include_content: Whether to collect URLs for content processing
+        notice: Shown above the results when they come from an expired cache entry
+    
+    Returns:
+        Tuple of (error or no-results message, formatted results,
+        (index, title, url) tuples to fetch content from)
+    """
+    # Check for errors
+    if "error" in results:
+        return f"❌ Search error: {results['error']}", "", []
+    
+    # Format the basic results
+    organic_results = results.get("organic_results", [])
+    if not organic_results:
+        return f"🔍 No web search results found for '{query}'", "", []
+    
+    # Build basic search results
+    formatted_results = [f"🌐 Web search results for '{query}':\n"]
+    if notice:
+        formatted_results.insert(0, notice)
+    urls_processed = []
+    
+    for i, result in enumerate(organic_results[:SEARCH_RESULT_COUNT], 1):
+        title = result.get("title", "No title")
+        link = result.get("link", "")
+        snippet = result.get("snippet", "No description available")
+        
+        # Truncate long snippets
+        if len(snippet) > 200:
+            snippet = snippet[:197] + "..."
+        
+        formatted_results.append(f"{i}. **{title}**")
+        formatted_results.append(f"   {snippet}")
+        formatted_results.append(f"   🔗 {link}\n")
+        
+        # Collect URLs for content processing (top WEB_CONTENT_PAGES only to avoid being slow)
+        if include_content and i <= WEB_CONTENT_PAGES and link:
+            urls_processed.append((i, title, link))
+    
+    return None, "\n".join(formatted_results), urls_processed
+
+def _search_response(query: str, results: dict, basic_results: str, content_summaries: list,
+                     include_content: bool, urls_processed: list) -> Tuple[str, str]:
+    full_response = basic_results
+    if content_summaries:
+        full_response += "\n📖 **Webpage Content Summaries:**\n" + "\n".join(content_summaries)
+    
+    # Create condensed version for memory (memory-safe)
+    num_results = len(results.get("organic_results", []))
+    memory_version = f"🌐 Web search: '{query}' - Found {num_results} results"
+    if include_content:
+        memory_version += f" with content summaries from top {len(urls_processed)} websites"
+    
+    return full_response, memory_version
+
 def search_web(query: str, location: str = "United States") -> str:
     """Original search_web function - now uses enhanced version internally.
     
@@ -493,14 +734,221 @@ def search_web(query: str, location: str = "United States") -> str:
     full_response, _ = search_web_enhanced(query, location, include_content=True)
     return full_response
 
-def run_chat_message(message: str, project_id: int = None) -> str:
+def run_tool(tool_name: str, tool_args: dict, project_id: int = None, timeout: float = None) -> str:
+    """Run a single tool call requested by the model.
+    
+    Args:
+        tool_name: Name of the tool from TOOLS
+        tool_args: Arguments supplied by the model
+        project_id: Project ID for memory-scoped tools
+        timeout: Seconds the Canvas and web tools' requests may take in
+            total, so a slow service doesn't hold the worker (no limit if None)
+        
+    Returns:
+        Tool output as a string for the model
+    """
+    if tool_name == "get_assignments":
+        result = get_assignments(**{**tool_args, "timeout": timeout})
+    elif tool_name == "get_announcements":
+        result = get_announcements(**{**tool_args, "timeout": timeout})
+    elif tool_name == "get_calendar_events":
+        result = get_calendar_events(**{**tool_args, "timeout": timeout})
+    elif tool_name == "get_courses":
+        result = get_courses(timeout=timeout)
+    elif tool_name == "search_memory":
+        # Handle autonomous memory search (project-scoped)
+        search_term = tool_args.get("term", "")
+        if MEMORY_SEARCH_MODE == "hybrid":
+            memory_results = hybrid_search(search_term, limit=5, project_id=project_id)
+        else:
+            memory_results = search_memory(search_term, limit=5, project_id=project_id)
+        result = format_memory_results_for_llm(memory_results)
+    elif tool_name == "search_web":
+        # Handle web search with enhanced content reading
+        query = tool_args.get("query", "")
+        location = tool_args.get("location", "United States")
+        
+        # Use enhanced search that returns both full response and memory-safe version
+        full_response, memory_version = search_web_enhanced(query, location, include_content=True, timeout=timeout)
+        
+        # Log the memory-safe version instead of the full response
+        log_message("assistant", f"🔧 Web Search Tool: {memory_version}", project_id)
+        
+        # Return the full response for the AI to use
+        result = full_response
+    else:
+        result = f"Unknown tool: {tool_name}"
+    
+    return str(result)
+
+def _tool_timeout(tool_name: str) -> float:
+    return TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+
+def _timed_tool(tool_name: str, tool_args: dict, project_id: int = None) -> Tuple[str, float]:
+    start = time.perf_counter()
+    try:
+        result = run_tool(tool_name, tool_args, project_id,
+                          timeout=max(_tool_timeout(tool_name) - TOOL_TIMEOUT_MARGIN, 0.0))
+    except Exception as e:
+        result = f"❌ {tool_name} failed: {e}"
+    return result, time.perf_counter() - start
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+class _ToolRun:
+    """One tool call on the shared tool pool; its deadline starts when a worker picks it up.
+    
+    Waiting for a free worker gets an allowance of its own (the tool's
+    timeout again); a call still queued after that is cancelled.
+    """
+    
+    def __init__(self, tool_name: str, tool_args: dict, project_id: int = None):
+        self.tool_name = tool_name
+        self.timeout = _tool_timeout(tool_name)
+        self.started = threading.Event()
+        self.start_time = None
+        self._lock = threading.Lock()
+        self._waiters = []  # (loop, future) of async callers waiting for the start
+        self.future = _tool_executor.submit(self._run, tool_args, project_id)
+    
+    def _run(self, tool_args: dict, project_id: int) -> Tuple[str, float]:
+        with self._lock:
+            self.start_time = time.perf_counter()
+            self.started.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        return _timed_tool(self.tool_name, tool_args, project_id)
+    
+    def _not_started(self) -> Tuple[str, float]:
+        return f"⏰ {self.tool_name} didn't start within {self.timeout}s (tool pool busy)", self.timeout
+    
+    def _timed_out(self) -> Tuple[str, float]:
+        return f"⏰ {self.tool_name} timed out after {self.timeout}s", self.timeout
+    
+    def _remaining(self) -> float:
+        if self.start_time is None:
+            return self.timeout  # Picked up by a worker this instant
+        return max(0.0, self.start_time + self.timeout - time.perf_counter())
+    
+    def result(self) -> Tuple[str, float]:
+        if not self.started.wait(self.timeout) and self.future.cancel():
+            return self._not_started()
+        self.started.wait()  # Started just as the allowance ran out
+        try:
+            return self.future.result(timeout=self._remaining())
+        except TimeoutError:
+            return self._timed_out()
+    
+    async def aresult(self) -> Tuple[str, float]:
+        """Async version of result(); waits on the event loop, not in a thread."""
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        with self._lock:
+            if self.started.is_set():
+                started.set_result(None)
+            else:
+                self._waiters.append((loop, started))
+        try:
+            await asyncio.wait_for(started, self.timeout)
+        except asyncio.TimeoutError:
+            if self.future.cancel():
+                return self._not_started()
+        try:
+            # Shielded: the worker can't be interrupted, and finishes on its own deadline
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.future)), self._remaining())
+        except asyncio.TimeoutError:
+            return self._timed_out()
+
+def execute_tool_calls(tool_calls: list, project_id: int = None) -> Tuple[List[dict], List[Tuple[str, float]]]:
+    """Run a model response's tool calls concurrently on the shared tool pool.
+    
+    Each call gets its own deadline (TOOL_TIMEOUTS) measured from when it
+    starts running, so time spent waiting for a worker doesn't count. The
+    Canvas and web tools are given the deadline too and stop their
+    requests in time, which frees the worker; a call that still misses it
+    is reported to the model as timed out.
+    
+    Args:
+        tool_calls: Tool calls from the model response
+        project_id: Project ID for memory-scoped tools
+        
+    Returns:
+        Tuple of (tool messages in the original call order,
+        (tool name, seconds) latency for each call)
+    """
+    calls = _parse_tool_calls(tool_calls)
+    runs = [_ToolRun(name, args, project_id) for name, args in calls]
+    
+    results = []
+    timings = []
+    for run in runs:
+        result, elapsed = run.result()
+        results.append({"role": "tool", "name": run.tool_name, "content": result})
+        timings.append((run.tool_name, elapsed))
+    
+    print("⏱️ Tools: " + ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in timings))
+    return results, timings
+
+def _parse_tool_calls(tool_calls: list) -> List[Tuple[str, dict]]:
+    calls = []
+    for tool_call in tool_calls:
+        tool_args = tool_call.function.arguments
+        if isinstance(tool_args, str):
+            tool_args = json.loads(tool_args)
+        calls.append((tool_call.function.name, tool_args or {}))
+    return calls
+
+async def _asearch_web_tool(tool_args: dict, project_id: int = None) -> Tuple[str, float]:
+    # Web search is I/O-bound end to end, so it runs on the event loop
+    start = time.perf_counter()
+    timeout = _tool_timeout("search_web")
+    try:
+        full_response, memory_version = await asyncio.wait_for(asearch_web_enhanced(
+            tool_args.get("query", ""), tool_args.get("location", "United States"), include_content=True,
+            timeout=max(timeout - TOOL_TIMEOUT_MARGIN, 0.0)
+        ), timeout)
+    except asyncio.TimeoutError:
+        return f"⏰ search_web timed out after {timeout}s", timeout
+    except Exception as e:
+        return f"❌ search_web failed: {e}", time.perf_counter() - start
+    log_message("assistant", f"🔧 Web Search Tool: {memory_version}", project_id)
+    return full_response, time.perf_counter() - start
+
+async def _atimed_tool(tool_name: str, tool_args: dict, project_id: int = None) -> Tuple[str, float]:
+    if tool_name == "search_web":
+        return await _asearch_web_tool(tool_args, project_id)
+    # Canvas and memory tools share the sync tool pool (and its connection pools/caches)
+    return await _ToolRun(tool_name, tool_args, project_id).aresult()
+
+async def aexecute_tool_calls(tool_calls: list, project_id: int = None) -> Tuple[List[dict], List[Tuple[str, float]]]:
+    """Async version of execute_tool_calls, with the same per-tool deadlines."""
+    calls = _parse_tool_calls(tool_calls)
+    outcomes = await asyncio.gather(*(_atimed_tool(name, args, project_id) for name, args in calls))
+    
+    results = [{"role": "tool", "name": name, "content": str(result)} for (name, _), (result, _) in zip(calls, outcomes)]
+    timings = [(name, elapsed) for (name, _), (_, elapsed) in zip(calls, outcomes)]
+    print("⏱️ Tools: " + ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in timings))
+    return results, timings
+
+def _prepare_chat(message: str, project_id: int = None) -> Tuple[Optional[str], List[dict]]:
+    """Log the user message and assemble the prompt for a chat turn.
+    
+    Returns:
+        Tuple of (complete reply if the message was answered without the
+        model, e.g. a manual memory search; otherwise None, prompt messages)
+    """
     # Log the user message first
     log_message("user", message, project_id)
+    schedule_indexing()
     
-    # Check if we should generate/update project summary (periodic summarization)
+    # Refresh the project summary in the background (periodic summarization);
+    # this turn uses the current summary rather than waiting for a new one
     if project_id and should_update_summary(project_id):
-        print("🧠 Updating project summary...")
-        generate_project_summary(project_id)
+        print("🧠 Updating project summary in the background...")
+        submit_summary_job(project_id)
     
     # Check if this is a manual memory search query first (fallback behavior)
     manual_search_term = detect_memory_query(message)
@@ -508,12 +956,15 @@ def run_chat_message(message: str, project_id: int = None) -> str:
         results = search_memory(manual_search_term, project_id=project_id)
         reply = format_memory_results(results, manual_search_term)
         log_message("assistant", reply, project_id)
-        return reply
+        return reply, []
     
     today_str = datetime.now().strftime("%B %d, %Y")
 
-    # Get recent conversation history (last 6 messages to leave room for memory search results)
-    recent_history = get_conversation_messages(limit=6, project_id=project_id)
+    # History since the summary, anchored so the cached prompt prefix survives across turns
+    recent_history = get_history_window(project_id, limit=CONTEXT_HISTORY_LIMIT, block=HISTORY_DROP_BLOCK)
+    # The current message was just logged; it is added separately as the last turn
+    if recent_history and recent_history[-1] == {"role": "user", "content": message}:
+        recent_history = recent_history[:-1]
     
     # Get project-specific system prompt
     project_system_prompt = "You are an AI assistant with access to Canvas LMS tools and conversation memory."
@@ -522,96 +973,179 @@ def run_chat_message(message: str, project_id: int = None) -> str:
         if project and project.get('system_prompt'):
             project_system_prompt = project['system_prompt']
     
-    # Build messages array starting with enhanced system prompt
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                f"{project_system_prompt} "
-                f"The current date is {today_str}. "
-                "When users ask about assignments, homework, announcements, calendar events, or courses, "
-                "use the appropriate Canvas tools to get real data. "
-                "When users refer to past conversations, ask about previous topics they mentioned, "
-                "or when context from earlier discussions would help answer their question, "
-                "use the search_memory tool to find relevant information from conversation history. "
-                "Be helpful and conversational in your responses, and use memory search proactively "
-                "when it would provide valuable context for your answer."
-            )
-        }
-    ]
+    # Kept byte-identical across turns so Ollama can reuse the cached prompt prefix;
+    # anything that changes per turn goes in context_note instead
+    system_prompt = (
+        f"{project_system_prompt} "
+        "When users ask about assignments, homework, announcements, calendar events, or courses, "
+        "use the appropriate Canvas tools to get real data. "
+        "When users refer to past conversations, ask about previous topics they mentioned, "
+        "or when context from earlier discussions would help answer their question, "
+        "use the search_memory tool to find relevant information from conversation history. "
+        "Be helpful and conversational in your responses, and use memory search proactively "
+        "when it would provide valuable context for your answer."
+    )
     
-    # Inject project summary if available (context injection)
-    if project_id:
-        summary = get_project_summary(project_id)
-        if summary:
-            messages.append({
-                "role": "system",
-                "content": f"🧠 Project Summary: {summary}"
-            })
+    # Project summary for context injection
+    summary = get_project_summary(project_id) if project_id else None
     
-    # Add recent conversation history
-    messages.extend(recent_history)
+    # Assemble system prompt, summary, history and the user message within the token budget
+    messages, context_report = build_context(
+        system_prompt, message, summary=summary, history=recent_history, tools=TOOLS,
+        context_note=f"The current date is {today_str}."
+    )
+    if context_report["truncated"] or context_report["dropped"]:
+        print(f"✂️ Context: {context_report['tokens']}/{context_report['budget']} tokens, "
+              f"truncated {context_report['truncated']}, dropped {len(context_report['dropped'])} part(s)")
+    return None, messages
+
+def stream_chat_message(message: str, project_id: int = None) -> Iterator[dict]:
+    """Process a chat message, streaming the reply as it is generated.
     
-    # Add the current user message
-    messages.append({
-        "role": "user",
-        "content": message
-    })
+    Args:
+        message: The user's message
+        project_id: Project ID for memory and context (default project if None)
+        
+    Yields:
+        Event dicts: {"type": "token", "content": str} for reply text and
+        {"type": "tool", "name": str} when a tool is about to run. The
+        assistant reply is logged once the stream completes.
+    """
+    reply, messages = _prepare_chat(message, project_id)
+    if reply is not None:
+        yield {"type": "token", "content": reply}
+        return
 
-    response = chat(model="qwen3:4b", messages=messages, tools=TOOLS)
-    tool_calls = getattr(response.message, "tool_calls", None)
+    # Obvious Canvas/web requests run their tools up front, so the model
+    # answers in one call instead of first being asked which tool to use
+    route = tool_router.route(message)
+    if route is not None:
+        for name, _ in route.calls:
+            yield {"type": "tool", "name": name}
+        results, _ = execute_tool_calls(route.tool_calls, project_id)
+        # The answering call still offers the tools, so their schema shares the budget
+        _append_tool_results(messages, "", route.tool_calls, results, tools=TOOLS)
+
+    # Stream the first response; tool calls arrive as their own chunk
+    reply_parts = []
+    tool_calls = []
+    started = time.perf_counter()
+    for chunk in get_backend().chat(messages, task="chat", tools=TOOLS, stream=True,
+                                    kind="routed" if route else None):
+        if chunk.message.tool_calls:
+            tool_calls.extend(chunk.message.tool_calls)
+        if chunk.message.content:
+            reply_parts.append(chunk.message.content)
+            yield {"type": "token", "content": chunk.message.content}
 
     if not tool_calls:
-        # Log assistant response and return
-        assistant_response = response.message.content
-        log_message("assistant", assistant_response, project_id)
-        return assistant_response
+        # Log assistant response once the stream is complete
+        log_message("assistant", "".join(reply_parts), project_id)
+        return
+    _record_tool_choice(route, tool_calls, time.perf_counter() - started)
 
-    results = []
     for tool_call in tool_calls:
-        tool_name = tool_call.function.name
-        tool_args = tool_call.function.arguments
-        if isinstance(tool_args, str):
-            tool_args = json.loads(tool_args)
+        yield {"type": "tool", "name": tool_call.function.name}
+    results, _ = execute_tool_calls(tool_calls, project_id)
+    _append_tool_results(messages, "".join(reply_parts), tool_calls, results)
 
-        if tool_name == "get_assignments":
-            result = get_assignments(**tool_args)
-        elif tool_name == "get_announcements":
-            result = get_announcements(**tool_args)
-        elif tool_name == "get_calendar_events":
-            result = get_calendar_events(**tool_args)
-        elif tool_name == "get_courses":
-            result = get_courses()
-        elif tool_name == "search_memory":
-            # Handle autonomous memory search (project-scoped)
-            search_term = tool_args.get("term", "")
-            memory_results = search_memory(search_term, limit=5, project_id=project_id)
-            result = format_memory_results_for_llm(memory_results)
-        elif tool_name == "search_web":
-            # Handle web search with enhanced content reading
-            query = tool_args.get("query", "")
-            location = tool_args.get("location", "United States")
-            
-            # Use enhanced search that returns both full response and memory-safe version
-            full_response, memory_version = search_web_enhanced(query, location, include_content=True)
-            
-            # Log the memory-safe version instead of the full response
-            log_message("assistant", f"🔧 Web Search Tool: {memory_version}", project_id)
-            
-            # Return the full response for the AI to use
-            result = full_response
-        else:
-            result = f"Unknown tool: {tool_name}"
+    # Stream the final answer
+    reply_parts = []
+    for chunk in get_backend().chat(messages, task="chat", stream=True, kind="follow_up"):
+        if chunk.message.content:
+            reply_parts.append(chunk.message.content)
+            yield {"type": "token", "content": chunk.message.content}
+    
+    # Log the final assistant response
+    log_message("assistant", "".join(reply_parts), project_id)
 
-        results.append({"role": "tool", "name": tool_name, "content": str(result)})
+def _record_tool_choice(route, tool_calls: list, seconds: float) -> None:
+    # Unrouted tool-choice calls are what routing saves; on routed turns more tools mean the route fell short
+    if route is None:
+        tool_router.record_tool_choice(seconds)
+    else:
+        tool_router.record_extra_tools(route, tool_calls)
 
-    messages.append({"role": "assistant", "tool_calls": tool_calls})
+def _append_tool_results(messages: List[dict], reply: str, tool_calls: list, results: List[dict],
+                         tools: list = None) -> None:
+    messages.append({"role": "assistant", "content": reply, "tool_calls": tool_calls})
+    
+    # Keep long tool outputs (e.g. web pages) within the remaining budget
+    results, tool_report = fit_tool_results(messages, results, tools=tools)
+    if tool_report["dropped"]:
+        print(f"✂️ Dropped {len(tool_report['dropped'])} old history message(s) to make room for tool results")
+    if tool_report["truncated"]:
+        print(f"✂️ Tool results truncated to fit {tool_report['budget']} tokens: {tool_report['truncated']}")
     messages.extend(results)
 
-    follow_up = chat(model="qwen3:4b", messages=messages)
+async def astream_chat_message(message: str, project_id: int = None) -> AsyncIterator[dict]:
+    """Async version of stream_chat_message for the ASGI app.
     
-    # Log the final assistant response
-    assistant_response = follow_up.message.content
-    log_message("assistant", assistant_response, project_id)
+    Model calls go through the backend's async client, so a slow generation
+    holds no thread; prompt assembly (SQLite reads) runs in a worker thread.
+    
+    Yields:
+        The same event dicts as stream_chat_message
+    """
+    reply, messages = await asyncio.to_thread(_prepare_chat, message, project_id)
+    if reply is not None:
+        yield {"type": "token", "content": reply}
+        return
     
-    return assistant_response
+    route = tool_router.route(message)
+    if route is not None:
+        for name, _ in route.calls:
+            yield {"type": "tool", "name": name}
+        results, _ = await aexecute_tool_calls(route.tool_calls, project_id)
+        # The answering call still offers the tools, so their schema shares the budget
+        _append_tool_results(messages, "", route.tool_calls, results, tools=TOOLS)
+    
+    backend = get_backend()
+    reply_parts = []
+    tool_calls = []
+    started = time.perf_counter()
+    async for chunk in await backend.achat(messages, task="chat", tools=TOOLS, stream=True,
+                                           kind="routed" if route else None):
+        if chunk.message.tool_calls:
+            tool_calls.extend(chunk.message.tool_calls)
+        if chunk.message.content:
+            reply_parts.append(chunk.message.content)
+            yield {"type": "token", "content": chunk.message.content}
+    
+    if tool_calls:
+        _record_tool_choice(route, tool_calls, time.perf_counter() - started)
+        for tool_call in tool_calls:
+            yield {"type": "tool", "name": tool_call.function.name}
+        results, _ = await aexecute_tool_calls(tool_calls, project_id)
+        _append_tool_results(messages, "".join(reply_parts), tool_calls, results)
+        
+        reply_parts = []
+        async for chunk in await backend.achat(messages, task="chat", stream=True, kind="follow_up"):
+            if chunk.message.content:
+                reply_parts.append(chunk.message.content)
+                yield {"type": "token", "content": chunk.message.content}
+    
+    log_message("assistant", "".join(reply_parts), project_id)
+
+async def arun_chat_message(message: str, project_id: int = None) -> str:
+    """Async version of run_chat_message."""
+    parts = []
+    async for event in astream_chat_message(message, project_id):
+        if event["type"] == "token":
+            parts.append(event["content"])
+    return "".join(parts)
+
+def run_chat_message(message: str, project_id: int = None) -> str:
+    """Process a chat message and return the complete reply.
+    
+    Args:
+        message: The user's message
+        project_id: Project ID for memory and context (default project if None)
+        
+    Returns:
+        The assistant's reply
+    """
+    return "".join(
+        event["content"] for event in stream_chat_message(message, project_id)
+        if event["type"] == "token"
+    )
@@ -0,0 +1,224 @@
+# context_builder.py
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Total prompt budget in tokens, including the tool schema
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+# Optional tokenizer.json for exact counts (e.g. from the model's Hugging Face repo)
+TOKENIZER_PATH = os.getenv("TOKENIZER_PATH")
+
+MIN_TRUNCATED_TOKENS = 64     # Don't keep a truncated part smaller than this
+MIN_TOOL_RESULT_TOKENS = 256  # Room kept for each tool result, dropping old history if needed
+HISTORY_DROP_BLOCK = 10       # Old history messages dropped at a time, so the prompt prefix moves rarely
+TOKENS_PER_MESSAGE = 4        # Chat template overhead per message
+
+_tokenizer = None
+_tokenizer_loaded = False
+
+def _get_tokenizer():
+    """Load the tokenizers tokenizer from TOKENIZER_PATH once, if configured."""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        _tokenizer_loaded = True
+        if TOKENIZER_PATH:
+            try:
+                from tokenizers import Tokenizer
+                _tokenizer = Tokenizer.from_file(TOKENIZER_PATH)
+            except Exception as e:
+                print(f"⚠️ Could not load tokenizer, using estimates: {e}")
+    return _tokenizer
+
+def estimate_tokens(text: str) -> int:
+    """Count or estimate the number of tokens in a text.
+
+    Uses the configured tokenizer when available, otherwise a fast
+    heuristic of about 4 characters per token (which slightly overestimates
+    typical English text, erring on the side of staying under budget).
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Token count
+    """
+    if not text:
+        return 0
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return len(text) // 4 + 1
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(message.get("content") or "") + TOKENS_PER_MESSAGE
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Shorten text to roughly max_tokens, cutting at a word boundary.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token limit
+
+    Returns:
+        The original text if it fits, otherwise a truncated copy ending in "…"
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Scale by the observed chars-per-token ratio, then trim to a word boundary
+    ratio = len(text) / max(estimate_tokens(text), 1)
+    cut = text[:max(int(max_tokens * ratio) - 1, 0)]
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return cut + "…"
+
+def build_context(system_prompt: str, user_message: str, summary: Optional[str] = None,
+                  history: List[dict] = (), tools: list = None, context_note: str = None,
+                  budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[List[dict], Dict]:
+    """Assemble the chat prompt within a token budget, by priority.
+
+    Priority order: system prompt, context note and current user message
+    (always kept), project summary, then conversation history. The summary
+    is truncated if it doesn't fit and a useful amount of room is left,
+    otherwise dropped. History that doesn't fit loses its oldest messages
+    in blocks of HISTORY_DROP_BLOCK; only if even the newest message alone
+    doesn't fit is it truncated.
+
+    Layout keeps the prompt prefix byte-stable across turns so Ollama can
+    reuse its cached prompt evaluation: the fixed system prompt comes
+    first, then history (which grows at the end, and loses old messages
+    only a block at a time), and content that changes between turns
+    (context note, summary) sits just before the user message.
+
+    Args:
+        system_prompt: Stable system message content
+        user_message: The current user message
+        summary: Project summary to inject (optional)
+        history: Previous messages in chronological order
+        tools: Tool schema sent with the request (counted against the budget)
+        context_note: Volatile per-turn context such as the current date (optional)
+        budget: Total token budget
+
+    Returns:
+        Tuple of (messages for the chat model, report dict with 'tokens',
+        'budget', 'truncated' and 'dropped' entries)
+    """
+    report = {"budget": budget, "truncated": [], "dropped": []}
+    system = {"role": "system", "content": system_prompt}
+    user = {"role": "user", "content": user_message}
+
+    used = message_tokens(system) + message_tokens(user)
+    if tools:
+        used += estimate_tokens(json.dumps(tools))
+    if context_note:
+        used += estimate_tokens(context_note) + TOKENS_PER_MESSAGE
+
+    def fit(message: dict, label: str) -> Optional[dict]:
+        nonlocal used
+        tokens = message_tokens(message)
+        remaining = budget - used
+        if tokens <= remaining:
+            used += tokens
+            return message
+        if remaining - TOKENS_PER_MESSAGE >= MIN_TRUNCATED_TOKENS:
+            shortened = dict(message, content=truncate_to_tokens(message["content"], remaining - TOKENS_PER_MESSAGE))
+            used += message_tokens(shortened)
+            report["truncated"].append(label)
+            return shortened
+        report["dropped"].append(label)
+        return None
+
+    volatile = [context_note] if context_note else []
+    if summary:
+        summary_message = fit({"role": "system", "content": f"🧠 Project Summary: {summary}"}, "summary")
+        if summary_message:
+            if context_note:
+                # Already counted the note's per-message overhead
+                used -= TOKENS_PER_MESSAGE
+            volatile.append(summary_message["content"])
+
+    # Drop the oldest turns a block at a time until the rest fits whole; dropping
+    # exactly as many as needed would shift the prompt prefix every turn
+    history = list(history)
+    tokens = [message_tokens(message) for message in history]
+    start, total = 0, sum(tokens)
+    while start < len(history) and total > budget - used:
+        total -= sum(tokens[start:start + HISTORY_DROP_BLOCK])
+        start += HISTORY_DROP_BLOCK
+    start = min(start, len(history))
+    kept = history[start:]
+    used += total if kept else 0
+    if not kept and history:
+        # Not even the newest message fits whole; keep what fits of it
+        start = len(history) - 1
+        newest = fit(history[-1], f"history[{start}]")
+        kept = [newest] if newest else []
+    report["dropped"].extend(f"history[{i}]" for i in range(start))
+
+    messages = [system]
+    messages.extend(kept)
+    if volatile:
+        messages.append({"role": "system", "content": "\n\n".join(volatile)})
+    messages.append(user)
+    report["tokens"] = used
+    return messages, report
+
+def _history_indices(messages: List[dict]) -> List[int]:
+    """Indices of history turns: user/assistant messages between the system prompt and the current user message."""
+    current = max((i for i, message in enumerate(messages) if message.get("role") == "user"), default=0)
+    return [i for i in range(1, current) if messages[i].get("role") in ("user", "assistant")]
+
+def fit_tool_results(messages: List[dict], tool_results: List[dict], tools: list = None,
+                     budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[List[dict], Dict]:
+    """Truncate tool outputs so the follow-up prompt stays within budget.
+
+    The room left after the existing messages (and the tool schema, if the
+    follow-up call sends one) is shared evenly between tool results; short
+    results give their unused share to longer ones. Each result gets at
+    least MIN_TOOL_RESULT_TOKENS: if there isn't that much room, the oldest
+    history turns are removed from messages to make it, and with no history
+    left the minimum is kept even though it goes over budget.
+
+    Args:
+        messages: Messages already in the prompt (old history may be removed in place)
+        tool_results: Tool messages to append
+        tools: Tool schema sent with the follow-up request (counted against the budget)
+        budget: Total token budget
+
+    Returns:
+        Tuple of (fitted tool messages, report dict with 'tokens',
+        'budget', 'truncated' and 'dropped' entries)
+    """
+    report = {"budget": budget, "truncated": [], "dropped": []}
+    used = sum(message_tokens(message) for message in messages)
+    if tools:
+        used += estimate_tokens(json.dumps(tools))
+    minimums = [min(message_tokens(result), MIN_TOOL_RESULT_TOKENS) for result in tool_results]
+
+    # Make room for every result's minimum share by dropping the oldest history first
+    history = _history_indices(messages)
+    dropped = 0
+    while budget - used < sum(minimums) and dropped < len(history):
+        used -= message_tokens(messages[history[dropped]])
+        dropped += 1
+    for index in reversed(history[:dropped]):
+        del messages[index]
+    report["dropped"] = [f"history[{i}]" for i in range(dropped)]
+    remaining = max(budget - used, 0)
+
+    fitted = [None] * len(tool_results)
+    # Smallest results first, so their leftover share goes to the larger ones
+    order = sorted(range(len(tool_results)), key=lambda i: message_tokens(tool_results[i]))
+    for position, index in enumerate(order):
+        result = tool_results[index]
+        share = max(remaining // (len(order) - position), minimums[index])
+        tokens = message_tokens(result)
+        if tokens > share:
+            result = dict(result, content=truncate_to_tokens(result["content"], max(share - TOKENS_PER_MESSAGE, 0)))
+            tokens = message_tokens(result)
+            report["truncated"].append(result.get("name", f"tool[{index}]"))
+        fitted[index] = result
+        remaining = max(remaining - tokens, 0)
+
+    report["tokens"] = used + sum(message_tokens(result) for result in fitted)
+    return fitted, report
@@ -0,0 +1,224 @@
+# html_extract.py
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+PAGE_TEXT_LIMIT = 3000       # Characters of page text kept
+FALLBACK_TEXT_FACTOR = 4     # Without a content region, read this many times the limit before stopping
+EXTRACT_CHUNK_SIZE = 8192    # Bytes parsed at a time by extract_text
+
+# Subtrees whose text is never page content
+SKIP_TAGS = {"script", "style", "nav", "header", "footer", "aside", "iframe", "noscript", "template", "svg"}
+# Content regions, most preferred first (same order extract_page_text always used)
+REGION_KINDS = ("main", "article", "div_class", "div_id")
+CONTENT_PATTERN = re.compile(r'content|main|article|post', re.I)
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+_HEADER_CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.I)
+
+def detect_encoding(head: bytes, content_type: str = None) -> str:
+    """Pick the text encoding of an HTML page from its headers or first bytes.
+
+    Args:
+        head: The first bytes of the page (a meta charset is usually in the first 1KB)
+        content_type: Content-Type response header, if known
+
+    Returns:
+        A codec name Python knows, utf-8 if nothing usable is declared
+    """
+    candidates = []
+    if head.startswith(codecs.BOM_UTF8):
+        candidates.append("utf-8-sig")
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        if match:
+            candidates.append(match.group(1))
+    match = _META_CHARSET.search(head[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for name in candidates:
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+class _Region:
+    """Text collected inside one candidate content element."""
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.depth = 1          # Open elements with this tag name, including the region itself
+        self.parts: List[str] = []
+        self.length = 0
+        self.closed = False
+
+class PageTextExtractor(HTMLParser):
+    """Incremental main-text extractor for HTML pages.
+
+    Feed raw bytes as they arrive from the network; text is decoded,
+    parsed and collected on the fly, skipping script/style/navigation
+    subtrees instead of building a document tree. Text is gathered for
+    the first <main>, <article> and content-looking <div> (by class, then
+    id) as well as for the whole body, and the most preferred of these
+    that has text is returned, so the result matches the tree-based
+    extraction for typical pages.
+
+    ``done`` turns True once a content region holds enough text, or the
+    body holds several times the limit without any content region; the
+    caller can stop downloading at that point.
+    """
+
+    def __init__(self, limit: int = PAGE_TEXT_LIMIT, content_type: str = None):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.content_type = content_type
+        self.done = False
+        self.bytes_fed = 0
+        self._decoder = None
+        self._head = b""
+        self._skip: List[str] = []                     # Open skipped tags, innermost last
+        self._regions: Dict[str, _Region] = {}         # First region of each kind
+        self._body: Optional[_Region] = None
+        self._all = _Region("document")
+        self._text_seen = 0                            # Characters of (non-skipped) text parsed
+        self._pending: List[str] = []                  # Text node split across feed() calls
+
+    def feed_bytes(self, chunk: bytes) -> None:
+        """Decode and parse the next chunk of the page."""
+        self.bytes_fed += len(chunk)
+        if self._decoder is None:
+            # Wait for enough bytes to find a <meta charset>
+            self._head += chunk
+            if len(self._head) < 1024:
+                return
+            chunk, self._head = self._head, b""
+            self._start_decoder(chunk)
+        self.feed(self._decoder.decode(chunk))
+
+    def _start_decoder(self, head: bytes) -> None:
+        encoding = detect_encoding(head, self.content_type)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def get_text(self) -> str:
+        """Finish parsing and return the extracted text (at most ``limit`` characters)."""
+        if self._decoder is None:
+            self._start_decoder(self._head)
+            self.feed(self._decoder.decode(self._head))
+            self._head = b""
+        self.feed(self._decoder.decode(b"", final=True))
+        self.close()
+        self._flush_text()
+
+        for kind in REGION_KINDS:
+            region = self._regions.get(kind)
+            if region is not None and region.parts:
+                return self._finish(region)
+        # No content region has text: use the richest of body and document
+        return self._finish(max(filter(None, (self._body, self._all)), key=lambda region: region.length))
+
+    def _finish(self, region: _Region) -> str:
+        return " ".join(region.parts)[:self.limit]
+
+    def _collecting(self):
+        yield self._all
+        if self._body is not None:
+            yield self._body
+        for region in self._regions.values():
+            if not region.closed:
+                yield region
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if self._skip:
+            if tag == self._skip[-1] or tag in SKIP_TAGS:
+                self._skip.append(tag)
+            return
+        if tag in SKIP_TAGS:
+            self._skip.append(tag)
+            return
+
+        for region in self._regions.values():
+            if not region.closed and region.tag == tag:
+                region.depth += 1
+
+        if self.done:
+            # Text is no longer collected, so a region opened now would stay empty
+            return
+        if tag == "body" and self._body is None:
+            self._body = _Region("body")
+        elif tag in ("main", "article"):
+            self._regions.setdefault(tag, _Region(tag))
+        elif tag == "div":
+            attributes = dict(attrs)
+            for kind, name in (("div_class", "class"), ("div_id", "id")):
+                if kind not in self._regions and CONTENT_PATTERN.search(attributes.get(name) or ""):
+                    self._regions[kind] = _Region("div")
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags (<br/>, <img/>) never open a region or a skipped subtree
+        self._flush_text()
+
+    def handle_comment(self, data):
+        # Comments separate text nodes, like tags do
+        self._flush_text()
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if self._skip:
+            if tag == self._skip[-1]:
+                self._skip.pop()
+            return
+        for region in self._regions.values():
+            if not region.closed and region.tag == tag:
+                region.depth -= 1
+                if region.depth == 0:
+                    region.closed = True
+
+    def handle_data(self, data):
+        # The parser hands over text that reaches the end of a chunk early;
+        # hold it until the next tag so words aren't split at chunk boundaries
+        if not self._skip and not self.done:
+            self._pending.append(data)
+
+    def _flush_text(self) -> None:
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending = []
+        words = data.split()
+        if not words:
+            return
+        text = " ".join(words)
+        self._text_seen += len(text) + 1
+        for region in self._collecting():
+            if region.length < self.limit:
+                region.parts.append(text)
+                region.length += len(text) + 1
+        self._check_done()
+
+    def _check_done(self) -> None:
+        if any(region.length >= self.limit for region in self._regions.values()):
+            self.done = True
+        elif not self._regions:
+            self.done = self._text_seen >= self.limit * FALLBACK_TEXT_FACTOR
+
+def extract_text(content: bytes, limit: int = PAGE_TEXT_LIMIT, content_type: str = None) -> str:
+    """Extract the main readable text from a complete HTML page.
+
+    Args:
+        content: Raw HTML bytes
+        limit: Maximum characters to return
+        content_type: Content-Type response header, if known
+
+    Returns:
+        Cleaned text, at most ``limit`` characters
+    """
+    extractor = PageTextExtractor(limit, content_type)
+    for start in range(0, len(content), EXTRACT_CHUNK_SIZE):
+        extractor.feed_bytes(content[start:start + EXTRACT_CHUNK_SIZE])
+        if extractor.done:
+            break
+    return extractor.get_text()
@@ -0,0 +1,153 @@
+# jobs.py
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from memory import get_connection, generate_project_summary
+
+JOB_WORKERS = 2   # Concurrent background jobs (each is usually an LLM call)
+# Queued/running jobs older than this don't absorb duplicates (their worker may have died)
+JOB_DEDUPE_WINDOW = 600  # seconds
+
+_executor: Optional[ThreadPoolExecutor] = None
+_active: Dict[str, int] = {}   # dedupe_key -> job ID of the queued/running job
+_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Start the worker pool on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+    return _executor
+
+def _set_status(job_id: int, status: str, result=None, error: str = None) -> None:
+    with get_connection() as conn:
+        if status == "running":
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (status, job_id)
+            )
+        else:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (status, json.dumps(result), error, job_id)
+            )
+
+def _run_job(job_id: int, dedupe_key: Optional[str], fn: Callable, args: tuple, kwargs: dict) -> None:
+    _set_status(job_id, "running")
+    try:
+        result = fn(*args, **kwargs)
+        _set_status(job_id, "done", result=result)
+    except Exception as e:
+        print(f"⚠️ Background job {job_id} failed: {e}")
+        _set_status(job_id, "failed", error=str(e))
+    finally:
+        if dedupe_key:
+            with _lock:
+                if _active.get(dedupe_key) == job_id:
+                    del _active[dedupe_key]
+
+def submit_job(kind: str, fn: Callable, *args, dedupe_key: str = None, **kwargs) -> int:
+    """Queue a function to run on the background worker pool.
+    
+    Args:
+        kind: Job type shown in status records (e.g. 'project_summary')
+        fn: Function to run; its return value must be JSON-serializable
+        *args: Positional arguments for fn
+        dedupe_key: If a job with this key is already queued or running (in
+            any process sharing the database), return its ID instead of
+            queueing a duplicate
+        **kwargs: Keyword arguments for fn
+        
+    Returns:
+        Job ID for polling with get_job()
+    """
+    with _lock:
+        executor = _get_executor()
+        if dedupe_key and dedupe_key in _active:
+            return _active[dedupe_key]
+        
+        with get_connection() as conn:
+            if dedupe_key:
+                while True:
+                    # Check and insert in one statement so other worker processes
+                    # sharing the database coalesce onto the same job
+                    cursor = conn.execute("""
+                        INSERT INTO jobs (kind, dedupe_key)
+                        SELECT ?, ? WHERE NOT EXISTS (
+                            SELECT 1 FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')
+                            AND created_at > datetime('now', ?)
+                        )
+                    """, (kind, dedupe_key, dedupe_key, f"-{JOB_DEDUPE_WINDOW} seconds"))
+                    if cursor.rowcount:
+                        break
+                    row = conn.execute(
+                        "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') "
+                        "ORDER BY id DESC LIMIT 1",
+                        (dedupe_key,)
+                    ).fetchone()
+                    if row is not None:
+                        return row[0]
+                    # The other process's job finished in between; queue a new one
+            else:
+                cursor = conn.execute(
+                    "INSERT INTO jobs (kind, dedupe_key) VALUES (?, ?)",
+                    (kind, dedupe_key)
+                )
+            job_id = cursor.lastrowid
+        
+        if dedupe_key:
+            _active[dedupe_key] = job_id
+    
+    executor.submit(_run_job, job_id, dedupe_key, fn, args, kwargs)
+    return job_id
+
+def get_job(job_id: int) -> Optional[Dict]:
+    """Get a job's status record.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Job dictionary (status is 'queued', 'running', 'done' or 'failed')
+        or None if not found
+    """
+    with get_connection() as conn:
+        row = conn.execute("""
+            SELECT id, kind, status, result, error, created_at, started_at, finished_at
+            FROM jobs WHERE id = ?
+        """, (job_id,)).fetchone()
+    
+    if not row:
+        return None
+    
+    job = dict(zip(("id", "kind", "status", "result", "error", "created_at", "started_at", "finished_at"), row))
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+def _summarize_project(project_id: int) -> str:
+    summary = generate_project_summary(project_id)
+    if not summary:
+        raise RuntimeError("Failed to generate summary")
+    return summary
+
+def submit_summary_job(project_id: int) -> int:
+    """Queue a project summary refresh, reusing one already in progress.
+    
+    Args:
+        project_id: Project ID
+        
+    Returns:
+        Job ID; the job's result is the summary text
+    """
+    return submit_job("project_summary", _summarize_project, project_id, dedupe_key=f"summary:{project_id}")
+
+def shutdown_jobs(wait: bool = True) -> None:
+    """Stop accepting jobs and optionally wait for running ones to finish."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
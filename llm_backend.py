@@ -0,0 +1,655 @@
+# llm_backend.py
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+import httpx
+from ollama import AsyncClient, ChatResponse, Client, Message, ResponseError
+
+# Models per task; summary and tool routing default to the chat model
+CHAT_MODEL = os.getenv("CHAT_MODEL", "qwen3:4b")
+TASK_MODELS = {
+    "chat": CHAT_MODEL,
+    "summary": os.getenv("SUMMARY_MODEL", CHAT_MODEL),
+    "tool_routing": os.getenv("ROUTING_MODEL", CHAT_MODEL),
+}
+
+# Per-model request settings. keep_alive keeps the model (and its prompt
+# cache) loaded between turns; num_ctx must fit CONTEXT_TOKEN_BUDGET.
+DEFAULT_MODEL_SETTINGS = {"keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"), "options": {"num_ctx": 8192}}
+# Per-model overrides, e.g. {"qwen3:8b": {"keep_alive": "1h", "options": {"num_ctx": 16384}}}
+MODEL_SETTINGS = {}
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))   # Seconds per request
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))       # Retries for connection errors and 5xx
+LLM_RETRY_BACKOFF = 0.5                                 # Seconds, doubled per retry
+# Keep-alive connections per Ollama host; concurrent streams beyond this reconnect
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+
+# Several Ollama hosts (comma-separated URLs) are load balanced by OllamaPool
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", "").split(",") if h.strip()]
+OLLAMA_HOST_MAX_CONCURRENCY = int(os.getenv("OLLAMA_HOST_MAX_CONCURRENCY", "4"))  # In-flight requests per host
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))         # Seconds between /api/tags checks
+OLLAMA_HEALTH_TIMEOUT = 3.0          # Seconds
+OLLAMA_CIRCUIT_FAILURES = 3          # Consecutive failures before a host is paused
+OLLAMA_CIRCUIT_COOLDOWN = 30.0       # Seconds a paused host is skipped
+OLLAMA_QUEUE_TIMEOUT = 60.0          # Seconds to wait for a free host slot
+
+# Recent per-call prompt evaluation metrics reported by Ollama
+LLM_METRICS = deque(maxlen=200)
+
+def model_for(task: str) -> str:
+    """Get the model configured for a task ('chat', 'summary', 'tool_routing')."""
+    return TASK_MODELS.get(task, CHAT_MODEL)
+
+def model_settings(model: str) -> dict:
+    """Get the keep_alive/options request settings for a model."""
+    return MODEL_SETTINGS.get(model, DEFAULT_MODEL_SETTINGS)
+
+def record_llm_metrics(kind: str, model: str, response) -> dict:
+    """Record prompt evaluation stats from a final Ollama response chunk.
+
+    Ollama's prompt_eval_count only counts prompt tokens it had to evaluate,
+    so a low count relative to the prompt size means the cached prefix was
+    reused.
+
+    Args:
+        kind: What the call was for ('chat', 'follow_up', 'summary', ...)
+        model: Model name
+        response: Final (done) response or stream chunk
+
+    Returns:
+        The recorded metrics dict
+    """
+    metrics = {
+        "kind": kind,
+        "model": model,
+        "prompt_eval_count": getattr(response, "prompt_eval_count", None) or 0,
+        "prompt_eval_ms": (getattr(response, "prompt_eval_duration", None) or 0) / 1e6,
+        "eval_count": getattr(response, "eval_count", None) or 0,
+        "eval_ms": (getattr(response, "eval_duration", None) or 0) / 1e6,
+    }
+    LLM_METRICS.append(metrics)
+    print(f"📊 {kind}: prompt {metrics['prompt_eval_count']} tok in {metrics['prompt_eval_ms']:.0f}ms, "
+          f"generated {metrics['eval_count']} tok in {metrics['eval_ms']:.0f}ms")
+    return metrics
+
+def get_llm_metrics() -> dict:
+    """Summarize recent prompt evaluation metrics (for status endpoints)."""
+    calls = list(LLM_METRICS)
+    if not calls:
+        return {"calls": 0}
+    return {
+        "calls": len(calls),
+        "avg_prompt_eval_count": round(sum(c["prompt_eval_count"] for c in calls) / len(calls), 1),
+        "avg_prompt_eval_ms": round(sum(c["prompt_eval_ms"] for c in calls) / len(calls), 1),
+        "avg_eval_ms": round(sum(c["eval_ms"] for c in calls) / len(calls), 1),
+    }
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, ResponseError):
+        return error.status_code >= 500
+    # ollama re-raises httpx.ConnectError as the builtin ConnectionError; read/write
+    # errors come from keep-alive connections the server closed
+    return isinstance(error, (ConnectionError, httpx.NetworkError, httpx.TimeoutException, httpx.RemoteProtocolError))
+
+class LLMBackend:
+    """Interface for chat model backends.
+
+    chat() mirrors ollama.chat: it returns a ChatResponse, or an iterator of
+    ChatResponse chunks when stream=True. The model is picked from the task
+    unless given explicitly, and metrics are recorded from the final chunk.
+    """
+
+    def chat(self, messages: List[dict], task: str = "chat", model: str = None, tools: list = None,
+             stream: bool = False, kind: str = None) -> Union[ChatResponse, Iterator[ChatResponse]]:
+        """Send a chat request.
+
+        Args:
+            messages: Chat messages
+            task: Task used to pick the model ('chat', 'summary', 'tool_routing')
+            model: Explicit model name, overriding the task's model
+            tools: Tool schema (optional)
+            stream: Return an iterator of chunks instead of one response
+            kind: Label for recorded metrics (defaults to the task)
+
+        Returns:
+            ChatResponse, or an iterator of ChatResponse chunks when streaming
+        """
+        raise NotImplementedError
+
+    async def achat(self, messages: List[dict], task: str = "chat", model: str = None, tools: list = None,
+                    stream: bool = False, kind: str = None):
+        """Async version of chat(); streams are async iterators."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """Backend status for the system status endpoint."""
+        return {}
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        """Close async clients (from the event loop that used them)."""
+        pass
+
+class OllamaBackend(LLMBackend):
+    """Ollama backend sharing one pooled HTTP client per event loop type.
+
+    ollama.Client keeps an httpx connection pool, so consecutive calls reuse
+    a keep-alive connection instead of the module-level ollama.chat opening
+    its own. Failed requests are retried with backoff on connection errors,
+    timeouts and 5xx responses; streams are only retried before the first
+    chunk arrives.
+    """
+
+    def __init__(self, host: str = None, timeout: float = LLM_TIMEOUT, retries: int = LLM_RETRIES):
+        self.host = host
+        self.timeout = timeout
+        self.retries = retries
+        self.limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+        self.client = Client(host=host, timeout=timeout, limits=self.limits)
+        self._async_client = None
+        self._async_loop = None
+
+    @property
+    def async_client(self) -> AsyncClient:
+        # Connections belong to the event loop that opened them, so keep one client per loop
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = AsyncClient(host=self.host, timeout=self.timeout, limits=self.limits)
+            self._async_loop = loop
+        return self._async_client
+
+    def _request_kwargs(self, task: str, model: str, messages: list, tools: list, stream: bool) -> dict:
+        model = model or model_for(task)
+        kwargs = {"model": model, "messages": messages, "stream": stream, **model_settings(model)}
+        if tools:
+            kwargs["tools"] = tools
+        return kwargs
+
+    def _with_retries(self, call: Callable):
+        for attempt in range(self.retries + 1):
+            try:
+                return call()
+            except Exception as e:
+                if attempt >= self.retries or not _is_retryable(e):
+                    raise
+                time.sleep(LLM_RETRY_BACKOFF * (2 ** attempt))
+
+    def chat(self, messages, task="chat", model=None, tools=None, stream=False, kind=None):
+        kwargs = self._request_kwargs(task, model, messages, tools, stream)
+        if not stream:
+            response = self._with_retries(lambda: self.client.chat(**kwargs))
+            record_llm_metrics(kind or task, kwargs["model"], response)
+            return response
+
+        def first_chunk():
+            chunks = self.client.chat(**kwargs)
+            return chunks, next(chunks, None)
+
+        chunks, first = self._with_retries(first_chunk)
+        return self._stream(kind or task, kwargs["model"], chunks, first)
+
+    @staticmethod
+    def _stream(kind: str, model: str, chunks: Iterator[ChatResponse], first: Optional[ChatResponse]):
+        if first is None:
+            return
+        for chunk in itertools.chain((first,), chunks):
+            if chunk.done:
+                record_llm_metrics(kind, model, chunk)
+            yield chunk
+
+    async def _awith_retries(self, call: Callable):
+        for attempt in range(self.retries + 1):
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.retries or not _is_retryable(e):
+                    raise
+                await asyncio.sleep(LLM_RETRY_BACKOFF * (2 ** attempt))
+
+    async def achat(self, messages, task="chat", model=None, tools=None, stream=False, kind=None):
+        kwargs = self._request_kwargs(task, model, messages, tools, stream)
+        if not stream:
+            response = await self._awith_retries(lambda: self.async_client.chat(**kwargs))
+            record_llm_metrics(kind or task, kwargs["model"], response)
+            return response
+
+        async def first_chunk():
+            chunks = await self.async_client.chat(**kwargs)
+            return chunks, await anext(chunks, None)
+
+        chunks, first = await self._awith_retries(first_chunk)
+        return self._astream(kind or task, kwargs["model"], chunks, first)
+
+    @staticmethod
+    async def _astream(kind: str, model: str, chunks, first: Optional[ChatResponse]):
+        if first is None:
+            return
+        if first.done:
+            record_llm_metrics(kind, model, first)
+        yield first
+        async for chunk in chunks:
+            if chunk.done:
+                record_llm_metrics(kind, model, chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self.client._client.close()
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client._client.aclose()
+            self._async_client = None
+
+class FakeBackend(LLMBackend):
+    """Deterministic in-process backend for tests, benchmarks and load tests.
+
+    By default it replies "Echo: <last user message>". Pass a responder
+    function to script replies: responder(messages, tools) returns either a
+    reply string or a (content, tool_calls) tuple, where tool_calls is a list
+    of (name, arguments) pairs. Streams are split on spaces, with an optional
+    per-token delay to mimic generation speed.
+    """
+
+    def __init__(self, responder: Callable = None, token_delay: float = 0.0, latency: float = 0.0):
+        self.responder = responder or self._echo
+        self.token_delay = token_delay
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _echo(messages, tools):
+        last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        return f"Echo: {last_user}"
+
+    def _respond(self, messages, task, model, tools) -> Tuple[str, list, str]:
+        model = model or model_for(task)
+        with self._lock:
+            self.calls.append({"task": task, "model": model, "messages": list(messages), "tools": tools})
+        reply = self.responder(messages, tools)
+        content, tool_calls = reply if isinstance(reply, tuple) else (reply, [])
+        tool_calls = [
+            Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments=arguments))
+            for name, arguments in tool_calls
+        ]
+        return content, tool_calls, model
+
+    def _response(self, model, content, tool_calls=None, done=True, prompt_tokens=0, eval_tokens=0):
+        return ChatResponse(
+            model=model,
+            done=done,
+            message=Message(role="assistant", content=content, tool_calls=tool_calls or None),
+            prompt_eval_count=prompt_tokens if done else None,
+            eval_count=eval_tokens if done else None,
+        )
+
+    def chat(self, messages, task="chat", model=None, tools=None, stream=False, kind=None):
+        content, tool_calls, model = self._respond(messages, task, model, tools)
+        if self.latency:
+            time.sleep(self.latency)
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        tokens = content.split(" ") if content else []
+
+        if not stream:
+            response = self._response(model, content, tool_calls, prompt_tokens=prompt_tokens, eval_tokens=len(tokens))
+            record_llm_metrics(kind or task, model, response)
+            return response
+
+        def chunks():
+            for i, token in enumerate(tokens):
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+                yield self._response(model, token if i == 0 else " " + token, done=False)
+            final = self._response(model, "", tool_calls, prompt_tokens=prompt_tokens, eval_tokens=len(tokens))
+            record_llm_metrics(kind or task, model, final)
+            yield final
+        return chunks()
+
+    async def achat(self, messages, task="chat", model=None, tools=None, stream=False, kind=None):
+        # Same replies as chat(), with latency and token delays awaited instead of slept
+        content, tool_calls, model = self._respond(messages, task, model, tools)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        tokens = content.split(" ") if content else []
+
+        if not stream:
+            response = self._response(model, content, tool_calls, prompt_tokens=prompt_tokens, eval_tokens=len(tokens))
+            record_llm_metrics(kind or task, model, response)
+            return response
+
+        async def chunks():
+            for i, token in enumerate(tokens):
+                if self.token_delay:
+                    await asyncio.sleep(self.token_delay)
+                yield self._response(model, token if i == 0 else " " + token, done=False)
+            final = self._response(model, "", tool_calls, prompt_tokens=prompt_tokens, eval_tokens=len(tokens))
+            record_llm_metrics(kind or task, model, final)
+            yield final
+        return chunks()
+
+class _HostState:
+    """Routing state for one Ollama host in an OllamaPool."""
+
+    def __init__(self, host: str, max_concurrency: int, timeout: float):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.backend = OllamaBackend(host=host, timeout=timeout, retries=0)
+        self.health_client = Client(host=host, timeout=OLLAMA_HEALTH_TIMEOUT)
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0              # Consecutive failures
+        self.open_until = 0.0          # Circuit open (host skipped) until this time
+        self.healthy = True
+        self.models = None             # Model names from /api/tags; None until first check
+
+    def has_model(self, model: str) -> bool:
+        # Unknown until the first health check; "name" means "name:latest"
+        return self.models is None or (model if ":" in model else f"{model}:latest") in self.models
+
+    def available(self, model: str, now: float) -> bool:
+        if self.in_flight >= self.max_concurrency or now < self.open_until:
+            return False
+        return self.has_model(model)
+
+    def stats(self) -> dict:
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "circuit_open": time.monotonic() < self.open_until,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "consecutive_failures": self.failures,
+            "models": sorted(self.models) if self.models is not None else None,
+        }
+
+class _PooledStream:
+    """Stream iterator that frees its host slot when finished or closed."""
+
+    def __init__(self, pool: "OllamaPool", state: _HostState, chunks: Iterator[ChatResponse],
+                 first: Optional[ChatResponse]):
+        self._pool = pool
+        self._state = state
+        self._chunks = chunks
+        self._first = first
+        self._released = False
+        if first is None:
+            self._release()
+
+    def _release(self, error: Exception = None) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._release(self._state, error)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ChatResponse:
+        if self._first is not None:
+            first, self._first = self._first, None
+            return first
+        if self._released:
+            raise StopIteration
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            self._release()
+            raise
+        except Exception as e:
+            self._release(e)
+            raise
+
+    def close(self) -> None:
+        self._first = None
+        self._release()
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
+
+    def __del__(self):
+        self._release()
+
+class _PooledAsyncStream:
+    """Async stream iterator that frees its host slot when finished or closed."""
+
+    def __init__(self, pool: "OllamaPool", state: _HostState, chunks):
+        self._pool = pool
+        self._state = state
+        self._chunks = chunks
+        self._released = False
+
+    def _release(self, error: Exception = None) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._release(self._state, error)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ChatResponse:
+        if self._released:
+            raise StopAsyncIteration
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._release()
+            raise
+        except Exception as e:
+            self._release(e)
+            raise
+
+    async def aclose(self) -> None:
+        self._release()
+        await self._chunks.aclose()
+
+    def __del__(self):
+        self._release()
+
+class OllamaPool(LLMBackend):
+    """Spread chat requests over several Ollama hosts.
+
+    Each request goes to the host with the fewest outstanding requests among
+    those that have the model, have a free concurrency slot and whose circuit
+    is closed. A host's circuit opens after OLLAMA_CIRCUIT_FAILURES
+    consecutive failures and closes again on the first success after
+    OLLAMA_CIRCUIT_COOLDOWN seconds. A background thread polls /api/tags to
+    track which models each host has and whether it is up.
+
+    Failed requests fail over to the next host; streams only fail over
+    before the first chunk arrives. When every matching host is busy,
+    requests wait up to OLLAMA_QUEUE_TIMEOUT seconds for a slot.
+    """
+
+    def __init__(self, hosts: List[str], max_concurrency: int = OLLAMA_HOST_MAX_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT, health_interval: float = OLLAMA_HEALTH_INTERVAL):
+        self.hosts = [_HostState(host, max_concurrency, timeout) for host in hosts]
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._health_thread = None
+        if health_interval:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_interval,), name="ollama-health", daemon=True
+            )
+            self._health_thread.start()
+
+    def check_health(self) -> None:
+        """Poll /api/tags on every host and update its status and model list."""
+        for state in self.hosts:
+            try:
+                models = {model.model for model in state.health_client.list().models}
+            except Exception as e:
+                with self._condition:
+                    if state.healthy:
+                        print(f"⚠️ Ollama host {state.host} is down: {e}")
+                    state.healthy = False
+                    state.open_until = max(state.open_until, time.monotonic() + OLLAMA_CIRCUIT_COOLDOWN)
+                continue
+            with self._condition:
+                if not state.healthy:
+                    print(f"✅ Ollama host {state.host} is back up")
+                state.healthy = True
+                state.models = models
+                state.failures = 0
+                state.open_until = 0.0
+                self._condition.notify_all()
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._stop_event.is_set():
+            self.check_health()
+            self._stop_event.wait(interval)
+
+    def _try_acquire(self, model: str, tried: set) -> Optional[_HostState]:
+        # Caller holds self._condition
+        now = time.monotonic()
+        candidates = [s for s in self.hosts if s not in tried and s.available(model, now)]
+        if not candidates:
+            return None
+        state = min(candidates, key=lambda s: (s.in_flight, s.requests))
+        state.in_flight += 1
+        state.requests += 1
+        return state
+
+    def _can_ever_serve(self, model: str, tried: set) -> bool:
+        # Caller holds self._condition. Only busy hosts are worth waiting for;
+        # when every host's circuit is open, fail fast instead of queueing.
+        now = time.monotonic()
+        return any(
+            s not in tried and now >= s.open_until and s.has_model(model)
+            for s in self.hosts
+        )
+
+    def _acquire(self, model: str, tried: set) -> _HostState:
+        deadline = time.monotonic() + OLLAMA_QUEUE_TIMEOUT
+        with self._condition:
+            while True:
+                state = self._try_acquire(model, tried)
+                if state is not None:
+                    return state
+                if not self._can_ever_serve(model, tried):
+                    raise ConnectionError(f"No Ollama host available for model {model}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for a free Ollama host for model {model}")
+                self._condition.wait(remaining)
+
+    def _release(self, state: _HostState, error: Exception = None) -> None:
+        with self._condition:
+            state.in_flight -= 1
+            if error is None:
+                state.failures = 0
+                state.open_until = 0.0
+            elif _is_retryable(error):
+                state.failures += 1
+                if state.failures >= OLLAMA_CIRCUIT_FAILURES:
+                    state.open_until = time.monotonic() + OLLAMA_CIRCUIT_COOLDOWN
+                    print(f"⚠️ Ollama host {state.host} failing, pausing it for {OLLAMA_CIRCUIT_COOLDOWN:.0f}s: {error}")
+            self._condition.notify_all()
+
+    def chat(self, messages, task="chat", model=None, tools=None, stream=False, kind=None):
+        model = model or model_for(task)
+        tried = set()
+        while True:
+            state = self._acquire(model, tried)
+            tried.add(state)
+            try:
+                result = state.backend.chat(messages, task=task, model=model, tools=tools, stream=stream, kind=kind)
+                if not stream:
+                    self._release(state)
+                    return result
+                # Fail over only before any output; the first chunk proves the host works
+                first = next(result, None)
+            except Exception as e:
+                self._release(state, e)
+                if not _is_retryable(e) or not self._has_untried(model, tried):
+                    raise
+                print(f"↪️ Ollama host {state.host} failed, trying another: {e}")
+                continue
+            return _PooledStream(self, state, result, first)
+
+    def _has_untried(self, model: str, tried: set) -> bool:
+        with self._condition:
+            return self._can_ever_serve(model, tried)
+
+    async def achat(self, messages, task="chat", model=None, tools=None, stream=False, kind=None):
+        model = model or model_for(task)
+        tried = set()
+        deadline = time.monotonic() + OLLAMA_QUEUE_TIMEOUT
+        while True:
+            # Poll for a slot rather than blocking the event loop on the condition
+            with self._condition:
+                state = self._try_acquire(model, tried)
+                serviceable = self._can_ever_serve(model, tried)
+            if state is None:
+                if not serviceable:
+                    raise ConnectionError(f"No Ollama host available for model {model}")
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for a free Ollama host for model {model}")
+                await asyncio.sleep(0.05)
+                continue
+            tried.add(state)
+            try:
+                result = await state.backend.achat(messages, task=task, model=model, tools=tools, stream=stream, kind=kind)
+            except Exception as e:
+                self._release(state, e)
+                if not _is_retryable(e) or not self._has_untried(model, tried):
+                    raise
+                continue
+            if not stream:
+                self._release(state)
+                return result
+            return _PooledAsyncStream(self, state, result)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"hosts": [state.stats() for state in self.hosts]}
+
+    def close(self) -> None:
+        self._stop_event.set()
+        for state in self.hosts:
+            state.backend.close()
+
+    async def aclose(self) -> None:
+        for state in self.hosts:
+            await state.backend.aclose()
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> LLMBackend:
+    """Get the shared LLM backend.
+
+    LLM_BACKEND=fake selects FakeBackend; otherwise several OLLAMA_HOSTS
+    give an OllamaPool and a single (or no) host an OllamaBackend.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if os.getenv("LLM_BACKEND") == "fake":
+                _backend = FakeBackend()
+            elif len(OLLAMA_HOSTS) > 1:
+                _backend = OllamaPool(OLLAMA_HOSTS)
+            else:
+                _backend = OllamaBackend(host=OLLAMA_HOSTS[0] if OLLAMA_HOSTS else None)
+        return _backend
+
+def set_backend(backend: LLMBackend) -> None:
+    """Replace the shared LLM backend (e.g. with a FakeBackend in tests)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def close_backend() -> None:
+    """Close the shared LLM backend if one was created (on shutdown)."""
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.close()
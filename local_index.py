@@ -0,0 +1,274 @@
+# local_index.py
+
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from html_extract import detect_encoding, extract_text
+from memory import build_search_query, get_connection
+from search_cache import DIRECTION_WORDS, STOP_WORDS, normalize_query
+
+LOCAL_CORPUS_DIR = os.getenv("LOCAL_CORPUS_DIR", "")                                  # Folder of course files to index
+LOCAL_INDEX_REFRESH_SECONDS = int(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", "300"))    # Rescan interval for changed files
+
+INDEXED_EXTENSIONS = {".html", ".htm", ".txt", ".md", ".pdf"}
+DOCUMENT_TEXT_LIMIT = 2_000_000  # Characters of text indexed per document
+PASSAGE_WORDS = 150              # Words per indexed passage
+PASSAGE_OVERLAP = 30             # Words repeated between consecutive passages
+TITLE_WEIGHT = 4.0               # BM25 weight of a document's title relative to passage text
+
+_HTML_TITLE = re.compile(rb"<title[^>]*>(.*?)</title>", re.I | re.S)
+_MARKDOWN_HEADING = re.compile(r"^#\s+(.+)$", re.M)
+_MARKDOWN_MARKS = re.compile(r"^#+\s*|[*_`]{1,3}", re.M)
+_pdf_warning_shown = False
+
+def _html_document(path: Path) -> Tuple[str, Optional[str]]:
+    content = path.read_bytes()
+    encoding = detect_encoding(content[:4096])
+    match = _HTML_TITLE.search(content[:16384])
+    title = " ".join(match.group(1).decode(encoding, "replace").split()) if match else None
+    return extract_text(content, limit=DOCUMENT_TEXT_LIMIT), title
+
+def _pdf_document(path: Path) -> Tuple[Optional[str], Optional[str]]:
+    global _pdf_warning_shown
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        if not _pdf_warning_shown:
+            print("⚠️ pypdf is not installed; PDFs are left out of the local search index")
+            _pdf_warning_shown = True
+        return None, None
+    reader = PdfReader(str(path))
+    text = " ".join((page.extract_text() or "") for page in reader.pages)
+    title = reader.metadata.title if reader.metadata else None
+    return text[:DOCUMENT_TEXT_LIMIT], title
+
+def read_document(path: Path) -> Tuple[Optional[str], str]:
+    """Read the text and title of a corpus file.
+
+    Args:
+        path: HTML, PDF, Markdown or plain text file
+
+    Returns:
+        Tuple of (text, title); text is None if the file type can't be read.
+        The title falls back to the file name.
+    """
+    suffix = path.suffix.lower()
+    if suffix in (".html", ".htm"):
+        text, title = _html_document(path)
+    elif suffix == ".pdf":
+        text, title = _pdf_document(path)
+    else:
+        text = path.read_text(encoding="utf-8", errors="replace")[:DOCUMENT_TEXT_LIMIT]
+        title = None
+        if suffix == ".md":
+            heading = _MARKDOWN_HEADING.search(text)
+            title = heading.group(1).strip() if heading else None
+            text = _MARKDOWN_MARKS.sub("", text)
+    return text, title or path.stem.replace("_", " ").replace("-", " ")
+
+def split_passages(text: str) -> List[str]:
+    """Split document text into overlapping passages of about PASSAGE_WORDS words."""
+    words = text.split()
+    step = PASSAGE_WORDS - PASSAGE_OVERLAP
+    return [" ".join(words[start:start + PASSAGE_WORDS])
+            for start in range(0, max(len(words) - PASSAGE_OVERLAP, 1), step)] if words else []
+
+class LocalIndex:
+    """BM25 search over a folder of course files (HTML, PDF, Markdown, text).
+
+    Documents are split into overlapping passages and stored in an FTS5
+    inverted index in the database. Refreshing is incremental: files whose
+    modification time and size are unchanged are skipped, edited files are
+    re-indexed only if their text changed, and deleted files are dropped.
+    """
+
+    def __init__(self, corpus_dir: str = LOCAL_CORPUS_DIR, refresh_seconds: int = LOCAL_INDEX_REFRESH_SECONDS):
+        self.corpus_dir = corpus_dir
+        self.refresh_seconds = refresh_seconds
+        self._refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_refresh: Optional[float] = None
+        self.last_refresh_seconds = 0.0
+        self.last_counts: Dict[str, int] = {}
+
+    def _files(self) -> Iterator[Path]:
+        for root, _, names in os.walk(self.corpus_dir):
+            for name in sorted(names):
+                if Path(name).suffix.lower() in INDEXED_EXTENSIONS and not name.startswith("."):
+                    yield Path(root, name).resolve()
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index up to date with the corpus folder.
+
+        Returns:
+            Counts of documents added, updated, unchanged, removed and skipped
+        """
+        counts = dict.fromkeys(("added", "updated", "unchanged", "removed", "skipped"), 0)
+        if not self.corpus_dir or not os.path.isdir(self.corpus_dir):
+            return counts
+
+        with self._refresh_lock:
+            start = time.time()
+            with get_connection() as conn:
+                known = {row[0]: row[1:] for row in conn.execute(
+                    "SELECT path, id, mtime, size, content_hash FROM local_documents"
+                )}
+
+            seen = set()
+            for path in self._files():
+                key = str(path)
+                seen.add(key)
+                try:
+                    stat = path.stat()
+                    if key in known and known[key][1:3] == (stat.st_mtime, stat.st_size):
+                        counts["unchanged"] += 1
+                        continue
+                    text, title = read_document(path)
+                except Exception as e:
+                    print(f"⚠️ Could not index {path}: {e}")
+                    text = None
+                if not text:
+                    counts["skipped"] += 1
+                    continue
+                counts[self._index_document(key, title, text, stat, known.get(key))] += 1
+
+            removed = [(row[0],) for path, row in known.items() if path not in seen]
+            if removed:
+                with get_connection() as conn:
+                    conn.executemany("DELETE FROM local_passages WHERE document_id = ?", removed)
+                    conn.executemany("DELETE FROM local_documents WHERE id = ?", removed)
+            counts["removed"] = len(removed)
+
+            self.last_refresh = time.time()
+            self.last_refresh_seconds = self.last_refresh - start
+            self.last_counts = counts
+        if counts["added"] or counts["updated"] or counts["removed"]:
+            print(f"📚 Local index refreshed in {self.last_refresh_seconds:.1f}s: {counts}")
+        return counts
+
+    def _index_document(self, path: str, title: str, text: str, stat, known: Optional[tuple]) -> str:
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        now = time.time()
+        with get_connection() as conn:
+            if known is not None:
+                document_id, _, _, old_hash = known
+                conn.execute("UPDATE local_documents SET mtime = ?, size = ?, indexed_at = ? WHERE id = ?",
+                             (stat.st_mtime, stat.st_size, now, document_id))
+                if old_hash == content_hash:
+                    # Touched but not edited
+                    return "unchanged"
+                conn.execute("DELETE FROM local_passages WHERE document_id = ?", (document_id,))
+                conn.execute("UPDATE local_documents SET title = ?, content_hash = ? WHERE id = ?",
+                             (title, content_hash, document_id))
+            else:
+                document_id = conn.execute("""
+                    INSERT INTO local_documents (path, title, mtime, size, content_hash, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (path, title, stat.st_mtime, stat.st_size, content_hash, now)).lastrowid
+            conn.executemany(
+                "INSERT INTO local_passages (document_id, position, title, text) VALUES (?, ?, ?, ?)",
+                [(document_id, position, title, passage) for position, passage in enumerate(split_passages(text))]
+            )
+        return "updated" if known is not None else "added"
+
+    def refresh_if_stale(self) -> None:
+        """Refresh now if nothing is indexed yet, otherwise in the background once refresh_seconds pass."""
+        if self.last_refresh is None and self.document_count() == 0:
+            self.refresh()
+            return
+        if self.last_refresh is not None and time.time() - self.last_refresh < self.refresh_seconds:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.refresh, name="local-index", daemon=True)
+            self._thread.start()
+
+    def search(self, query: str, limit: int = 5, match_all: bool = False) -> List[Dict]:
+        """Find the documents most relevant to a query, ranked by BM25.
+
+        All content words must match; if that finds nothing, passages
+        matching any of them are ranked instead (unless match_all is set,
+        for callers that have a better source than a one-word match).
+
+        Args:
+            query: Search query (stop words are ignored)
+            limit: Maximum number of documents to return
+            match_all: Only return passages containing every content word
+
+        Returns:
+            List of dicts with title, path, snippet, text (the best passage)
+            and score (lower is more relevant), best match first
+        """
+        sql = f"""
+            SELECT p.document_id, d.path, d.title, p.text,
+                   snippet(local_passages_fts, 1, '', '', '…', 32) AS snippet,
+                   bm25(local_passages_fts, {TITLE_WEIGHT}, 1.0) AS score
+            FROM local_passages_fts
+            JOIN local_passages p ON p.id = local_passages_fts.rowid
+            JOIN local_documents d ON d.id = p.document_id
+            WHERE local_passages_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """
+        # Direction words match nearly every passage, so they only narrow search keys
+        terms = normalize_query(query, STOP_WORDS | DIRECTION_WORDS)
+        with get_connection() as conn:
+            for operator in ("AND",) if match_all else ("AND", "OR"):
+                match = build_search_query(terms, operator)
+                if not match:
+                    return []
+                # Several passages of one document can match; keep each document's best
+                results, documents = [], set()
+                for document_id, path, title, text, snippet, score in conn.execute(sql, (match, limit * 8)):
+                    if document_id not in documents:
+                        documents.add(document_id)
+                        results.append({"title": title, "path": path, "snippet": snippet,
+                                        "text": text, "score": score})
+                if results:
+                    return results[:limit]
+        return []
+
+    def document_count(self) -> int:
+        with get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM local_documents").fetchone()[0]
+
+    def stats(self) -> dict:
+        with get_connection() as conn:
+            passages = conn.execute("SELECT COUNT(*) FROM local_passages").fetchone()[0]
+        return {
+            "corpus_dir": self.corpus_dir,
+            "documents": self.document_count(),
+            "passages": passages,
+            "last_refresh": datetime.fromtimestamp(self.last_refresh).isoformat() if self.last_refresh else None,
+            "last_refresh_seconds": round(self.last_refresh_seconds, 3),
+            "last_counts": self.last_counts,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or search the local corpus search index.")
+    parser.add_argument("corpus_dir", nargs="?", default=LOCAL_CORPUS_DIR, help="folder of course files")
+    parser.add_argument("--search", help="query to run after refreshing")
+    args = parser.parse_args()
+    if not args.corpus_dir:
+        parser.error("give a corpus folder or set LOCAL_CORPUS_DIR")
+
+    index = LocalIndex(args.corpus_dir)
+    print(f"📚 {index.refresh()}")
+    if args.search:
+        start = time.perf_counter()
+        results = index.search(args.search)
+        print(f"🔍 {len(results)} results in {(time.perf_counter() - start) * 1000:.1f}ms")
+        for result in results:
+            print(f"  {result['score']:7.2f}  {result['title']}  ({result['path']})\n           {result['snippet']}")
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ from chat_tools import run_chat_message
 from utils import get_user_input, notify_user
 from memory import (
     get_message_count, clear_history, get_conversation_summary,
-    generate_project_summary, get_projects, get_project_summary
+    generate_project_summary, get_projects, get_project_summary,
+    rebuild_search_index
 )
 
 def main():
@@ -63,6 +64,7 @@ def main():
                 print("  • projects - List all projects")
                 print("  • generate summary - Create project summary")
                 print("  • view summary - Show current project summary")
+                print("  • rebuild index - Rebuild the memory search index")
                 print("  • help - Show this help message")
                 print("  • quit / exit / bye - Stop the agent")
                 print()
@@ -96,6 +98,12 @@ def main():
                         print("❌ Failed to generate summary")
                 continue
             
+            if user_input.lower() == 'rebuild index':
+                print("🔧 Rebuilding memory search index...")
+                indexed = rebuild_search_index()
+                print(f"✅ Indexed {indexed} messages")
+                continue
+            
             if user_input.lower() == 'view summary':
                 # For CLI, use default project (ID 1)
                 project_id = 1
@@ -1,44 +1,427 @@
 # memory.py
 
+import atexit
+import os
+import queue
+import re
 import sqlite3
-from datetime import datetime
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from typing import List, Tuple, Optional, Dict
 
-DATABASE_PATH = "agent_memory.db"
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "agent_memory.db")
+
+# Connection pool tuning
+POOL_MAX_IDLE = 8                 # Idle connections kept open per database
+SQLITE_CACHE_SIZE_KB = 16384      # Page cache per connection (16MB)
+SQLITE_MMAP_SIZE = 128 * 1024 * 1024  # Memory-mapped I/O window (128MB)
+SQLITE_BUSY_TIMEOUT = 5.0         # Seconds to wait on a locked database
+
+# Write-behind message logging
+ASYNC_MESSAGE_WRITES = os.environ.get("ASYNC_MESSAGE_WRITES", "true").lower() != "false"
+MESSAGE_QUEUE_SIZE = 1000         # Pending messages before log_message blocks
+MESSAGE_BATCH_SIZE = 100          # Messages committed per transaction
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections for one database file.
+    
+    Connections are opened once with WAL mode and tuned pragmas, handed out
+    for the duration of a ``with pool.connection()`` block and returned to the
+    pool afterwards. Nested blocks on the same thread reuse the connection the
+    thread already holds, so helpers can call each other without opening a
+    second connection or splitting a transaction.
+    """
+    
+    def __init__(self, path: str, max_idle: int = POOL_MAX_IDLE):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self.opened = 0
+        self.reused = 0
+    
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            self.opened += 1
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._open()
+    
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            # Re-entrant use on this thread: share the outer transaction
+            yield conn
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+    
+    def close(self) -> None:
+        """Close all idle connections and stop pooling new ones."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return connection counters for monitoring and benchmarks."""
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused, "idle": len(self._idle)}
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path: str = None) -> ConnectionPool:
+    """Get the connection pool for a database file (DATABASE_PATH by default)."""
+    path = path or DATABASE_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None or pool._closed:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+def get_connection():
+    """Borrow a pooled connection to DATABASE_PATH as a context manager.
+    
+    Usage mirrors ``sqlite3.connect``: ``with get_connection() as conn: ...``
+    commits when the block exits cleanly, but the connection stays open and
+    goes back to the pool instead of being torn down.
+    """
+    return get_pool().connection()
+
+def close_connections() -> None:
+    """Close every pooled connection. Safe to call more than once."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+atexit.register(close_connections)
+
+def _dict_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor returning sqlite3.Row objects without touching the shared connection."""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    return cursor
+
+def _column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def _migration_base_tables(conn: sqlite3.Connection) -> None:
+    """Create the projects and messages tables."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            description TEXT,
+            system_prompt TEXT,
+            summary TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            project_id INTEGER REFERENCES projects(id)
+        )
+    """)
+
+def _migration_legacy_columns(conn: sqlite3.Connection) -> None:
+    """Bring databases created before projects existed up to the current columns."""
+    if "project_id" not in _column_names(conn, "messages"):
+        conn.execute("ALTER TABLE messages ADD COLUMN project_id INTEGER REFERENCES projects(id)")
+    if "summary" not in _column_names(conn, "projects"):
+        conn.execute("ALTER TABLE projects ADD COLUMN summary TEXT")
+
+def _migration_message_indexes(conn: sqlite3.Connection) -> None:
+    """Index messages for the per-project history, count and search queries."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_project_timestamp ON messages (project_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_project_role_timestamp ON messages (project_id, role, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages (timestamp)")
+
+def _migration_message_search_index(conn: sqlite3.Connection) -> None:
+    """Create the FTS5 index over message content, kept in sync by triggers."""
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content,
+            content='messages',
+            content_rowid='id',
+            tokenize='porter unicode61'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    # Backfill messages logged before the index existed
+    conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+def _migration_message_embeddings(conn: sqlite3.Connection) -> None:
+    """Create storage for semantic memory embeddings (see semantic_memory.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS message_embeddings (
+            message_id INTEGER NOT NULL REFERENCES messages(id),
+            model TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (message_id, model)
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS message_embeddings_delete AFTER DELETE ON messages BEGIN
+            DELETE FROM message_embeddings WHERE message_id = old.id;
+        END
+    """)
+
+def _migration_summary_high_water_mark(conn: sqlite3.Connection) -> None:
+    """Track the last message folded into each project summary."""
+    if "summary_message_id" not in _column_names(conn, "projects"):
+        conn.execute("ALTER TABLE projects ADD COLUMN summary_message_id INTEGER NOT NULL DEFAULT 0")
+
+def _migration_jobs(conn: sqlite3.Connection) -> None:
+    """Create the background job status table (see jobs.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            dedupe_key TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            result TEXT,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe_status ON jobs (dedupe_key, status)")
+
+def _migration_web_page_cache(conn: sqlite3.Connection) -> None:
+    """Create the web page cache tables (see page_cache.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS web_page_texts (
+            content_hash TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            size INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS web_pages (
+            url TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL REFERENCES web_page_texts(content_hash),
+            etag TEXT,
+            last_modified TEXT,
+            raw_bytes INTEGER NOT NULL DEFAULT 0,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_web_pages_last_used ON web_pages (last_used)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_web_pages_content_hash ON web_pages (content_hash)")
+
+def _migration_web_search_cache(conn: sqlite3.Connection) -> None:
+    """Create the web search result cache and SerpAPI usage tables (see search_cache.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS web_searches (
+            query_key TEXT PRIMARY KEY,
+            query TEXT NOT NULL,
+            location TEXT NOT NULL,
+            results TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_web_searches_last_used ON web_searches (last_used)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_api_usage (
+            month TEXT PRIMARY KEY,
+            requests INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+def _migration_local_search_index(conn: sqlite3.Connection) -> None:
+    """Create the local corpus search index (see local_index.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS local_documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            indexed_at REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS local_passages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            document_id INTEGER NOT NULL REFERENCES local_documents(id),
+            position INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            text TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_local_passages_document ON local_passages (document_id)")
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS local_passages_fts USING fts5(
+            title,
+            text,
+            content='local_passages',
+            content_rowid='id',
+            tokenize='porter unicode61'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS local_passages_fts_insert AFTER INSERT ON local_passages BEGIN
+            INSERT INTO local_passages_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS local_passages_fts_delete AFTER DELETE ON local_passages BEGIN
+            INSERT INTO local_passages_fts (local_passages_fts, rowid, title, text)
+            VALUES ('delete', old.id, old.title, old.text);
+        END
+    """)
+
+# Ordered schema migrations: (version, description, function).
+# Append new entries with the next version number; never edit applied ones.
+MIGRATIONS = [
+    (1, "create projects and messages tables", _migration_base_tables),
+    (2, "add legacy project_id and summary columns", _migration_legacy_columns),
+    (3, "add message indexes", _migration_message_indexes),
+    (4, "add FTS5 message search index", _migration_message_search_index),
+    (5, "add message embeddings table", _migration_message_embeddings),
+    (6, "add summary high-water mark", _migration_summary_high_water_mark),
+    (7, "add background jobs table", _migration_jobs),
+    (8, "add web page cache tables", _migration_web_page_cache),
+    (9, "add web search cache and API usage tables", _migration_web_search_cache),
+    (10, "add local corpus search index", _migration_local_search_index),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the highest migration version applied to a database.
+    
+    Args:
+        conn: Open database connection
+        
+    Returns:
+        Schema version (0 for a new or pre-migration database)
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor = conn.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+def migrate(target_version: int = None) -> int:
+    """Apply pending schema migrations in order.
+    
+    Each migration runs in its own transaction together with its
+    schema_version row, so a failed migration leaves the database at the
+    last good version. The transaction takes the write lock before the
+    version is checked, so processes migrating the same database at once
+    (gunicorn workers without --preload) apply each migration only once.
+    
+    Args:
+        target_version: Stop after this version (latest if None)
+        
+    Returns:
+        Schema version after migrating
+    """
+    with get_connection() as conn:
+        conn.commit()
+        version = get_schema_version(conn)
+        for migration_version, description, apply in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            if target_version is not None and migration_version > target_version:
+                break
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have applied it while this one waited for the lock
+                version = get_schema_version(conn)
+                if migration_version <= version:
+                    conn.commit()
+                    continue
+                apply(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (migration_version, description)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            version = migration_version
+        return version
 
 def init_database():
     """Initialize the database with required tables."""
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        # Create projects table
+    migrate()
+    
+    with get_connection() as conn:
+        # Create default project if none exists (in one statement, as workers may start together)
         conn.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                description TEXT,
-                system_prompt TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Add project_id column to messages table if it doesn't exist
-        try:
-            conn.execute("ALTER TABLE messages ADD COLUMN project_id INTEGER REFERENCES projects(id)")
-        except sqlite3.OperationalError:
-            # Column already exists
-            pass
-        
-        # Create default project if none exists
-        cursor = conn.execute("SELECT COUNT(*) FROM projects")
-        if cursor.fetchone()[0] == 0:
-            conn.execute("""
-                INSERT INTO projects (name, description, system_prompt) 
-                VALUES (?, ?, ?)
-            """, (
-                "General Chat", 
-                "Default project for general conversations",
-                "You are an AI assistant with access to Canvas LMS tools and conversation memory. Be helpful and conversational in your responses."
-            ))
+            INSERT INTO projects (name, description, system_prompt)
+            SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM projects)
+        """, (
+            "General Chat", 
+            "Default project for general conversations",
+            "You are an AI assistant with access to Canvas LMS tools and conversation memory. Be helpful and conversational in your responses."
+        ))
 
 def create_project(name: str, description: str = "", system_prompt: str = "") -> int:
     """Create a new project.
@@ -57,7 +440,7 @@ def create_project(name: str, description: str = "", system_prompt: str = "") ->
     if not system_prompt:
         system_prompt = f"You are an AI assistant working on the '{name}' project. {description}"
     
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with get_connection() as conn:
         cursor = conn.execute("""
             INSERT INTO projects (name, description, system_prompt, updated_at) 
             VALUES (?, ?, ?, CURRENT_TIMESTAMP)
@@ -70,9 +453,9 @@ def get_projects() -> List[Dict]:
     Returns:
         List of project dictionaries
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute("""
+    flush_messages()
+    with get_connection() as conn:
+        cursor = _dict_cursor(conn).execute("""
             SELECT p.*, COUNT(m.id) as message_count 
             FROM projects p 
             LEFT JOIN messages m ON p.id = m.project_id 
@@ -90,9 +473,8 @@ def get_project(project_id: int) -> Optional[Dict]:
     Returns:
         Project dictionary or None if not found
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,))
+    with get_connection() as conn:
+        cursor = _dict_cursor(conn).execute("SELECT * FROM projects WHERE id = ?", (project_id,))
         row = cursor.fetchone()
         return dict(row) if row else None
 
@@ -131,12 +513,27 @@ def update_project(project_id: int, name: str = None, description: str = None, s
     updates.append("updated_at = CURRENT_TIMESTAMP")
     params.append(project_id)
     
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with get_connection() as conn:
         cursor = conn.execute(f"""
             UPDATE projects SET {', '.join(updates)} WHERE id = ?
         """, params)
         return cursor.rowcount > 0
 
+# Called with the project ID (None for all projects) after messages are deleted
+_delete_listeners: List = []
+
+def on_messages_deleted(listener) -> None:
+    """Register a callback for deleted messages (e.g. to drop caches built from them).
+    
+    Args:
+        listener: Function called with the project ID, or None when all projects were cleared
+    """
+    _delete_listeners.append(listener)
+
+def _notify_deleted(project_id: Optional[int]) -> None:
+    for listener in _delete_listeners:
+        listener(project_id)
+
 def delete_project(project_id: int) -> bool:
     """Delete a project and all its messages.
     
@@ -146,32 +543,224 @@ def delete_project(project_id: int) -> bool:
     Returns:
         True if project was deleted, False if not found
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    flush_messages()
+    _default_project_ids.pop(DATABASE_PATH, None)
+    with get_connection() as conn:
         # Delete messages first (foreign key constraint)
         conn.execute("DELETE FROM messages WHERE project_id = ?", (project_id,))
         # Delete project
         cursor = conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
-        return cursor.rowcount > 0
+    _notify_deleted(project_id)
+    return cursor.rowcount > 0
+
+class MessageWriter:
+    """Background writer that commits logged messages in batched transactions.
+    
+    log_message() only enqueues, so chat turns don't wait on SQLite commits.
+    Messages stay visible to get_recent_history() and get_message_count()
+    while queued (see pending()), and flush() blocks until everything
+    submitted so far is on disk, and reports batches that couldn't be
+    written.
+    """
+    
+    def __init__(self, path: str, max_queue: int = MESSAGE_QUEUE_SIZE, batch_size: int = MESSAGE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = deque()
+        self._cond = threading.Condition()
+        # Held while a batch is committed and while readers merge pending
+        # messages, so a message is never seen both queued and on disk
+        self._commit_lock = threading.Lock()
+        # Held from numbering a message until it's queued, so the queue is in submit order
+        self._submit_lock = threading.Lock()
+        self._submitted = 0
+        self._committed = 0  # Highest id up to which every message is written (or failed)
+        self._failures = deque(maxlen=100)  # (first id, last id) of batches that couldn't be written
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, role: str, content: str, project_id: int, timestamp: str) -> None:
+        with self._submit_lock:
+            with self._cond:
+                self._submitted += 1
+                item = (self._submitted, role, content, project_id, timestamp)
+                self._pending.append(item)
+            # Blocks when the queue is full, which applies backpressure to callers
+            self._queue.put(item)
+    
+    def pending(self, project_id: int = None) -> List[Tuple[str, str, int, str]]:
+        """Messages submitted but not yet committed, oldest first."""
+        with self._cond:
+            return [
+                (role, content, pid, timestamp)
+                for _, role, content, pid, timestamp in self._pending
+                if project_id is None or pid == project_id
+            ]
+    
+    @contextmanager
+    def snapshot(self, project_id: int = None):
+        """Yield pending messages while holding off commits.
+        
+        Database reads inside the block see exactly the messages that are
+        not in the yielded list.
+        """
+        with self._commit_lock:
+            yield self.pending(project_id)
+    
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every message submitted so far is committed.
+        
+        Returns:
+            True if they were all written, False on timeout or if a batch
+            submitted since the wait started being pending failed to write
+        """
+        with self._cond:
+            start, target = self._committed, self._submitted
+            if not self._cond.wait_for(lambda: self._committed >= target, timeout):
+                return False
+            return not any(first <= target and last > start for first, last in self._failures)
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush pending messages and stop the writer thread."""
+        self._stopping = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+    
+    def _write_batch(self, batch: list) -> bool:
+        for attempt in range(3):
+            try:
+                with get_pool(self.path).connection() as conn:
+                    conn.executemany(
+                        "INSERT INTO messages (role, content, project_id, timestamp) VALUES (?, ?, ?, ?)",
+                        [(role, content, project_id, timestamp) for _, role, content, project_id, timestamp in batch]
+                    )
+                return True
+            except sqlite3.OperationalError as e:
+                # Usually a transient lock; retry
+                error = e
+            except sqlite3.Error as e:
+                error = e
+                break
+        print(f"⚠️ Failed to log {len(batch)} message(s): {error}")
+        with self._cond:
+            self._failures.append((batch[0][0], batch[-1][0]))
+            self.failed += len(batch)
+            self.last_error = str(error)
+        return False
+    
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item] if item is not None else []
+            # Drain whatever else is already queued into the same transaction
+            while item is not None and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    batch.append(item)
+            
+            if batch:
+                with self._commit_lock:
+                    self._write_batch(batch)
+                    with self._cond:
+                        written = {item[0] for item in batch}
+                        self._pending = deque(item for item in self._pending if item[0] not in written)
+                        # Everything older than the oldest pending message is done
+                        self._committed = self._pending[0][0] - 1 if self._pending else self._submitted
+                        self._cond.notify_all()
+            
+            if item is None and self._stopping and self._queue.empty():
+                return
+
+_writers: Dict[str, MessageWriter] = {}
+_writers_lock = threading.Lock()
+
+def _get_writer(create: bool = True) -> Optional[MessageWriter]:
+    with _writers_lock:
+        writer = _writers.get(DATABASE_PATH)
+        if writer is None and create and ASYNC_MESSAGE_WRITES:
+            writer = _writers[DATABASE_PATH] = MessageWriter(DATABASE_PATH)
+        return writer
+
+@contextmanager
+def _pending_messages(project_id: int = None):
+    """Yield queued, uncommitted messages for consistent read-your-writes reads."""
+    writer = _get_writer(create=False)
+    if writer is None:
+        yield []
+    else:
+        with writer.snapshot(project_id) as pending:
+            yield pending
+
+def flush_messages(timeout: float = None) -> bool:
+    """Block until all queued log_message() writes are committed.
+    
+    Args:
+        timeout: Maximum seconds to wait (no limit if None)
+        
+    Returns:
+        True if everything was flushed, False on timeout or if queued
+        messages failed to write (see the writer's failed and last_error)
+    """
+    writer = _get_writer(create=False)
+    return writer.flush(timeout) if writer else True
+
+def shutdown_message_writer() -> None:
+    """Flush and stop the background message writers. Safe to call more than once."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+
+# Registered after close_connections so it runs first at exit (atexit is LIFO)
+atexit.register(shutdown_message_writer)
+
+_default_project_ids: Dict[str, int] = {}
+
+def get_default_project_id() -> int:
+    """Get the default project ID (first project, usually "General Chat"), cached."""
+    project_id = _default_project_ids.get(DATABASE_PATH)
+    if project_id is None:
+        with get_connection() as conn:
+            cursor = conn.execute("SELECT id FROM projects ORDER BY id LIMIT 1")
+            result = cursor.fetchone()
+            project_id = result[0] if result else 1
+        _default_project_ids[DATABASE_PATH] = project_id
+    return project_id
 
 def log_message(role: str, content: str, project_id: int = None) -> None:
     """Log a message to the conversation history database.
     
+    The write is queued for the background writer and committed in a batch
+    shortly afterwards; history reads in this process already include it.
+    
     Args:
         role: The role of the message sender ('user' or 'assistant')
         content: The content of the message
         project_id: Project ID (uses default project if None)
     """
     if project_id is None:
-        # Get default project ID (first project, usually "General Chat")
-        with sqlite3.connect(DATABASE_PATH) as conn:
-            cursor = conn.execute("SELECT id FROM projects ORDER BY id LIMIT 1")
-            result = cursor.fetchone()
-            project_id = result[0] if result else 1
+        project_id = get_default_project_id()
     
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    # Same format as CURRENT_TIMESTAMP, taken now so queued messages keep their order
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    
+    writer = _get_writer()
+    if writer is not None:
+        writer.submit(role, content, project_id, timestamp)
+        return
+    
+    with get_connection() as conn:
         conn.execute(
-            "INSERT INTO messages (role, content, project_id) VALUES (?, ?, ?)", 
-            (role, content, project_id)
+            "INSERT INTO messages (role, content, project_id, timestamp) VALUES (?, ?, ?, ?)", 
+            (role, content, project_id, timestamp)
         )
 
 def get_recent_history(limit: int = 10, project_id: int = None) -> List[Tuple[str, str]]:
@@ -184,19 +773,24 @@ def get_recent_history(limit: int = 10, project_id: int = None) -> List[Tuple[st
     Returns:
         List of tuples containing (role, content) in chronological order
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with _pending_messages(project_id) as pending, get_connection() as conn:
         if project_id is not None:
             cursor = conn.execute(
-                "SELECT role, content FROM messages WHERE project_id = ? ORDER BY timestamp DESC LIMIT ?", 
+                "SELECT role, content FROM messages WHERE project_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?", 
                 (project_id, limit)
             )
         else:
             cursor = conn.execute(
-                "SELECT role, content FROM messages ORDER BY timestamp DESC LIMIT ?", 
+                "SELECT role, content FROM messages ORDER BY timestamp DESC, id DESC LIMIT ?", 
                 (limit,)
             )
         # Reverse the list to get chronological order (oldest first)
-        return list(reversed(cursor.fetchall()))
+        history = list(reversed(cursor.fetchall()))
+    
+    # Queued messages are always newer than committed ones
+    if pending:
+        history = (history + [(role, content) for role, content, _, _ in pending])[-limit:] if limit > 0 else []
+    return history
 
 def get_conversation_messages(limit: int = 10, project_id: int = None) -> List[dict]:
     """Get recent conversation history formatted for the chat model.
@@ -211,17 +805,56 @@ def get_conversation_messages(limit: int = 10, project_id: int = None) -> List[d
     recent_history = get_recent_history(limit, project_id)
     return [{"role": role, "content": content} for role, content in recent_history]
 
+def get_history_window(project_id: int = None, limit: int = 20, block: int = 10) -> List[dict]:
+    """Get conversation history for a chat prompt, anchored so its start rarely moves.
+    
+    History starts after the last message folded into the project summary
+    (the summary covers everything before it). When more than ``limit``
+    messages follow, the oldest are dropped in whole blocks of ``block``.
+    The first history message, and with it the prompt prefix Ollama has
+    cached, then only changes every few turns or when the summary is
+    refreshed, instead of sliding every turn.
+    
+    Args:
+        project_id: Project ID (all projects, with no summary anchor, if None)
+        limit: Maximum number of messages returned
+        block: Number of messages dropped at a time once over the limit
+        
+    Returns:
+        List of message dictionaries with 'role' and 'content' keys, oldest first
+    """
+    with _pending_messages(project_id) as pending, get_connection() as conn:
+        if project_id is not None:
+            row = conn.execute("SELECT summary_message_id FROM projects WHERE id = ?", (project_id,)).fetchone()
+            where, params = "WHERE project_id = ? AND id > ?", [project_id, row[0] if row else 0]
+        else:
+            where, params = "", []
+        stored = conn.execute(f"SELECT COUNT(*) FROM messages {where}", params).fetchone()[0]
+        
+        total = stored + len(pending)
+        drop = -(-(total - limit) // block) * block if total > limit else 0
+        rows = conn.execute(
+            f"SELECT role, content FROM messages {where} ORDER BY id LIMIT -1 OFFSET ?", [*params, drop]
+        ).fetchall() if drop < stored else []
+    
+    # Queued messages are always newer than committed ones
+    history = rows + [(role, content) for role, content, _, _ in pending[max(drop - stored, 0):]]
+    return [{"role": role, "content": content} for role, content in history]
+
 def clear_history(project_id: int = None) -> None:
     """Clear conversation history from the database.
     
     Args:
         project_id: Project ID to clear (all projects if None)
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    # Land queued messages first so they don't reappear after clearing
+    flush_messages()
+    with get_connection() as conn:
         if project_id is not None:
             conn.execute("DELETE FROM messages WHERE project_id = ?", (project_id,))
         else:
             conn.execute("DELETE FROM messages")
+    _notify_deleted(project_id)
 
 def get_message_count(project_id: int = None) -> int:
     """Get the total number of messages in the database.
@@ -232,15 +865,91 @@ def get_message_count(project_id: int = None) -> int:
     Returns:
         Total number of messages stored
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with _pending_messages(project_id) as pending, get_connection() as conn:
         if project_id is not None:
             cursor = conn.execute("SELECT COUNT(*) FROM messages WHERE project_id = ?", (project_id,))
         else:
             cursor = conn.execute("SELECT COUNT(*) FROM messages")
-        return cursor.fetchone()[0]
+        return cursor.fetchone()[0] + len(pending)
+
+# Quoted phrases, or single words with an optional trailing * for prefix search
+_SEARCH_TOKEN = re.compile(r'"([^"]*)"|(\w+\*?)')
+
+def build_search_query(term: str, operator: str = "AND") -> Optional[str]:
+    """Translate a user search term into a safe FTS5 MATCH expression.
+    
+    Words are quoted so FTS5 syntax characters in user input can't break the
+    query. ``"exact phrase"`` stays a phrase query and ``word*`` stays a
+    prefix query.
+    
+    Args:
+        term: Raw search term
+        operator: 'AND' to require every word, 'OR' to match any
+        
+    Returns:
+        MATCH expression, or None if the term contains no searchable words
+    """
+    parts = []
+    for phrase, word in _SEARCH_TOKEN.findall(term):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+        else:
+            prefix = word.endswith("*")
+            parts.append('"' + word.rstrip("*") + '"' + ("*" if prefix else ""))
+    return f" {operator} ".join(parts) if parts else None
+
+def search_memory_ranked(term: str, limit: int = 5, project_id: int = None, role: str = None) -> List[Dict]:
+    """Full-text search over message history, ranked by BM25 relevance.
+    
+    All words must match; if that finds nothing, messages matching any of
+    the words are returned instead, still ranked by relevance.
+    
+    Args:
+        term: Search term (supports "phrases" and prefix* words)
+        limit: Maximum number of results to return
+        project_id: Project ID to filter by (all projects if None)
+        role: Optional role filter ('user' or 'assistant')
+        
+    Returns:
+        List of dicts with id, role, content, timestamp, snippet and score
+        (lower scores are more relevant), best match first
+    """
+    filters = ""
+    filter_params = []
+    if project_id is not None:
+        filters += " AND m.project_id = ?"
+        filter_params.append(project_id)
+    if role:
+        filters += " AND m.role = ?"
+        filter_params.append(role)
+    
+    sql = f"""
+        SELECT m.id, m.role, m.content, m.timestamp,
+               snippet(messages_fts, 0, '**', '**', '…', 16) AS snippet,
+               bm25(messages_fts) AS score
+        FROM messages_fts
+        JOIN messages m ON m.id = messages_fts.rowid
+        WHERE messages_fts MATCH ?{filters}
+        ORDER BY score, m.timestamp DESC
+        LIMIT ?
+    """
+    
+    flush_messages()
+    with get_connection() as conn:
+        for operator in ("AND", "OR"):
+            query = build_search_query(term, operator)
+            if not query:
+                return []
+            cursor = _dict_cursor(conn).execute(sql, [query, *filter_params, limit])
+            rows = [dict(row) for row in cursor.fetchall()]
+            if rows:
+                return rows
+    return []
 
 def search_memory(term: str, limit: int = 5, project_id: int = None) -> List[Tuple[str, str, str]]:
-    """Search memory for user or assistant messages containing a keyword.
+    """Search memory for user or assistant messages matching a keyword.
     
     Args:
         term: The search term to look for in message content
@@ -248,23 +957,12 @@ def search_memory(term: str, limit: int = 5, project_id: int = None) -> List[Tup
         project_id: Project ID to filter by (all projects if None)
         
     Returns:
-        List of tuples containing (role, content, timestamp) for matching messages
+        List of tuples containing (role, content, timestamp), most relevant first
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        if project_id is not None:
-            cursor = conn.execute(
-                "SELECT role, content, timestamp FROM messages WHERE content LIKE ? AND project_id = ? ORDER BY timestamp DESC LIMIT ?",
-                (f"%{term}%", project_id, limit)
-            )
-        else:
-            cursor = conn.execute(
-                "SELECT role, content, timestamp FROM messages WHERE content LIKE ? ORDER BY timestamp DESC LIMIT ?",
-                (f"%{term}%", limit)
-            )
-        return cursor.fetchall()
+    return search_memory_by_role(term, limit=limit, project_id=project_id)
 
 def search_memory_by_role(term: str, role: str = None, limit: int = 5, project_id: int = None) -> List[Tuple[str, str, str]]:
-    """Search memory for messages containing a keyword, optionally filtered by role.
+    """Search memory for messages matching a keyword, optionally filtered by role.
     
     Args:
         term: The search term to look for in message content
@@ -273,32 +971,23 @@ def search_memory_by_role(term: str, role: str = None, limit: int = 5, project_i
         project_id: Project ID to filter by (all projects if None)
         
     Returns:
-        List of tuples containing (role, content, timestamp) for matching messages
+        List of tuples containing (role, content, timestamp), most relevant first
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        if project_id is not None:
-            if role:
-                cursor = conn.execute(
-                    "SELECT role, content, timestamp FROM messages WHERE content LIKE ? AND role = ? AND project_id = ? ORDER BY timestamp DESC LIMIT ?",
-                    (f"%{term}%", role, project_id, limit)
-                )
-            else:
-                cursor = conn.execute(
-                    "SELECT role, content, timestamp FROM messages WHERE content LIKE ? AND project_id = ? ORDER BY timestamp DESC LIMIT ?",
-                    (f"%{term}%", project_id, limit)
-                )
-        else:
-            if role:
-                cursor = conn.execute(
-                    "SELECT role, content, timestamp FROM messages WHERE content LIKE ? AND role = ? ORDER BY timestamp DESC LIMIT ?",
-                    (f"%{term}%", role, limit)
-                )
-            else:
-                cursor = conn.execute(
-                    "SELECT role, content, timestamp FROM messages WHERE content LIKE ? ORDER BY timestamp DESC LIMIT ?",
-                    (f"%{term}%", limit)
-                )
-        return cursor.fetchall()
+    results = search_memory_ranked(term, limit=limit, project_id=project_id, role=role)
+    return [(r["role"], r["content"], r["timestamp"]) for r in results]
+
+def rebuild_search_index() -> int:
+    """Rebuild the full-text search index from the messages table.
+    
+    Use after restoring a backup or editing messages outside the app.
+    
+    Returns:
+        Number of messages indexed
+    """
+    with get_connection() as conn:
+        conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+        return conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
 
 def get_conversation_summary(days: int = 7, project_id: int = None) -> Optional[str]:
     """Get a summary of conversations from the last N days.
@@ -310,7 +999,8 @@ def get_conversation_summary(days: int = 7, project_id: int = None) -> Optional[
     Returns:
         Summary string or None if no conversations found
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    flush_messages()
+    with get_connection() as conn:
         if project_id is not None:
             cursor = conn.execute(
                 """SELECT role, content FROM messages 
@@ -334,21 +1024,28 @@ def get_conversation_summary(days: int = 7, project_id: int = None) -> Optional[
     
     return f"Last {days} days: {total_messages} messages ({user_messages} from user)"
 
-def update_project_summary(project_id: int, summary: str) -> bool:
+def update_project_summary(project_id: int, summary: str, last_message_id: int = None) -> bool:
     """Update the summary for a specific project.
     
     Args:
         project_id: Project ID
         summary: The new summary text
+        last_message_id: ID of the newest message the summary covers (unchanged if None)
         
     Returns:
         True if project summary was updated, False if project not found
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
-        cursor = conn.execute(
-            "UPDATE projects SET summary = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (summary, project_id)
-        )
+    with get_connection() as conn:
+        if last_message_id is not None:
+            cursor = conn.execute(
+                "UPDATE projects SET summary = ?, summary_message_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (summary, last_message_id, project_id)
+            )
+        else:
+            cursor = conn.execute(
+                "UPDATE projects SET summary = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (summary, project_id)
+            )
         return cursor.rowcount > 0
 
 def get_project_summary(project_id: int) -> Optional[str]:
@@ -360,64 +1057,137 @@ def get_project_summary(project_id: int) -> Optional[str]:
     Returns:
         Project summary or None if not found or no summary exists
     """
-    with sqlite3.connect(DATABASE_PATH) as conn:
+    with get_connection() as conn:
         cursor = conn.execute("SELECT summary FROM projects WHERE id = ?", (project_id,))
         result = cursor.fetchone()
         return result[0] if result and result[0] else None
 
+def get_messages_since(project_id: int, after_id: int = 0, limit: int = 50, through_id: int = None,
+                       oldest_first: bool = False) -> List[Tuple[int, str, str]]:
+    """Get a project's messages newer than a given message ID.
+    
+    Args:
+        project_id: Project ID
+        after_id: Only return messages with a larger ID
+        limit: Maximum number of messages (the most recent ones are kept)
+        through_id: Only return messages up to this ID (no upper bound if None)
+        oldest_first: Keep the oldest messages past after_id instead of the most recent
+        
+    Returns:
+        List of tuples containing (id, role, content) in chronological order
+    """
+    query = "SELECT id, role, content FROM messages WHERE project_id = ? AND id > ?"
+    params = [project_id, after_id]
+    if through_id is not None:
+        query += " AND id <= ?"
+        params.append(through_id)
+    query += f" ORDER BY id {'ASC' if oldest_first else 'DESC'} LIMIT ?"
+    params.append(limit)
+    with get_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return rows if oldest_first else list(reversed(rows))
+
+def count_messages_since_summary(project_id: int) -> int:
+    """Count a project's messages not yet folded into its summary (including queued ones).
+    
+    Args:
+        project_id: Project ID
+        
+    Returns:
+        Number of messages newer than the summary high-water mark
+    """
+    with _pending_messages(project_id) as pending, get_connection() as conn:
+        cursor = conn.execute("""
+            SELECT COUNT(*) FROM messages m JOIN projects p ON p.id = m.project_id
+            WHERE p.id = ? AND m.id > p.summary_message_id
+        """, (project_id,))
+        return cursor.fetchone()[0] + len(pending)
+
+SUMMARY_INSTRUCTIONS = (
+    "Create a concise 3-5 bullet point summary that captures:\n"
+    "• Key topics and themes discussed\n"
+    "• Important decisions or conclusions reached\n"
+    "• Current project status or progress\n"
+    "• Any ongoing tasks or next steps\n"
+    "Keep it brief but informative. Use bullet points starting with '•'."
+)
+
 def generate_project_summary(project_id: int, limit: int = 50) -> Optional[str]:
-    """Generate a new summary for a project using recent conversation history.
+    """Generate or incrementally refresh a project's summary.
+    
+    The first summary is built from recent history. After that, messages
+    newer than the summary's high-water mark are folded into it together
+    with the existing summary, oldest first and at most ``limit`` per
+    model call, until it covers the newest message. Each step is stored
+    as it completes, so a failure keeps the progress made so far.
     
     Args:
         project_id: Project ID
-        limit: Number of recent messages to include in summarization
+        limit: Maximum number of messages to include in one summarization
         
     Returns:
-        Generated summary or None if no messages found or generation failed
+        Up-to-date summary, or None if there are no messages or generation failed
     """
     # Import here to avoid circular dependency
-    from ollama import chat
+    from llm_backend import get_backend
     
-    # Get recent conversation messages for this project
-    messages = get_conversation_messages(limit=limit, project_id=project_id)
-    
-    if not messages:
-        return None
+    # Make sure queued messages are included
+    flush_messages()
     
     # Get project info for context
     project = get_project(project_id)
-    project_name = project.get('name', 'Unknown Project') if project else 'Unknown Project'
-    
-    # Build summarization prompt
-    summary_prompt = [
-        {
-            "role": "system", 
-            "content": f"You are summarizing the conversation history for the project '{project_name}'. "
-                      "Create a concise 3-5 bullet point summary that captures:\n"
-                      "• Key topics and themes discussed\n"
-                      "• Important decisions or conclusions reached\n"
-                      "• Current project status or progress\n"
-                      "• Any ongoing tasks or next steps\n"
-                      "Keep it brief but informative. Use bullet points starting with '•'."
-        }
-    ]
-    
-    # Add the conversation history
-    summary_prompt.extend(messages)
-    
-    try:
-        # Generate summary using the LLM
-        response = chat(model="qwen3:4b", messages=summary_prompt)
-        summary = response.message.content.strip()
-        
-        # Store the generated summary
-        if summary and update_project_summary(project_id, summary):
+    if not project:
+        return None
+    project_name = project.get('name') or 'Unknown Project'
+    summary = project.get('summary')
+    
+    # Messages logged while summarizing are left for the next refresh
+    with get_connection() as conn:
+        newest_id = conn.execute("SELECT MAX(id) FROM messages WHERE project_id = ?", (project_id,)).fetchone()[0]
+    
+    # Only the messages the current summary hasn't seen yet
+    after_id = project.get('summary_message_id', 0) if summary else 0
+    while True:
+        if summary:
+            new_messages = get_messages_since(project_id, after_id, limit, through_id=newest_id, oldest_first=True)
+        else:
+            new_messages = get_messages_since(project_id, 0, limit, through_id=newest_id)
+        
+        if not new_messages:
+            # Nothing new: the stored summary (if any) is already up to date
             return summary
         
-    except Exception as e:
-        print(f"⚠️ Failed to generate project summary: {e}")
-    
-    return None
+        # Build summarization prompt
+        if summary:
+            system_content = (
+                f"You are maintaining a running summary of the conversation history for the project '{project_name}'. "
+                f"Here is the current summary:\n{summary}\n\n"
+                "Update it with the new messages that follow, keeping anything from the current summary that still matters. "
+                + SUMMARY_INSTRUCTIONS
+            )
+        else:
+            system_content = (
+                f"You are summarizing the conversation history for the project '{project_name}'. "
+                + SUMMARY_INSTRUCTIONS
+            )
+        summary_prompt = [{"role": "system", "content": system_content}]
+        
+        # Add the new conversation history
+        summary_prompt.extend({"role": role, "content": content} for _, role, content in new_messages)
+        
+        try:
+            # Generate summary using the LLM
+            response = get_backend().chat(summary_prompt, task="summary")
+            updated = response.message.content.strip()
+        except Exception as e:
+            print(f"⚠️ Failed to generate project summary: {e}")
+            return None
+        
+        # Store the generated summary with the newest message it covers
+        after_id = new_messages[-1][0]
+        if not updated or not update_project_summary(project_id, updated, last_message_id=after_id):
+            return None
+        summary = updated
 
 def should_update_summary(project_id: int, message_threshold: int = 25) -> bool:
     """Check if a project summary should be updated based on recent activity.
@@ -429,26 +1199,20 @@ def should_update_summary(project_id: int, message_threshold: int = 25) -> bool:
     Returns:
         True if summary should be updated
     """
-    # Get project info including when it was last updated
+    # Get project info including the current summary
     project = get_project(project_id)
     if not project:
         return False
     
-    # Get message count for this project
-    message_count = get_message_count(project_id)
-    
-    # If no messages, no need for summary
-    if message_count == 0:
-        return False
+    # Messages not yet folded into the summary
+    new_messages = count_messages_since_summary(project_id)
     
-    # If no existing summary, definitely create one (but only if we have enough messages)
+    # If no existing summary, create one once we have enough messages
     if not project.get('summary'):
-        return message_count >= 10  # Wait until we have at least 10 messages
+        return new_messages >= 10  # Wait until we have at least 10 messages
     
-    # Check if enough new messages have been added since last update
-    # This is a simple heuristic - in a more advanced system you could track 
-    # message counts at the time of last summary update
-    return message_count >= message_threshold
+    # Refresh only after enough new messages since the last summary
+    return new_messages >= message_threshold
 
 # Initialize database on import
 init_database() 
\ No newline at end of file
@@ -0,0 +1,238 @@
+# page_cache.py
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from memory import get_connection
+
+WEB_CACHE_TTL = int(os.getenv("WEB_CACHE_TTL", "86400"))                       # Seconds a page is served without revalidating
+WEB_CACHE_MAX_BYTES = int(os.getenv("WEB_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))  # Extracted text kept, before LRU eviction
+
+# Query parameters that don't change the page (dropped when normalizing URLs)
+TRACKING_PARAM_PREFIXES = ("utm_", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+EVICTION_BATCH = 64  # Least recently used pages considered per eviction step
+# Extractions shorter than this (script-only pages, error stubs, a failed parse) aren't
+# cached, so a bad result is retried on the next fetch instead of served for a whole TTL
+MIN_CACHED_TEXT_CHARS = 200
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the remaining query parameters.
+
+    Args:
+        url: URL as found in search results
+
+    Returns:
+        Normalized URL (the input unchanged if it can't be parsed)
+    """
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+class PageCache:
+    """Persistent cache of extracted web page text, stored in SQLite.
+
+    Pages are keyed by normalized URL and keep their ETag/Last-Modified
+    validators, so an expired page is revalidated with a conditional
+    request instead of downloaded and parsed again. Identical text from
+    different URLs (mirrors, redirects, URL variants) is stored once,
+    keyed by its SHA-256. When the stored text exceeds max_bytes the least
+    recently used pages are evicted.
+    """
+
+    def __init__(self, max_bytes: int = WEB_CACHE_MAX_BYTES, ttl: int = WEB_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.deduplicated = 0
+        self.skipped = 0       # Near-empty extractions not cached
+        self.bytes_saved = 0   # Page bytes not downloaded thanks to hits and 304s
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Request headers to revalidate a stale entry (empty if there is nothing to revalidate)."""
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Find a cached page.
+
+        Args:
+            url: Page URL (normalized internally)
+
+        Returns:
+            Dict with 'text', 'fresh', 'etag', 'last_modified' and
+            'raw_bytes', or None if the page isn't cached. Stale entries are
+            returned so the caller can revalidate them.
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with get_connection() as conn:
+            row = conn.execute("""
+                SELECT t.text, p.etag, p.last_modified, p.raw_bytes, p.expires_at
+                FROM web_pages p JOIN web_page_texts t ON t.content_hash = p.content_hash
+                WHERE p.url = ?
+            """, (key,)).fetchone()
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+
+            entry = dict(zip(("text", "etag", "last_modified", "raw_bytes"), row[:4]))
+            entry["fresh"] = row[4] > now
+            if entry["fresh"]:
+                conn.execute("UPDATE web_pages SET last_used = ? WHERE url = ?", (now, key))
+
+        with self._lock:
+            if entry["fresh"]:
+                self.hits += 1
+                self.bytes_saved += entry["raw_bytes"]
+            else:
+                self.misses += 1
+        return entry
+
+    def revalidate(self, url: str, raw_bytes: int) -> None:
+        """Mark a page fresh again after a 304 Not Modified."""
+        now = time.time()
+        with get_connection() as conn:
+            conn.execute(
+                "UPDATE web_pages SET expires_at = ?, last_used = ? WHERE url = ?",
+                (now + self.ttl, now, normalize_url(url))
+            )
+        with self._lock:
+            self.revalidated += 1
+            self.bytes_saved += raw_bytes
+
+    def store(self, url: str, text: str, etag: str = None, last_modified: str = None, raw_bytes: int = 0) -> bool:
+        """Cache a page's extracted text and validators.
+
+        Text shorter than MIN_CACHED_TEXT_CHARS is not cached; any older
+        entry for the URL is left as it was.
+
+        Args:
+            url: Page URL (normalized internally)
+            text: Extracted page text
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+            raw_bytes: Bytes downloaded for the page (counted as saved on later hits)
+
+        Returns:
+            True if the page was cached
+        """
+        if len(text.strip()) < MIN_CACHED_TEXT_CHARS:
+            with self._lock:
+                self.skipped += 1
+            return False
+        encoded = text.encode("utf-8")
+        if len(encoded) > self.max_bytes:
+            return False
+        content_hash = hashlib.sha256(encoded).hexdigest()
+        now = time.time()
+
+        key = normalize_url(url)
+
+        with get_connection() as conn:
+            previous = conn.execute("SELECT content_hash FROM web_pages WHERE url = ?", (key,)).fetchall()
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO web_page_texts (content_hash, text, size) VALUES (?, ?, ?)",
+                (content_hash, text, len(encoded))
+            )
+            conn.execute("""
+                INSERT OR REPLACE INTO web_pages
+                    (url, content_hash, etag, last_modified, raw_bytes, fetched_at, expires_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, content_hash, etag, last_modified, raw_bytes, now, now + self.ttl, now))
+            # The page's previous text may no longer be referenced
+            self._delete_unreferenced(conn, previous)
+            self._evict(conn)
+
+        if cursor.rowcount == 0:
+            with self._lock:
+                self.deduplicated += 1
+        return True
+
+    @staticmethod
+    def _delete_unreferenced(conn, hashes) -> None:
+        """Delete texts (given as (content_hash,) rows) that no page points to any more."""
+        conn.executemany("""
+            DELETE FROM web_page_texts WHERE content_hash = ?1
+            AND NOT EXISTS (SELECT 1 FROM web_pages WHERE content_hash = ?1)
+        """, hashes)
+
+    def _evict(self, conn) -> None:
+        """Drop least recently used pages until the stored text fits max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM web_page_texts").fetchone()[0]
+        while total > self.max_bytes:
+            candidates = conn.execute("""
+                SELECT p.url, p.content_hash, t.size
+                FROM web_pages p JOIN web_page_texts t ON t.content_hash = p.content_hash
+                ORDER BY p.last_used LIMIT ?
+            """, (EVICTION_BATCH,)).fetchall()
+            if not candidates:
+                return
+            victims, freed = [], 0
+            for url, content_hash, size in candidates:
+                victims.append((url, content_hash))
+                # Shared texts only shrink the cache once their last page goes; re-measured below
+                freed += size
+                if total - freed <= self.max_bytes:
+                    break
+            conn.executemany("DELETE FROM web_pages WHERE url = ?", [(url,) for url, _ in victims])
+            self._delete_unreferenced(conn, [(content_hash,) for _, content_hash in victims])
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM web_page_texts").fetchone()[0]
+
+    def clear(self) -> int:
+        """Remove every cached page.
+
+        Returns:
+            Number of pages removed
+        """
+        with get_connection() as conn:
+            removed = conn.execute("DELETE FROM web_pages").rowcount
+            conn.execute("DELETE FROM web_page_texts")
+        return removed
+
+    def stats(self) -> dict:
+        with get_connection() as conn:
+            pages = conn.execute("SELECT COUNT(*) FROM web_pages").fetchone()[0]
+            texts, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM web_page_texts").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "pages": pages,
+                "unique_texts": texts,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "deduplicated": self.deduplicated,
+                "skipped": self.skipped,
+                "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
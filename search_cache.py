@@ -0,0 +1,336 @@
+# search_cache.py
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from memory import get_connection
+
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "86400"))                   # Seconds a search result is reused
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))    # Cached searches, before LRU eviction
+SERPAPI_MONTHLY_QUOTA = int(os.getenv("SERPAPI_MONTHLY_QUOTA", "100"))          # Paid searches per calendar month (0 = no limit)
+SERPAPI_HOURLY_LIMIT = int(os.getenv("SERPAPI_HOURLY_LIMIT", "0"))              # Paid searches per hour, per process (0 = no limit)
+SEARCH_FLIGHT_TIMEOUT = 30  # Seconds a duplicate query waits for the in-flight one
+
+# Words that don't change what a search engine returns, folded out of cache keys
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "with", "about",
+    "is", "are", "was", "were", "be", "do", "does", "did", "what", "whats", "which", "who", "how",
+    "please", "can", "could", "you", "me", "my", "i", "tell", "find", "search", "look", "up",
+}
+# Kept in cache keys: "flights from paris to london" and "flights to paris from london" differ
+DIRECTION_WORDS = {"to", "from", "in", "into", "on", "at", "by", "via", "before", "after", "vs", "versus", "not", "without"}
+_QUERY_TOKEN = re.compile(r"[\w+#]+")
+
+def normalize_query(query: str, stop_words: set = STOP_WORDS) -> str:
+    """Canonical form of a search query for cache keys.
+
+    Folds case, Unicode forms, punctuation and whitespace, and drops stop
+    words (unless the query is nothing but stop words), so "What is the
+    Krebs cycle?" and "krebs  cycle" share an entry. Word order and
+    direction words are kept, since they change what the query asks for.
+
+    Args:
+        query: Search query as the model wrote it
+        stop_words: Words to drop (STOP_WORDS by default)
+
+    Returns:
+        Normalized query
+    """
+    tokens = _QUERY_TOKEN.findall(unicodedata.normalize("NFKC", query).lower())
+    content = [token for token in tokens if token not in stop_words]
+    return " ".join(content or tokens)
+
+def search_key(query: str, location: str) -> str:
+    """Cache key for a query and location."""
+    return normalize_query(query) + "|" + " ".join((location or "").lower().split())
+
+def _compact(results: dict) -> dict:
+    """Keep only the fields the search tool formats (SerpAPI responses are large)."""
+    return {"organic_results": [
+        {field: result[field] for field in ("title", "link", "snippet") if field in result}
+        for result in results.get("organic_results", [])
+    ]}
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+class _Flight:
+    """One in-progress fetch that identical concurrent queries wait for."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.outcome = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._waiters = []  # (loop, future) of async callers waiting for the fetch
+
+    def land(self) -> None:
+        """Wake every caller waiting for this fetch."""
+        with self._lock:
+            self.event.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait(self, timeout: float) -> bool:
+        """Async wait for the fetch; returns False on timeout.
+
+        Waits on the event loop rather than in a worker thread, so a burst
+        of identical searches can't use up the default executor that the
+        fetching call needs for its own database work.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.event.is_set():
+                return True
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def result(self) -> Tuple[dict, Optional[str]]:
+        if self.error is not None:
+            raise self.error
+        return self.outcome
+
+class SearchCache:
+    """Persistent cache of web search results, stored in SQLite.
+
+    Results are keyed by normalized query and location and reused for
+    ``ttl`` seconds. Identical queries arriving while one is being fetched
+    wait for it instead of paying for their own request (single-flight).
+    Paid requests are counted per calendar month in the database (shared by
+    all worker processes) and optionally per hour; when the budget is used
+    up, or the search API fails, an expired result is served instead if
+    one exists.
+    """
+
+    def __init__(self, ttl: int = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                 monthly_quota: int = SERPAPI_MONTHLY_QUOTA, hourly_limit: int = SERPAPI_HOURLY_LIMIT):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.monthly_quota = monthly_quota
+        self.hourly_limit = hourly_limit
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._recent = deque()  # Times of this process's paid requests in the last hour
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.requests = 0
+        self.budget_refusals = 0
+
+    def get(self, query: str, location: str, fetch: Callable[[], dict]) -> Tuple[dict, Optional[str]]:
+        """Get search results from the cache, or fetch them.
+
+        Args:
+            query: Search query
+            location: Search location
+            fetch: Makes the paid search request and returns the SerpAPI response dict
+
+        Returns:
+            Tuple of (results dict, notice). The notice is None for fresh
+            results, or explains why older cached results are shown.
+        """
+        key = search_key(query, location)
+        entry = self._lookup(key)
+        if entry and entry["fresh"]:
+            return entry["results"], None
+
+        flight, leader = self._join_flight(key)
+        if not leader:
+            if not flight.event.wait(SEARCH_FLIGHT_TIMEOUT):
+                raise TimeoutError(f"Waited too long for an identical search: {query}")
+            return flight.result()
+
+        try:
+            refusal = self._reserve_request()
+            if refusal:
+                flight.outcome = self._fallback(entry, refusal)
+            else:
+                try:
+                    results = fetch()
+                except Exception as e:
+                    if entry is None:
+                        raise
+                    results = {"error": str(e)}
+                flight.outcome = self._finish(key, query, location, entry, results)
+            return flight.outcome
+        except BaseException as e:
+            flight.error = e if isinstance(e, Exception) else RuntimeError("Identical search was interrupted")
+            raise
+        finally:
+            self._land(key, flight)
+
+    async def aget(self, query: str, location: str, fetch: Callable[[], Awaitable[dict]]) -> Tuple[dict, Optional[str]]:
+        """Async version of get; ``fetch`` is a coroutine function."""
+        key = search_key(query, location)
+        entry = await asyncio.to_thread(self._lookup, key)
+        if entry and entry["fresh"]:
+            return entry["results"], None
+
+        flight, leader = self._join_flight(key)
+        if not leader:
+            if not await flight.wait(SEARCH_FLIGHT_TIMEOUT):
+                raise TimeoutError(f"Waited too long for an identical search: {query}")
+            return flight.result()
+
+        try:
+            refusal = await asyncio.to_thread(self._reserve_request)
+            if refusal:
+                flight.outcome = self._fallback(entry, refusal)
+            else:
+                try:
+                    results = await fetch()
+                except Exception as e:
+                    if entry is None:
+                        raise
+                    results = {"error": str(e)}
+                flight.outcome = await asyncio.to_thread(self._finish, key, query, location, entry, results)
+            return flight.outcome
+        except BaseException as e:
+            flight.error = e if isinstance(e, Exception) else RuntimeError("Identical search was interrupted")
+            raise
+        finally:
+            self._land(key, flight)
+
+    def _join_flight(self, key: str) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.land()
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with get_connection() as conn:
+            row = conn.execute(
+                "SELECT results, fetched_at, expires_at FROM web_searches WHERE query_key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[2] > now:
+                conn.execute("UPDATE web_searches SET last_used = ? WHERE query_key = ?", (now, key))
+        with self._lock:
+            if row is not None and row[2] > now:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if row is None:
+            return None
+        return {"results": json.loads(row[0]), "fetched_at": row[1], "fresh": row[2] > now}
+
+    def _reserve_request(self) -> Optional[str]:
+        """Count a paid request against the budgets; returns why it's refused, or None."""
+        now = time.time()
+        with self._lock:
+            while self._recent and self._recent[0] <= now - 3600:
+                self._recent.popleft()
+            if self.hourly_limit and len(self._recent) >= self.hourly_limit:
+                self.budget_refusals += 1
+                return f"Hourly web search limit ({self.hourly_limit}) reached"
+            self._recent.append(now)
+
+        # Conditional upsert, so concurrent workers can't overrun the quota
+        with get_connection() as conn:
+            cursor = conn.execute("""
+                INSERT INTO search_api_usage (month, requests) VALUES (?1, 1)
+                ON CONFLICT(month) DO UPDATE SET requests = requests + 1 WHERE ?2 = 0 OR requests < ?2
+            """, (time.strftime("%Y-%m"), self.monthly_quota))
+        if cursor.rowcount == 0:
+            with self._lock:
+                self._recent.remove(now)
+                self.budget_refusals += 1
+            return f"Monthly web search quota ({self.monthly_quota}) used up"
+
+        with self._lock:
+            self.requests += 1
+        return None
+
+    def _fallback(self, entry: Optional[Dict], reason: str) -> Tuple[dict, Optional[str]]:
+        """Serve an expired entry when a fresh one can't be had."""
+        if entry is None:
+            return {"error": reason}, None
+        with self._lock:
+            self.stale_served += 1
+        fetched = datetime.fromtimestamp(entry["fetched_at"]).strftime("%Y-%m-%d %H:%M")
+        return entry["results"], f"⚠️ {reason}; showing results cached on {fetched}"
+
+    def _finish(self, key: str, query: str, location: str, entry: Optional[Dict],
+                results: dict) -> Tuple[dict, Optional[str]]:
+        if "error" in results:
+            # Errors aren't cached; older results beat no results
+            return self._fallback(entry, f"Web search failed ({results['error']})") if entry else (results, None)
+        results = _compact(results)
+        self._store(key, query, location, results)
+        return results, None
+
+    def _store(self, key: str, query: str, location: str, results: dict) -> None:
+        now = time.time()
+        with get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO web_searches
+                    (query_key, query, location, results, fetched_at, expires_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, query, location, json.dumps(results), now, now + self.ttl, now))
+            excess = conn.execute("SELECT COUNT(*) FROM web_searches").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute("""
+                    DELETE FROM web_searches WHERE query_key IN
+                        (SELECT query_key FROM web_searches ORDER BY last_used LIMIT ?)
+                """, (excess,))
+
+    def usage(self) -> int:
+        """Paid search requests made this calendar month (all processes)."""
+        with get_connection() as conn:
+            row = conn.execute("SELECT requests FROM search_api_usage WHERE month = ?",
+                               (time.strftime("%Y-%m"),)).fetchone()
+        return row[0] if row else 0
+
+    def clear(self) -> int:
+        """Remove every cached search (the usage count is kept).
+
+        Returns:
+            Number of searches removed
+        """
+        with get_connection() as conn:
+            return conn.execute("DELETE FROM web_searches").rowcount
+
+    def stats(self) -> dict:
+        with get_connection() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM web_searches").fetchone()[0]
+        used = self.usage()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "stale_served": self.stale_served,
+                "requests": self.requests,
+                "budget_refusals": self.budget_refusals,
+                "month_usage": used,
+                "monthly_quota": self.monthly_quota,
+                "quota_remaining": max(self.monthly_quota - used, 0) if self.monthly_quota else None,
+            }
@@ -0,0 +1,170 @@
+# search_providers.py
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from serpapi import GoogleSearch
+
+from local_index import LOCAL_CORPUS_DIR, LocalIndex
+from search_cache import SearchCache
+
+SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "serpapi")  # serpapi, local, or auto (local first, then SerpAPI)
+SEARCH_RESULT_COUNT = 5     # Results requested and listed per search
+
+SERPAPI_URL = "https://serpapi.com/search"
+
+class SearchProvider:
+    """Interface for the search_web tool's search backends.
+
+    search() returns (results, notice). Results are shaped like a SerpAPI
+    response: {"organic_results": [{"title", "link", "snippet"}, ...]} or
+    {"error": message}. A result may also carry "content", text the tool
+    shows instead of fetching the linked page. The notice is None, or a
+    line shown above the results (e.g. that they are from an old cache).
+    """
+
+    name = "base"
+
+    def search(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        """Search for a query.
+
+        Args:
+            query: The search query
+            location: Location for localized results
+
+        Returns:
+            Tuple of (results, notice)
+        """
+        raise NotImplementedError
+
+    async def asearch(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        """Async version of search(); runs search() in a thread unless overridden."""
+        return await asyncio.to_thread(self.search, query, location)
+
+    def stats(self) -> dict:
+        """Provider status for the system status endpoint."""
+        return {"provider": self.name}
+
+class SerpAPIProvider(SearchProvider):
+    """Google results through SerpAPI (paid), behind the persistent SearchCache."""
+
+    name = "serpapi"
+
+    def __init__(self, cache: SearchCache = None, async_client: Callable[[], object] = None):
+        """
+        Args:
+            cache: Search result cache (a new SearchCache by default)
+            async_client: Returns the current event loop's httpx.AsyncClient; without
+                it asearch() runs the blocking client in a thread
+        """
+        self.cache = cache or SearchCache()
+        self.async_client = async_client
+
+    @staticmethod
+    def params(query: str, location: str, api_key: str) -> dict:
+        return {
+            "q": query,
+            "location": location,
+            "hl": "en",
+            "gl": "us",
+            "google_domain": "google.com",
+            "api_key": api_key,
+            "num": SEARCH_RESULT_COUNT
+        }
+
+    def search(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        api_key = os.getenv('SERPAPI_KEY')
+        if not api_key:
+            return {"error": "Web search unavailable: SERPAPI_KEY environment variable not set"}, None
+        # Paid request only when the query isn't cached (or being fetched by another chat)
+        return self.cache.get(query, location, lambda: GoogleSearch(self.params(query, location, api_key)).get_dict())
+
+    async def asearch(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        api_key = os.getenv('SERPAPI_KEY')
+        if not api_key:
+            return {"error": "Web search unavailable: SERPAPI_KEY environment variable not set"}, None
+        if self.async_client is None:
+            return await super().asearch(query, location)
+
+        async def fetch() -> dict:
+            # Same request GoogleSearch.get_dict() makes
+            params = dict(self.params(query, location, api_key), engine="google", output="json", source="python")
+            response = await self.async_client().get(SERPAPI_URL, params=params, timeout=15)
+            return response.json()
+
+        return await self.cache.aget(query, location, fetch)
+
+    def stats(self) -> dict:
+        return {"provider": self.name, "cache": self.cache.stats()}
+
+class LocalIndexProvider(SearchProvider):
+    """Searches a local folder of course files through LocalIndex (no network).
+
+    Results link to the files and carry their best matching passage as
+    content, so no pages are fetched. With match_all, only passages that
+    contain every content word of the query count, so as the first choice
+    of a FallbackProvider it answers only queries the corpus is about.
+    """
+
+    name = "local"
+
+    def __init__(self, index: LocalIndex = None, match_all: bool = False):
+        self.index = index or LocalIndex()
+        self.match_all = match_all
+
+    def search(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        self.index.refresh_if_stale()
+        return {"organic_results": [
+            {"title": result["title"], "link": Path(result["path"]).as_uri(),
+             "snippet": result["snippet"], "content": result["text"]}
+            for result in self.index.search(query, limit=SEARCH_RESULT_COUNT, match_all=self.match_all)
+        ]}, None
+
+    def stats(self) -> dict:
+        return {"provider": self.name, "index": self.index.stats()}
+
+class FallbackProvider(SearchProvider):
+    """Tries the primary provider first and asks the fallback only when it finds nothing."""
+
+    def __init__(self, primary: SearchProvider, fallback: SearchProvider):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def search(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        results, notice = self.primary.search(query, location)
+        if results.get("organic_results"):
+            return results, notice
+        return self.fallback.search(query, location)
+
+    async def asearch(self, query: str, location: str) -> Tuple[dict, Optional[str]]:
+        results, notice = await self.primary.asearch(query, location)
+        if results.get("organic_results"):
+            return results, notice
+        return await self.fallback.asearch(query, location)
+
+    def stats(self) -> dict:
+        return {"provider": self.name, "primary": self.primary.stats(), "fallback": self.fallback.stats()}
+
+def create_search_provider(serpapi: SearchProvider, name: str = SEARCH_PROVIDER,
+                           corpus_dir: str = LOCAL_CORPUS_DIR) -> SearchProvider:
+    """Build the provider selected by SEARCH_PROVIDER.
+
+    Args:
+        serpapi: The SerpAPI provider to use for 'serpapi' and as the 'auto' fallback
+        name: 'serpapi', 'local' or 'auto'
+        corpus_dir: Folder for the local index
+
+    Returns:
+        SearchProvider ('auto' without a corpus folder is plain SerpAPI)
+    """
+    if name == "local":
+        return LocalIndexProvider(LocalIndex(corpus_dir))
+    if name == "auto" and corpus_dir:
+        # A passage sharing one common word with the query isn't an answer; ask SerpAPI instead
+        return FallbackProvider(LocalIndexProvider(LocalIndex(corpus_dir), match_all=True), serpapi)
+    if name not in ("serpapi", "auto"):
+        print(f"⚠️ Unknown SEARCH_PROVIDER '{name}', using serpapi")
+    return serpapi
@@ -0,0 +1,318 @@
+# semantic_memory.py
+
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from memory import get_connection, on_messages_deleted, search_memory_ranked
+
+EMBEDDING_BATCH_SIZE = 32       # Messages embedded per background batch
+INDEXER_POLL_SECONDS = 5.0      # How often the indexer checks for new messages
+HYBRID_VECTOR_WEIGHT = 0.5      # Share of the hybrid score taken from vector similarity
+
+class OnnxMiniLMEmbedder:
+    """all-MiniLM-L6-v2 sentence embeddings run locally through ONNX Runtime.
+
+    Uses the model bundled with chromadb (onnxruntime + tokenizers); the
+    model files are downloaded to the chromadb cache on first use.
+    """
+
+    name = "all-MiniLM-L6-v2"
+
+    def __init__(self):
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        self._embed = DefaultEmbeddingFunction()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self._embed(texts), dtype=np.float32)
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder that needs no model download.
+
+    Tokens are hashed into a fixed number of signed buckets. It only captures
+    word overlap, not meaning, so it is meant for offline tests and
+    benchmarks rather than production retrieval.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vectors
+
+_embedder = None
+_embedder_lock = threading.Lock()
+_embedder_unavailable = False
+
+def set_embedder(embedder) -> None:
+    """Replace the embedder (e.g. with HashingEmbedder for offline use).
+
+    Vectors are stored per embedder name, so switching embedders re-indexes
+    messages in the background instead of mixing incompatible vectors.
+    """
+    global _embedder, _embedder_unavailable
+    with _embedder_lock:
+        _embedder = embedder
+        _embedder_unavailable = False
+    invalidate_matrix_cache()
+
+def get_embedder():
+    """Get the active embedder, loading the ONNX model on first use.
+
+    Returns:
+        Embedder instance, or None if no embedding backend is installed
+    """
+    global _embedder, _embedder_unavailable
+    with _embedder_lock:
+        if _embedder is None and not _embedder_unavailable:
+            try:
+                _embedder = OnnxMiniLMEmbedder()
+            except Exception as e:
+                print(f"⚠️ Semantic memory disabled: {e}")
+                _embedder_unavailable = True
+        return _embedder
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def index_pending_messages(batch_size: int = EMBEDDING_BATCH_SIZE) -> int:
+    """Embed one batch of messages that don't have a vector yet.
+
+    Vectors are L2-normalized and stored as float16 blobs, so cosine
+    similarity at query time is a single matrix-vector product.
+
+    Args:
+        batch_size: Maximum number of messages to embed
+
+    Returns:
+        Number of messages embedded
+    """
+    embedder = get_embedder()
+    if embedder is None:
+        return 0
+
+    with get_connection() as conn:
+        rows = conn.execute("""
+            SELECT m.id, m.content, m.project_id FROM messages m
+            LEFT JOIN message_embeddings e ON e.message_id = m.id AND e.model = ?
+            WHERE e.message_id IS NULL
+            ORDER BY m.id
+            LIMIT ?
+        """, (embedder.name, batch_size)).fetchall()
+
+    if not rows:
+        return 0
+
+    # Embed outside the connection so the model doesn't hold a pooled connection
+    vectors = _normalize(embedder.embed([content for _, content, _ in rows])).astype(np.float16)
+
+    with get_connection() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO message_embeddings (message_id, model, vector) VALUES (?, ?, ?)",
+            [(message_id, embedder.name, vector.tobytes()) for (message_id, _, _), vector in zip(rows, vectors)]
+        )
+
+    for project_id in {project_id for _, _, project_id in rows}:
+        invalidate_matrix_cache(project_id)
+    return len(rows)
+
+# (model, project_id) -> (message ids, float16 matrix of normalized vectors)
+_matrix_cache: Dict[Tuple[str, Optional[int]], Tuple[np.ndarray, np.ndarray]] = {}
+_matrix_lock = threading.Lock()
+# Bumped on every invalidation; a matrix read before a bump is not cached
+_matrix_generation = 0
+
+def invalidate_matrix_cache(project_id: Optional[int] = None) -> None:
+    """Drop cached vector matrices after messages were embedded or deleted.
+
+    Args:
+        project_id: Project whose matrices are stale (every project if None);
+            the all-projects matrix is always dropped
+    """
+    global _matrix_generation
+    with _matrix_lock:
+        _matrix_generation += 1
+        if project_id is None:
+            _matrix_cache.clear()
+            return
+        for key in [key for key in _matrix_cache if key[1] in (project_id, None)]:
+            del _matrix_cache[key]
+
+on_messages_deleted(invalidate_matrix_cache)
+
+def _load_matrix(model: str, project_id: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    key = (model, project_id)
+    with _matrix_lock:
+        cached = _matrix_cache.get(key)
+        generation = _matrix_generation
+    if cached is not None:
+        return cached
+
+    with get_connection() as conn:
+        if project_id is not None:
+            rows = conn.execute("""
+                SELECT e.message_id, e.vector FROM message_embeddings e
+                JOIN messages m ON m.id = e.message_id
+                WHERE e.model = ? AND m.project_id = ?
+            """, (model, project_id)).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT message_id, vector FROM message_embeddings WHERE model = ?", (model,)
+            ).fetchall()
+
+    if rows:
+        ids = np.array([message_id for message_id, _ in rows], dtype=np.int64)
+        matrix = np.vstack([np.frombuffer(vector, dtype=np.float16) for _, vector in rows])
+    else:
+        ids, matrix = np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float16)
+
+    with _matrix_lock:
+        # An invalidation during the read means these rows may already be stale
+        if _matrix_generation == generation:
+            _matrix_cache[key] = (ids, matrix)
+    return ids, matrix
+
+def semantic_search(query: str, limit: int = 5, project_id: int = None) -> List[Tuple[int, float]]:
+    """Top-k cosine similarity search over embedded messages.
+
+    Args:
+        query: Natural language query
+        limit: Maximum number of results to return
+        project_id: Project ID to filter by (all projects if None)
+
+    Returns:
+        List of (message_id, similarity) tuples, most similar first
+    """
+    embedder = get_embedder()
+    if embedder is None or not query.strip():
+        return []
+
+    ids, matrix = _load_matrix(embedder.name, project_id)
+    if not len(ids):
+        return []
+
+    query_vector = _normalize(embedder.embed([query]))[0].astype(np.float16)
+    scores = matrix @ query_vector
+    k = min(limit, len(ids))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(ids[i]), float(scores[i])) for i in top]
+
+def _scale(scores: Dict[int, float]) -> Dict[int, float]:
+    """Min-max scale scores to 0..1 so BM25 and cosine can be combined."""
+    if not scores:
+        return {}
+    low, high = min(scores.values()), max(scores.values())
+    if high == low:
+        return {key: 1.0 for key in scores}
+    return {key: (value - low) / (high - low) for key, value in scores.items()}
+
+def hybrid_search(term: str, limit: int = 5, project_id: int = None,
+                  vector_weight: float = HYBRID_VECTOR_WEIGHT) -> List[Tuple[str, str, str]]:
+    """Search memory combining BM25 keyword relevance with vector similarity.
+
+    Falls back to keyword-only ranking when no embedder is available or
+    embedding the query fails (e.g. the ONNX model can't be downloaded).
+
+    Args:
+        term: Search term or natural language question
+        limit: Maximum number of results to return
+        project_id: Project ID to filter by (all projects if None)
+        vector_weight: Weight of the semantic score (0 = keyword only, 1 = semantic only)
+
+    Returns:
+        List of tuples containing (role, content, timestamp), most relevant first
+    """
+    candidates = limit * 4
+    keyword_hits = search_memory_ranked(term, limit=candidates, project_id=project_id)
+    try:
+        vector_hits = semantic_search(term, limit=candidates, project_id=project_id)
+    except Exception as e:
+        print(f"⚠️ Semantic search failed, using keyword ranking only: {e}")
+        vector_hits = []
+
+    if not vector_hits:
+        return [(r["role"], r["content"], r["timestamp"]) for r in keyword_hits[:limit]]
+
+    # bm25() is lower-is-better, so negate before scaling
+    keyword_scores = _scale({r["id"]: -r["score"] for r in keyword_hits})
+    vector_scores = _scale(dict(vector_hits))
+
+    combined = {}
+    for message_id in set(keyword_scores) | set(vector_scores):
+        combined[message_id] = (
+            (1 - vector_weight) * keyword_scores.get(message_id, 0.0)
+            + vector_weight * vector_scores.get(message_id, 0.0)
+        )
+    ranked_ids = sorted(combined, key=combined.get, reverse=True)[:limit]
+    if not ranked_ids:
+        return []
+
+    with get_connection() as conn:
+        placeholders = ",".join("?" * len(ranked_ids))
+        rows = conn.execute(
+            f"SELECT id, role, content, timestamp FROM messages WHERE id IN ({placeholders})",
+            ranked_ids
+        ).fetchall()
+    by_id = {row[0]: row[1:] for row in rows}
+    return [by_id[message_id] for message_id in ranked_ids if message_id in by_id]
+
+class EmbeddingIndexer(threading.Thread):
+    """Daemon thread that embeds new messages in batches in the background."""
+
+    def __init__(self, poll_seconds: float = INDEXER_POLL_SECONDS):
+        super().__init__(name="embedding-indexer", daemon=True)
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                # Drain the backlog, then sleep until woken or the next poll
+                while not self._stop_event.is_set() and index_pending_messages():
+                    pass
+            except Exception as e:
+                print(f"⚠️ Embedding indexer error: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+_indexer: Optional[EmbeddingIndexer] = None
+_indexer_lock = threading.Lock()
+
+def schedule_indexing() -> None:
+    """Ask the background indexer to embed new messages, starting it if needed."""
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None or not _indexer.is_alive():
+            _indexer = EmbeddingIndexer()
+            _indexer.start()
+        _indexer.wake()
+
+def stop_indexing() -> None:
+    """Stop the background indexer if it is running."""
+    global _indexer
+    with _indexer_lock:
+        if _indexer is not None:
+            _indexer.stop()
+            _indexer.join(timeout=5)
+            _indexer = None
@@ -1,11 +1,35 @@
 #!/usr/bin/env python3
 """
 Startup script for Student Assistant Web Interface
+
+Servers:
+  gunicorn  Production WSGI server (default): several worker processes,
+            each with a pool of threads, graceful restarts and shutdown
+  uvicorn   ASGI app (asgi_app.py) with async chat/Canvas routes
+  dev       Flask's built-in development server
+
+Usage: python start_web.py [--server gunicorn] [--workers 2] [--threads 16]
+                           [--host 0.0.0.0] [--port 5000] [--no-preload]
 """
 
+import argparse
 import sys
 import os
-from memory import get_message_count
+from dotenv import load_dotenv
+from memory import get_message_count, close_connections
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "5000"))
+WEB_SERVER = os.getenv("WEB_SERVER", "gunicorn")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))            # Worker processes
+WEB_THREADS = int(os.getenv("WEB_THREADS", "16"))           # Request threads per worker
+WEB_BACKLOG = int(os.getenv("WEB_BACKLOG", "2048"))         # Pending connections the OS queues
+WEB_PRELOAD = os.getenv("WEB_PRELOAD", "true").lower() == "true"
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))  # Seconds to drain on shutdown
+WEB_TIMEOUT = 120        # Seconds before a stuck worker is restarted (a whole LLM reply fits)
+WEB_KEEPALIVE = 5        # Seconds to hold idle client connections open
 
 def check_dependencies():
     try:
@@ -17,25 +41,108 @@ def check_dependencies():
         print(f"❌ Missing dependency: {e}")
         return False
 
+def _when_ready(server):
+    # The master opened the database (and with preload imported the app);
+    # close its connections so forked workers open their own
+    close_connections()
+
+def _worker_exit(server, worker):
+    from app import shutdown_app
+    shutdown_app()
+
+def run_gunicorn(args) -> bool:
+    """Serve app.py with gunicorn's threaded workers.
+
+    With preload the app is imported (and memory.init_database run) once in
+    the master before workers fork. On SIGTERM/SIGINT workers stop accepting
+    connections, finish in-flight requests within the graceful timeout, then
+    drain background jobs and the message writer before exiting.
+
+    Returns:
+        False if gunicorn isn't available (e.g. on Windows)
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        return False
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "gthread",
+        "threads": args.threads,
+        "backlog": WEB_BACKLOG,
+        "preload_app": args.preload,
+        "graceful_timeout": WEB_GRACEFUL_TIMEOUT,
+        "timeout": WEB_TIMEOUT,
+        "keepalive": WEB_KEEPALIVE,
+        "when_ready": _when_ready,
+        "worker_exit": _worker_exit,
+        "accesslog": "-",
+    }
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    StandaloneApplication().run()
+    return True
+
+def run_uvicorn(args) -> None:
+    """Serve asgi_app.py with uvicorn; Flask routes use WEB_THREADS threads per worker."""
+    import uvicorn
+    os.environ["WEB_THREADS"] = str(args.threads)
+    uvicorn.run("asgi_app:app", host=args.host, port=args.port, workers=args.workers,
+                backlog=WEB_BACKLOG, timeout_keep_alive=WEB_KEEPALIVE,
+                timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT)
+
+def run_dev(args) -> None:
+    from app import app, shutdown_app
+    try:
+        app.run(debug=False, host=args.host, port=args.port)
+    finally:
+        shutdown_app()
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["gunicorn", "uvicorn", "dev"], default=WEB_SERVER)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS, help="worker processes")
+    parser.add_argument("--threads", type=int, default=WEB_THREADS, help="request threads per worker")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=WEB_PRELOAD,
+                        help="import the app in each worker instead of once in the master")
+    args = parser.parse_args()
+
     print("🧠 Student Assistant - Web Interface")
     print("=" * 50)
-    
+
     if not check_dependencies():
-        print("Please run: pip install flask")
+        print("Please run: pip install -r requirements.txt")
         sys.exit(1)
-    
-    print("🚀 Starting Web Interface...")
-    print("📱 Open your browser to: http://localhost:5000")
+
+    print(f"🚀 Starting Web Interface ({args.server}, {args.workers} workers x {args.threads} threads)..."
+          if args.server != "dev" else "🚀 Starting Web Interface (development server)...")
+    print(f"📱 Open your browser to: http://localhost:{args.port}")
     print("🧠 Memory status:", get_message_count(), "messages stored")
     print("🛑 Press Ctrl+C to stop")
     print()
-    
+
     try:
-        from app import app
-        app.run(debug=False, host='0.0.0.0', port=5000)
+        if args.server == "uvicorn":
+            run_uvicorn(args)
+        elif args.server == "dev" or not run_gunicorn(args):
+            if args.server != "dev":
+                print("⚠️ gunicorn is not installed, falling back to the development server")
+            run_dev(args)
     except KeyboardInterrupt:
-        print("\n👋 Web interface stopped")
+        pass
+    print("\n👋 Web interface stopped")
 
 if __name__ == "__main__":
     main()
@@ -375,11 +375,11 @@ class StudentAssistant {
         input.value = '';
         document.getElementById('send-btn').disabled = true;
 
-        // Show loading
+        // Show loading until the first token arrives
         this.showLoading();
 
         try {
-            const response = await fetch('/api/chat', {
+            const response = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -390,14 +390,13 @@ class StudentAssistant {
                 })
             });
 
-            const data = await response.json();
-            
-            if (response.ok) {
-                this.addMessage('assistant', data.response);
-                this.updateMemoryCount(data.message_count);
-            } else {
+            if (!response.ok || !response.body) {
+                const data = await response.json();
                 this.addMessage('assistant', `Error: ${data.error}`, true);
+                return;
             }
+
+            await this.readChatStream(response.body);
         } catch (error) {
             this.addMessage('assistant', `Network error: ${error.message}`, true);
         } finally {
@@ -405,6 +404,51 @@ class StudentAssistant {
         }
     }
 
+    async readChatStream(body) {
+        const reader = body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let reply = '';
+        let messageDiv = null;
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // Server-Sent Events are separated by a blank line
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const raw of events) {
+                if (!raw.startsWith('data: ')) continue;
+                const event = JSON.parse(raw.slice(6));
+
+                if (event.type === 'token') {
+                    reply += event.content;
+                    this.hideLoading();
+                    if (!messageDiv) {
+                        messageDiv = this.addMessage('assistant', reply);
+                    } else {
+                        this.updateMessage(messageDiv, reply);
+                    }
+                } else if (event.type === 'tool') {
+                    this.showLoading();
+                } else if (event.type === 'done') {
+                    this.updateMemoryCount(event.message_count);
+                } else if (event.type === 'error') {
+                    this.addMessage('assistant', `Error: ${event.error}`, true);
+                }
+            }
+        }
+    }
+
+    updateMessage(messageDiv, content) {
+        messageDiv.querySelector('.message-text').innerHTML = this.formatMessage(content);
+        const chatMessages = document.getElementById('chat-messages');
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+
     addMessage(role, content, isError = false) {
         const chatMessages = document.getElementById('chat-messages');
         
@@ -434,6 +478,8 @@ class StudentAssistant {
         if (welcomeMessage && welcomeMessage.querySelector('h4')?.textContent.includes('Welcome')) {
             welcomeMessage.remove();
         }
+
+        return messageDiv;
     }
 
     formatMessage(content) {
@@ -491,8 +537,9 @@ class StudentAssistant {
         results.forEach((result, index) => {
             const time = new Date(result.timestamp).toLocaleDateString();
             const roleIcon = result.role === 'user' ? '👤' : '🤖';
-            const content = result.content.length > 100 ? 
-                result.content.substring(0, 100) + '...' : result.content;
+            // Prefer the highlighted match snippet from the full-text index
+            const content = result.snippet ? this.formatMessage(result.snippet) :
+                (result.content.length > 100 ? result.content.substring(0, 100) + '...' : result.content);
             
             html += `
                 <div class="search-result">
@@ -651,6 +698,20 @@ class StudentAssistant {
         }
     }
 
+    async waitForJob(jobId, intervalMs = 1000) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            const data = await response.json();
+            if (!response.ok) {
+                return { status: 'failed', error: data.error };
+            }
+            if (data.job.status === 'done' || data.job.status === 'failed') {
+                return data.job;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
     async generateProjectSummary() {
         if (!this.currentProjectId) {
             this.showToast('Please select a project first', 'error');
@@ -679,20 +740,29 @@ class StudentAssistant {
             });
 
             const data = await response.json();
+
+            if (!response.ok) {
+                this.hideLoading();
+                this.showToast(data.error, 'error');
+                return;
+            }
+
+            // Summary generation runs as a background job; poll until it finishes
+            const job = await this.waitForJob(data.job_id);
             this.hideLoading();
 
-            if (response.ok) {
-                this.showToast(data.message, 'success');
+            if (job.status === 'done' && job.result) {
+                this.showToast('Project summary generated successfully', 'success');
                 
                 // Update the project in our local data
                 const projectIndex = this.projects.findIndex(p => p.id === this.currentProjectId);
                 if (projectIndex !== -1) {
-                    this.projects[projectIndex].summary = data.summary;
+                    this.projects[projectIndex].summary = job.result;
                     this.updateProjectSummaryDisplay(this.projects[projectIndex]);
                     this.updateProjectSelector(); // Update the summary indicator
                 }
             } else {
-                this.showToast(data.error, 'error');
+                this.showToast(job.error || 'Failed to generate summary', 'error');
             }
         } catch (error) {
             this.hideLoading();
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# memory.py opens DATABASE_PATH on import; keep it out of the working tree
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "test_import.db")
+os.environ["MEMORY_SEARCH_MODE"] = "keyword"
+
+import pytest  # noqa: E402
+
+import memory  # noqa: E402
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh, migrated database for one test."""
+    monkeypatch.setattr(memory, "DATABASE_PATH", str(tmp_path / "test.db"))
+    memory.init_database()
+    yield memory.DATABASE_PATH
+    memory.shutdown_message_writer()
+    memory.close_connections()
+
+@pytest.fixture
+def fake_ollama():
+    """benchmarks/fake_ollama.py server generating 5 quick tokens per reply."""
+    from benchmarks.fake_ollama import start_fake_ollama
+    server = start_fake_ollama(tokens=5, token_delay=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def ollama_backend(fake_ollama):
+    """Shared OllamaBackend talking to the fake Ollama server."""
+    from llm_backend import OllamaBackend, set_backend
+    backend = OllamaBackend(host=f"http://127.0.0.1:{fake_ollama.server_port}", retries=0)
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+    backend.close()
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Records each request and answers with server.respond(handler) -> (status, headers, body)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            # Keep-alive connections reuse the handler, so record a copy
+            server.requests.append(SimpleNamespace(path=self.path, headers=self.headers))
+        status, headers, body = server.respond(self)
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+            headers = {"Content-Type": "application/json", **headers}
+        elif isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        if body and status != 304:
+            self.wfile.write(body)
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-response; that's what those tests want
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+@pytest.fixture
+def stub_server():
+    """Local HTTP server; set .respond to a function of the request handler."""
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    server.lock = threading.Lock()
+    server.respond = lambda handler: (404, {}, "not found")
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,68 @@
+import pytest
+
+import canvas_tools
+from canvas_tools import CanvasCache, get_canvas_cache_stats, get_courses
+
+COURSES = [{"name": "Biology", "course_code": "BIO101"}, {"name": "History", "course_code": "HIS200"}]
+
+@pytest.fixture
+def canvas(stub_server, monkeypatch):
+    """Canvas tools pointed at the stub server, with an empty cache."""
+    monkeypatch.setattr(canvas_tools, "CANVAS_TOKEN", "test-token")
+    monkeypatch.setattr(canvas_tools, "CANVAS_BASE_URL", stub_server.url)
+    monkeypatch.setattr(canvas_tools, "_cache", CanvasCache())
+    stub_server.etag = '"v1"'
+    stub_server.body = COURSES
+
+    def respond(handler):
+        if handler.headers.get("If-None-Match") == stub_server.etag:
+            return 304, {"ETag": stub_server.etag}, b""
+        return 200, {"ETag": stub_server.etag}, stub_server.body
+
+    stub_server.respond = respond
+    return stub_server
+
+def test_fresh_response_is_served_from_cache(canvas):
+    assert get_courses() == ["BIO101: Biology", "HIS200: History"]
+    assert get_courses() == ["BIO101: Biology", "HIS200: History"]
+    assert len(canvas.requests) == 1
+    assert get_canvas_cache_stats()["hits"] == 1
+
+def test_expired_response_is_revalidated_with_etag(canvas, monkeypatch):
+    monkeypatch.setattr(canvas_tools, "CANVAS_CACHE_TTLS", [("/api/v1/courses", 0)])
+    get_courses()
+    assert get_courses() == ["BIO101: Biology", "HIS200: History"]
+
+    assert len(canvas.requests) == 2
+    assert canvas.requests[0].headers.get("If-None-Match") is None
+    assert canvas.requests[1].headers.get("If-None-Match") == '"v1"'
+    assert get_canvas_cache_stats()["revalidated"] == 1
+
+def test_changed_etag_downloads_new_data(canvas, monkeypatch):
+    monkeypatch.setattr(canvas_tools, "CANVAS_CACHE_TTLS", [("/api/v1/courses", 0)])
+    get_courses()
+    canvas.etag = '"v2"'
+    canvas.body = COURSES[:1]
+    assert get_courses() == ["BIO101: Biology"]
+    assert get_canvas_cache_stats()["revalidated"] == 0
+
+def test_ttl_is_chosen_per_endpoint():
+    assert CanvasCache.ttl_for("/api/v1/courses") == 6 * 60 * 60
+    assert CanvasCache.ttl_for("/api/v1/users/self/todo") == 5 * 60
+    assert CanvasCache.ttl_for("/api/v1/unknown") == canvas_tools.CANVAS_CACHE_DEFAULT_TTL
+
+def test_clearing_an_endpoint_prefix_refetches_only_that_endpoint(canvas):
+    get_courses()
+    canvas_tools.get_announcements()
+    assert canvas_tools.clear_canvas_cache("/api/v1/courses") == 1
+    get_courses()
+    canvas_tools.get_announcements()
+    assert [request.path.split("?")[0] for request in canvas.requests] == [
+        "/api/v1/courses", "/api/v1/announcements", "/api/v1/courses"]
+
+def test_cache_is_bounded_by_response_size():
+    cache = CanvasCache(max_bytes=100)
+    cache.store(("a", ()), "a", None, 60, ttl=60)
+    cache.store(("b", ()), "b", None, 60, ttl=60)
+    assert cache.lookup(("a", ())) == (None, None)
+    assert cache.lookup(("b", ()))[0] == "b"
@@ -0,0 +1,108 @@
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import canvas_tools
+from canvas_tools import CanvasCache, _paginate_canvas_request
+
+PAGES = 6
+PAGE_SIZE = 3
+
+@pytest.fixture
+def canvas(stub_server, monkeypatch):
+    """Stub Canvas serving PAGES pages of courses, with numbered or bookmark page links."""
+    monkeypatch.setattr(canvas_tools, "CANVAS_TOKEN", "test-token")
+    monkeypatch.setattr(canvas_tools, "CANVAS_BASE_URL", stub_server.url)
+    monkeypatch.setattr(canvas_tools, "_cache", CanvasCache())
+    stub_server.bookmarks = False
+    stub_server.failing_page = None
+    stub_server.delay = 0.0
+    stub_server.in_flight = stub_server.max_in_flight = 0
+    lock = threading.Lock()
+
+    def link(page: int) -> str:
+        token = f"bookmark:{page}" if stub_server.bookmarks else str(page)
+        return f"{stub_server.url}/api/v1/courses?page={token}&per_page=100"
+
+    def respond(handler):
+        page = int(parse_qs(urlparse(handler.path).query).get("page", ["1"])[0].replace("bookmark:", ""))
+        with lock:
+            stub_server.in_flight += 1
+            stub_server.max_in_flight = max(stub_server.max_in_flight, stub_server.in_flight)
+        time.sleep(stub_server.delay)
+        with lock:
+            stub_server.in_flight -= 1
+        if page == stub_server.failing_page:
+            return 403, {}, {"errors": [{"message": "forbidden"}]}
+        links = [f'<{link(1)}>; rel="first"']
+        if page < PAGES:
+            links.append(f'<{link(page + 1)}>; rel="next"')
+        if not stub_server.bookmarks:
+            links.append(f'<{link(PAGES)}>; rel="last"')
+        items = [{"id": (page - 1) * PAGE_SIZE + i} for i in range(PAGE_SIZE)]
+        return 200, {"Link": ", ".join(links)}, items
+
+    stub_server.respond = respond
+    return stub_server
+
+def item_ids(endpoint: str = "/api/v1/courses", truncated: str = None):
+    items, error = _paginate_canvas_request(endpoint)
+    assert error is None
+    ids = [item["id"] for item in items]
+    assert items.truncated == truncated
+    return ids
+
+def test_numbered_pages_are_prefetched_concurrently_and_yielded_in_order(canvas):
+    canvas.delay = 0.05
+    assert item_ids() == list(range(PAGES * PAGE_SIZE))
+    assert len(canvas.requests) == PAGES
+    assert "per_page=100" in canvas.requests[0].path
+    assert 1 < canvas.max_in_flight <= canvas_tools.CANVAS_PREFETCH_PAGES
+
+def test_bookmark_pages_are_followed_one_by_one(canvas):
+    canvas.bookmarks = True
+    assert item_ids() == list(range(PAGES * PAGE_SIZE))
+    assert len(canvas.requests) == PAGES
+    assert canvas.max_in_flight == 1
+
+def test_page_cap_limits_pages_followed(canvas, monkeypatch):
+    monkeypatch.setattr(canvas_tools, "CANVAS_MAX_PAGES", 3)
+    capped = "showing the first 9 items; stopped after 3 pages"
+    assert item_ids(truncated=capped) == list(range(3 * PAGE_SIZE))
+    canvas_tools._cache.invalidate()
+    canvas.requests.clear()
+    canvas.bookmarks = True
+    assert item_ids(truncated=capped) == list(range(3 * PAGE_SIZE))
+    assert len(canvas.requests) == 3
+
+def test_page_cap_matching_the_page_count_is_complete(canvas, monkeypatch):
+    monkeypatch.setattr(canvas_tools, "CANVAS_MAX_PAGES", PAGES)
+    assert item_ids() == list(range(PAGES * PAGE_SIZE))
+    canvas_tools._cache.invalidate()
+    canvas.bookmarks = True
+    assert item_ids() == list(range(PAGES * PAGE_SIZE))
+
+@pytest.mark.parametrize("bookmarks", [False, True])
+def test_failing_later_page_ends_iteration_early(canvas, bookmarks):
+    canvas.bookmarks = bookmarks
+    canvas.failing_page = 3
+    items, _ = _paginate_canvas_request("/api/v1/courses")
+    assert [item["id"] for item in items] == list(range(2 * PAGE_SIZE))
+    assert items.truncated.startswith("showing the first 6 items; Canvas returned an error on page 3 (Canvas API error: 403")
+
+def test_tools_report_a_truncated_list(canvas):
+    canvas.failing_page = 2
+    courses = canvas_tools.get_courses()
+    assert len(courses) == PAGE_SIZE + 1
+    assert courses[-1].startswith("⚠️ Incomplete list: showing the first 3 items; Canvas returned an error on page 2")
+
+def test_failing_first_page_is_an_error(canvas):
+    canvas.failing_page = 1
+    items, error = _paginate_canvas_request("/api/v1/courses")
+    assert items is None
+    assert error.startswith("Canvas API error: 403")
+
+def test_tools_see_every_page(canvas):
+    assert len(canvas_tools.get_courses()) == PAGES * PAGE_SIZE
@@ -0,0 +1,48 @@
+import json
+import time
+
+import pytest
+
+import app as web_app
+from memory import get_conversation_messages, get_default_project_id
+
+def sse_events(body: bytes):
+    return [json.loads(line[len("data: "):]) for line in body.decode().split("\n\n") if line.startswith("data: ")]
+
+@pytest.fixture
+def client(database, ollama_backend):
+    return web_app.app.test_client()
+
+def test_stream_relays_ollama_tokens_as_sse(client):
+    response = client.post("/api/chat/stream", json={"message": "hello there"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+
+    events = sse_events(response.data)
+    tokens = [event["content"] for event in events if event["type"] == "token"]
+    assert "".join(tokens) == " token0 token1 token2 token3 token4"
+    assert events[-1]["type"] == "done"
+    assert events[-1]["message_count"] == 2
+
+    history = get_conversation_messages(limit=2, project_id=get_default_project_id())
+    assert history == [{"role": "user", "content": "hello there"},
+                       {"role": "assistant", "content": " token0 token1 token2 token3 token4"}]
+
+def test_first_token_arrives_before_generation_finishes(client, fake_ollama):
+    fake_ollama.token_delay = 0.1
+    start = time.perf_counter()
+    response = client.post("/api/chat/stream", json={"message": "hello there"}, buffered=False)
+    chunks = iter(response.response)
+    first = b""
+    while b"token0" not in first:
+        first += next(chunks)
+    first_token_at = time.perf_counter() - start
+    rest = b"".join(chunks)
+    total = time.perf_counter() - start
+
+    assert b'"type": "done"' in rest
+    assert first_token_at < total / 2
+    response.close()
+
+def test_empty_message_is_rejected(client):
+    assert client.post("/api/chat/stream", json={"message": "  "}).status_code == 400
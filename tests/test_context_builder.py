@@ -0,0 +1,68 @@
+from context_builder import (MIN_TOOL_RESULT_TOKENS, build_context, estimate_tokens, fit_tool_results,
+                             message_tokens)
+
+TOOLS = [{"type": "function", "function": {"name": f"tool_{i}", "description": "x " * 200}} for i in range(4)]
+
+def words(count: int, word: str = "lorem") -> str:
+    return " ".join([word] * count)
+
+def tool_result(name: str, tokens: int) -> dict:
+    return {"role": "tool", "name": name, "content": words(tokens * 4 // 6)}
+
+def prompt(history_turns: int, turn_tokens: int = 200):
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": words(turn_tokens * 4 // 6, f"turn{i}")}
+               for i in range(history_turns)]
+    messages, _ = build_context("You are helpful.", "what's due?", history=history, budget=100_000)
+    messages.append({"role": "assistant", "content": "", "tool_calls": []})
+    return messages
+
+def test_build_context_keeps_newest_history_within_budget():
+    history = [{"role": "user", "content": words(300, f"turn{i}")} for i in range(10)]
+    messages, report = build_context("system", "question", summary="summary", history=history, budget=600)
+    assert messages[0] == {"role": "system", "content": "system"}
+    assert messages[-1] == {"role": "user", "content": "question"}
+    assert report["tokens"] <= 600
+    assert "history[9]" not in report["dropped"]
+    assert "history[0]" in report["dropped"]
+
+def test_tool_schema_counts_against_the_budget():
+    messages = prompt(0)
+    results = [tool_result("search_web", 3000)]
+    budget = sum(message_tokens(m) for m in messages) + 2500
+    without_tools, _ = fit_tool_results(list(messages), results, budget=budget)
+    with_tools, report = fit_tool_results(list(messages), results, tools=TOOLS, budget=budget)
+    assert message_tokens(with_tools[0]) < message_tokens(without_tools[0])
+    assert report["tokens"] <= budget
+
+def test_old_history_is_dropped_to_make_room_for_tool_results():
+    messages = prompt(6)
+    before = list(messages)
+    budget = sum(message_tokens(m) for m in messages)  # No room left at all
+    fitted, report = fit_tool_results(messages, [tool_result("get_assignments", 1000)], budget=budget)
+
+    assert report["dropped"] == ["history[0]", "history[1]"]
+    assert messages == [before[0]] + before[3:]
+    assert message_tokens(fitted[0]) >= MIN_TOOL_RESULT_TOKENS - 8
+    assert report["tokens"] <= budget
+
+def test_results_keep_a_minimum_share_when_nothing_can_be_dropped():
+    messages = prompt(0)
+    budget = sum(message_tokens(m) for m in messages)
+    results = [tool_result("get_assignments", 1000), tool_result("search_web", 1000), tool_result("tiny", 10)]
+    fitted, report = fit_tool_results(messages, results, tools=TOOLS, budget=budget)
+    assert fitted[2] == results[2]
+    for result in fitted[:2]:
+        assert estimate_tokens(result["content"]) >= MIN_TOOL_RESULT_TOKENS - 16
+        assert result["content"].endswith("…")
+    assert report["truncated"] == ["get_assignments", "search_web"]
+
+def test_history_over_budget_is_dropped_in_blocks():
+    history = [{"role": "user", "content": words(60, f"turn{i}")} for i in range(40)]
+    firsts = set()
+    for length in range(25, 35):
+        messages, report = build_context("system", "question", history=history[:length], budget=1500)
+        assert report["tokens"] <= 1500
+        firsts.add(messages[1]["content"])
+        assert all(not m["content"].endswith("…") for m in messages)
+    # Ten more turns moved the start of the history at most once
+    assert len(firsts) <= 2
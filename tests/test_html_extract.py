@@ -0,0 +1,41 @@
+from html_extract import PAGE_TEXT_LIMIT, PageTextExtractor, detect_encoding, extract_text
+
+def paragraphs(word: str, count: int) -> str:
+    return "".join(f"<p>{word} paragraph {i} with enough words to count as real content.</p>" for i in range(count))
+
+def test_main_region_is_preferred_over_navigation_and_scripts():
+    page = (f"<html><body><nav>Home About</nav><script>var x = 1;</script>"
+            f"<div class='sidebar'>Related links</div><main>{paragraphs('lecture', 3)}</main>"
+            f"<footer>Copyright</footer></body></html>").encode()
+    text = extract_text(page)
+    assert text.startswith("lecture paragraph 0")
+    assert "Home" not in text and "var x" not in text and "Related" not in text and "Copyright" not in text
+
+def test_region_opened_after_enough_text_does_not_blank_the_result():
+    # A long post list fills the div region (done), then <main> starts in the same chunk
+    page = (f"<html><body><div class='post-list'>{paragraphs('listing', 80)}</div>"
+            f"<main>{paragraphs('article', 5)}</main></body></html>").encode()
+    extractor = PageTextExtractor()
+    extractor.feed_bytes(page)
+    assert extractor.done
+    text = extractor.get_text()
+    assert text.startswith("listing paragraph 0")
+    assert len(text) == PAGE_TEXT_LIMIT
+
+def test_empty_preferred_region_falls_back_to_text_elsewhere():
+    page = f"<html><body><main><div id='app'></div></main><section>{paragraphs('body', 2)}</section></body></html>"
+    assert extract_text(page.encode()).startswith("body paragraph 0")
+
+def test_words_are_not_split_across_chunks():
+    page = f"<html><body><article>{paragraphs('chunked', 20)}</article></body></html>".encode()
+    whole = extract_text(page)
+    extractor = PageTextExtractor()
+    for start in range(0, len(page), 7):
+        extractor.feed_bytes(page[start:start + 7])
+    assert extractor.get_text() == whole
+
+def test_meta_charset_is_used_to_decode():
+    page = ("<html><head><meta charset='iso-8859-1'></head><body><article>Café crème brûlée "
+            + "x" * 1100 + "</article></body></html>").encode("iso-8859-1")
+    assert detect_encoding(page) == "iso8859-1"
+    assert extract_text(page).startswith("Café crème brûlée")
@@ -0,0 +1,71 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+import jobs
+from jobs import get_job, shutdown_jobs, submit_job
+from memory import get_connection
+
+@pytest.fixture
+def job_queue(database):
+    yield
+    shutdown_jobs(wait=True)
+
+def wait_for(job_id: int) -> dict:
+    for _ in range(200):
+        job = get_job(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_duplicate_submissions_share_one_job(job_queue):
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "summary"
+
+    first = submit_job("test", work, dedupe_key="summary:1")
+    assert submit_job("test", work, dedupe_key="summary:1") == first
+    release.set()
+    assert wait_for(first)["result"] == "summary"
+    assert calls == [1]
+
+def test_failed_job_records_the_error(job_queue):
+    def work():
+        raise RuntimeError("model unavailable")
+
+    job = wait_for(submit_job("test", work))
+    assert job["status"] == "failed"
+    assert job["error"] == "model unavailable"
+
+def test_job_finishing_between_insert_and_select_queues_a_new_one(job_queue, monkeypatch):
+    # A job queued by another process sharing the database
+    with get_connection() as conn:
+        other = conn.execute("INSERT INTO jobs (kind, dedupe_key) VALUES ('test', 'summary:2')").lastrowid
+
+    class OtherProcessFinishes:
+        """Connection on which the other process's job completes right after the dedupe insert."""
+
+        def __init__(self, conn):
+            self.conn = conn
+
+        def execute(self, sql, params=()):
+            if sql.startswith("SELECT id FROM jobs"):
+                self.conn.execute("UPDATE jobs SET status = 'done' WHERE id = ?", (other,))
+            return self.conn.execute(sql, params)
+
+    @contextmanager
+    def connection():
+        with get_connection() as conn:
+            yield OtherProcessFinishes(conn)
+
+    monkeypatch.setattr(jobs, "get_connection", connection)
+    job_id = submit_job("test", lambda: "fresh", dedupe_key="summary:2")
+
+    assert job_id != other
+    assert wait_for(job_id)["result"] == "fresh"
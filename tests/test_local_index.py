@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from local_index import LocalIndex
+from search_providers import FallbackProvider, LocalIndexProvider, SearchProvider, create_search_provider
+
+BIOLOGY = ("# Biology notes\n\nThe krebs cycle oxidizes acetyl-CoA in the mitochondria and produces NADH. "
+           "Photosynthesis in chloroplasts turns light into glucose. The exam covers cell respiration.\n")
+HISTORY = "<html><head><title>French Revolution</title></head><body><article><p>" + \
+          "The storming of the Bastille in 1789 started the French Revolution. " * 5 + "</p></article></body></html>"
+
+class CountingProvider(SearchProvider):
+    """Stand-in web provider that records the queries it is asked."""
+
+    name = "web"
+
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, location):
+        self.queries.append(query)
+        return {"organic_results": [{"title": f"Web: {query}", "link": "https://example.com", "snippet": ""}]}, None
+
+@pytest.fixture
+def corpus(database, tmp_path):
+    folder = tmp_path / "corpus"
+    folder.mkdir()
+    (folder / "biology.md").write_text(BIOLOGY)
+    (folder / "history.html").write_text(HISTORY)
+    return folder
+
+def test_refresh_indexes_only_what_changed(corpus):
+    index = LocalIndex(str(corpus))
+    assert index.refresh() == {"added": 2, "updated": 0, "unchanged": 0, "removed": 0, "skipped": 0}
+    assert index.refresh()["unchanged"] == 2
+
+    biology = corpus / "biology.md"
+    stat = biology.stat()
+    os.utime(biology, (stat.st_atime, stat.st_mtime + 10))  # Touched, same text
+    (corpus / "history.html").write_text(HISTORY.replace("1789", "July 1789"))
+    (corpus / "chemistry.txt").write_text("Covalent bonds share electron pairs between atoms.")
+    assert index.refresh() == {"added": 1, "updated": 1, "unchanged": 1, "removed": 0, "skipped": 0}
+    assert "July 1789" in index.search("bastille")[0]["text"]
+
+    biology.unlink()
+    assert index.refresh()["removed"] == 1
+    assert index.search("krebs cycle") == []
+    assert index.document_count() == 2
+
+def test_search_ranks_matching_documents(corpus):
+    index = LocalIndex(str(corpus))
+    index.refresh()
+    results = index.search("What is the krebs cycle?")
+    assert [result["title"] for result in results] == ["Biology notes"]
+    assert "acetyl-CoA" in results[0]["snippet"]
+    # One shared word is enough on its own, but not when every word must match
+    assert [result["title"] for result in index.search("exam schedule for Harvard")] == ["Biology notes"]
+    assert index.search("exam schedule for Harvard", match_all=True) == []
+
+@pytest.mark.parametrize("query", ["weather in paris tomorrow", "latest news about the exam schedule for Harvard"])
+def test_auto_provider_asks_the_web_when_the_corpus_is_not_about_the_query(corpus, query):
+    web = CountingProvider()
+    provider = create_search_provider(web, name="auto", corpus_dir=str(corpus))
+    assert isinstance(provider, FallbackProvider)
+    results, _ = provider.search(query, "United States")
+    assert web.queries == [query]
+    assert results["organic_results"][0]["title"] == f"Web: {query}"
+
+def test_auto_provider_answers_corpus_questions_locally(corpus):
+    web = CountingProvider()
+    provider = create_search_provider(web, name="auto", corpus_dir=str(corpus))
+    results, _ = provider.search("krebs cycle mitochondria", "United States")
+    assert web.queries == []
+    assert results["organic_results"][0]["title"] == "Biology notes"
+    assert results["organic_results"][0]["link"].startswith("file://")
+
+def test_local_provider_alone_still_ranks_partial_matches(corpus):
+    provider = LocalIndexProvider(LocalIndex(str(corpus)))
+    results, _ = provider.search("exam schedule for Harvard", "United States")
+    assert [result["title"] for result in results["organic_results"]] == ["Biology notes"]
@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+import time
+
+import memory
+from memory import create_project, flush_messages, get_connection, get_recent_history, log_message
+
+def stored(project_id):
+    with get_connection() as conn:
+        return [row[0] for row in conn.execute(
+            "SELECT content FROM messages WHERE project_id = ? ORDER BY id", (project_id,))]
+
+def test_concurrent_submits_are_read_once_and_flushed(database):
+    project_id = create_project("Chemistry", "", "")
+    writers, per_writer = 8, 40
+    duplicates = []
+    done = threading.Event()
+
+    def write(worker):
+        for i in range(per_writer):
+            log_message("user", f"{worker}-{i}", project_id)
+
+    def read():
+        while not done.is_set():
+            history = [content for _, content in get_recent_history(limit=1000, project_id=project_id)]
+            if len(history) != len(set(history)):
+                duplicates.append(history)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert flush_messages(timeout=10)
+    done.set()
+    reader.join()
+
+    assert duplicates == []
+    rows = stored(project_id)
+    assert len(rows) == writers * per_writer
+    for worker in range(writers):
+        assert [row for row in rows if row.startswith(f"{worker}-")] == [f"{worker}-{i}" for i in range(per_writer)]
+    assert memory._get_writer().pending() == []
+
+def test_slow_enqueue_keeps_submit_order(database, monkeypatch):
+    project_id = create_project("History", "", "")
+    log_message("user", "warm up", project_id)
+    assert flush_messages(timeout=5)
+    writer = memory._get_writer()
+    real_put = writer._queue.put
+
+    def slow_put(item, *args, **kwargs):
+        if item is not None and item[2] == "A":
+            time.sleep(0.2)
+        real_put(item, *args, **kwargs)
+
+    monkeypatch.setattr(writer._queue, "put", slow_put)
+    first = threading.Thread(target=log_message, args=("user", "A", project_id))
+    first.start()
+    time.sleep(0.05)
+    log_message("assistant", "B", project_id)
+    first.join()
+
+    assert flush_messages(timeout=5)
+    assert stored(project_id) == ["warm up", "A", "B"]
+    assert writer.pending() == []
+    assert [content for _, content in get_recent_history(project_id=project_id)] == ["warm up", "A", "B"]
+
+def test_failed_batch_is_reported_by_flush(database, monkeypatch):
+    project_id = create_project("Physics", "", "")
+    writer = memory._get_writer()
+    real_get_pool = memory.get_pool
+
+    def broken_pool(path):
+        raise sqlite3.DatabaseError("database disk image is malformed")
+
+    monkeypatch.setattr(memory, "get_pool", broken_pool)
+    log_message("user", "lost", project_id)
+    assert flush_messages(timeout=5) is False
+    assert writer.failed == 1
+    assert writer.last_error == "database disk image is malformed"
+    assert writer.pending() == []
+
+    monkeypatch.setattr(memory, "get_pool", real_get_pool)
+    log_message("user", "kept", project_id)
+    assert flush_messages(timeout=5) is True
+    assert stored(project_id) == ["kept"]
@@ -0,0 +1,31 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import memory
+from memory import MIGRATIONS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER = "import memory; memory.init_database(); memory.shutdown_message_writer(); print(memory.migrate())"
+
+def test_workers_starting_together_apply_each_migration_once(tmp_path):
+    path = str(tmp_path / "shared.db")
+    env = dict(os.environ, DATABASE_PATH=path, PYTHONPATH=ROOT)
+    workers = [subprocess.Popen([sys.executable, "-c", WORKER], env=env, cwd=ROOT,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) for _ in range(6)]
+    outcomes = [worker.communicate(timeout=60) for worker in workers]
+
+    assert [worker.returncode for worker in workers] == [0] * len(workers), [err for _, err in outcomes]
+    assert {out.strip().splitlines()[-1] for out, _ in outcomes} == {str(MIGRATIONS[-1][0])}
+    with sqlite3.connect(path) as conn:
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+        projects = conn.execute("SELECT name FROM projects").fetchall()
+    assert versions == [version for version, _, _ in MIGRATIONS]
+    assert projects == [("General Chat",)]
+
+def test_migrate_is_a_no_op_on_a_current_database(database):
+    assert memory.migrate() == MIGRATIONS[-1][0]
+    memory.init_database()
+    with memory.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 1
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm_backend
+from benchmarks.fake_ollama import start_fake_ollama
+from llm_backend import OllamaPool
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+@pytest.fixture
+def servers():
+    """Three fake Ollama hosts; the third only has a small model."""
+    started = [start_fake_ollama(tokens=3, token_delay=0.0),
+               start_fake_ollama(tokens=3, token_delay=0.0),
+               start_fake_ollama(models=("qwen3:0.6b",), tokens=3, token_delay=0.0)]
+    yield started
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def pool(servers):
+    pool = OllamaPool([f"http://127.0.0.1:{server.server_port}" for server in servers],
+                      max_concurrency=2, health_interval=0)
+    pool.check_health()
+    yield pool
+    pool.close()
+
+def host(pool, server):
+    return next(state for state in pool.stats()["hosts"] if state["host"].endswith(f":{server.server_port}"))
+
+def test_requests_spread_over_hosts_that_have_the_model(pool, servers):
+    for server in servers:
+        server.token_delay = 0.05
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        replies = list(executor.map(lambda _: pool.chat(MESSAGES, model="qwen3:4b"), range(8)))
+
+    assert all(reply.message.content == " token0 token1 token2" for reply in replies)
+    assert servers[0].requests + servers[1].requests == 8
+    assert servers[0].requests >= 2 and servers[1].requests >= 2
+    assert servers[2].requests == 0
+
+def test_model_only_on_one_host_goes_there(pool, servers):
+    pool.chat(MESSAGES, model="qwen3:0.6b")
+    assert [server.requests for server in servers] == [0, 0, 1]
+
+def test_failing_host_fails_over_and_opens_its_circuit(pool, servers, monkeypatch):
+    monkeypatch.setattr(llm_backend, "OLLAMA_CIRCUIT_COOLDOWN", 0.3)
+    servers[0].failing = True
+    for _ in range(6):
+        assert pool.chat(MESSAGES, model="qwen3:4b").message.content
+    assert servers[1].requests == 6
+    assert host(pool, servers[0])["circuit_open"]
+    assert host(pool, servers[0])["consecutive_failures"] == llm_backend.OLLAMA_CIRCUIT_FAILURES
+
+    # After the cooldown the host gets traffic again and its first success closes the circuit
+    servers[0].failing = False
+    time.sleep(0.35)
+    for _ in range(4):
+        pool.chat(MESSAGES, model="qwen3:4b")
+    assert servers[0].requests >= 1
+    assert not host(pool, servers[0])["circuit_open"]
+    assert host(pool, servers[0])["consecutive_failures"] == 0
+
+def test_stream_fails_over_before_the_first_chunk(pool, servers):
+    servers[0].failing = True
+    servers[1].failing = True
+    servers[2].models.append("qwen3:4b")
+    pool.check_health()
+    chunks = list(pool.chat(MESSAGES, model="qwen3:4b", stream=True))
+    assert "".join(chunk.message.content for chunk in chunks) == " token0 token1 token2"
+    assert servers[2].requests == 1
+
+def test_no_healthy_host_fails_fast(pool, servers):
+    for server in servers[:2]:
+        server.shutdown()
+        server.server_close()
+    pool.check_health()
+    start = time.monotonic()
+    with pytest.raises(ConnectionError):
+        pool.chat(MESSAGES, model="qwen3:4b")
+    assert time.monotonic() - start < 1
@@ -0,0 +1,80 @@
+import pytest
+
+import chat_tools
+from page_cache import PageCache, normalize_url
+
+ARTICLE = "<p>" + "The krebs cycle releases stored energy through the oxidation of acetyl-CoA. " * 8 + "</p>"
+PAGE = f"<html><head><title>Krebs</title></head><body><nav>Home | About</nav><article>{ARTICLE}</article></body></html>"
+EMPTY_PAGE = "<html><body><div id='app'></div><script>render()</script></body></html>"
+LAST_MODIFIED = "Wed, 01 Oct 2025 10:00:00 GMT"
+
+@pytest.fixture
+def site(database, stub_server, monkeypatch):
+    """Stub site honouring If-None-Match and If-Modified-Since; pages expire immediately."""
+    monkeypatch.setattr(chat_tools, "_page_cache", PageCache(ttl=0))
+    stub_server.etag = '"page-v1"'
+    stub_server.page = PAGE
+
+    def respond(handler):
+        path = handler.path.split("?")[0]
+        validators = {"ETag": stub_server.etag} if path != "/dated" else {"Last-Modified": LAST_MODIFIED}
+        if (handler.headers.get("If-None-Match") == stub_server.etag
+                or handler.headers.get("If-Modified-Since") == LAST_MODIFIED):
+            return 304, validators, b""
+        body = EMPTY_PAGE if path == "/app" else stub_server.page
+        return 200, {"Content-Type": "text/html; charset=utf-8", **validators}, body
+
+    stub_server.respond = respond
+    return stub_server
+
+def fetch(site, path: str) -> str:
+    return chat_tools.fetch_webpage_content(f"{site.url}{path}")
+
+def test_stale_page_is_revalidated_with_etag(site):
+    text = fetch(site, "/krebs")
+    assert "oxidation of acetyl-CoA" in text
+    assert fetch(site, "/krebs") == text
+
+    assert site.requests[0].headers.get("If-None-Match") is None
+    assert site.requests[1].headers.get("If-None-Match") == '"page-v1"'
+    assert chat_tools.get_web_cache_stats()["revalidated"] == 1
+
+def test_stale_page_is_revalidated_with_last_modified(site):
+    text = fetch(site, "/dated")
+    assert fetch(site, "/dated") == text
+    assert site.requests[1].headers.get("If-Modified-Since") == LAST_MODIFIED
+    assert chat_tools.get_web_cache_stats()["revalidated"] == 1
+
+def test_changed_page_replaces_the_cached_text(site):
+    fetch(site, "/krebs")
+    site.etag = '"page-v2"'
+    site.page = PAGE.replace("acetyl-CoA", "pyruvate")
+    assert "oxidation of pyruvate" in fetch(site, "/krebs")
+    assert chat_tools.get_web_cache_stats()["revalidated"] == 0
+
+def test_fresh_page_is_served_without_a_request(site, monkeypatch):
+    monkeypatch.setattr(chat_tools, "_page_cache", PageCache(ttl=3600))
+    fetch(site, "/krebs?utm_source=newsletter")
+    fetch(site, "/krebs")
+    assert len(site.requests) == 1
+    assert chat_tools.get_web_cache_stats()["hits"] == 1
+
+def test_empty_extraction_is_not_cached(site, monkeypatch):
+    monkeypatch.setattr(chat_tools, "_page_cache", PageCache(ttl=3600))
+    assert fetch(site, "/app").strip() == ""
+    fetch(site, "/app")
+    assert len(site.requests) == 2
+    assert site.requests[1].headers.get("If-None-Match") is None
+    stats = chat_tools.get_web_cache_stats()
+    assert stats["pages"] == 0 and stats["skipped"] == 2
+
+def test_identical_text_from_two_urls_is_stored_once(site):
+    fetch(site, "/krebs")
+    fetch(site, "/mirror/krebs")
+    stats = chat_tools.get_web_cache_stats()
+    assert stats["pages"] == 2
+    assert stats["unique_texts"] == 1
+
+def test_normalize_url_drops_tracking_parameters_and_default_ports():
+    assert (normalize_url("HTTPS://Example.edu:443/page?b=2&utm_source=x&a=1#section")
+            == "https://example.edu/page?a=1&b=2")
@@ -0,0 +1,53 @@
+import pytest
+
+import memory
+from llm_backend import FakeBackend, set_backend
+
+def _summarizer(messages, tools):
+    covered = [m["content"] for m in messages if m["role"] == "user"]
+    return f"covers {covered[0]}..{covered[-1]}"
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend(_summarizer)
+    set_backend(backend)
+    yield backend
+    set_backend(None)
+
+def _log(project_id, start, count):
+    for n in range(start, start + count):
+        memory.log_message("user", f"m{n}", project_id)
+    memory.flush_messages()
+
+def test_backlog_is_folded_in_oldest_first_chunks(database, backend):
+    project_id = memory.create_project("Backlog")
+    _log(project_id, 0, 10)
+    assert memory.generate_project_summary(project_id, limit=50) == "covers m0..m9"
+
+    _log(project_id, 10, 120)
+    summary = memory.generate_project_summary(project_id, limit=50)
+
+    chunks = [[m["content"] for m in call["messages"] if m["role"] == "user"] for call in backend.calls[1:]]
+    assert chunks == [[f"m{n}" for n in range(start, min(start + 50, 130))] for start in (10, 60, 110)]
+    assert "covers m60..m109" in backend.calls[-1]["messages"][0]["content"]
+    assert summary == "covers m110..m129"
+    assert memory.count_messages_since_summary(project_id) == 0
+
+def test_failed_chunk_keeps_the_progress_made(database, backend):
+    project_id = memory.create_project("Flaky")
+    _log(project_id, 0, 5)
+    memory.generate_project_summary(project_id, limit=50)
+    _log(project_id, 5, 100)
+
+    def fail_second_chunk(messages, tools):
+        if len(backend.calls) == 3:
+            raise RuntimeError("model offline")
+        return _summarizer(messages, tools)
+    backend.responder = fail_second_chunk
+
+    assert memory.generate_project_summary(project_id, limit=50) is None
+    assert memory.get_project_summary(project_id) == "covers m5..m54"
+    assert memory.count_messages_since_summary(project_id) == 50
+
+    backend.responder = _summarizer
+    assert memory.generate_project_summary(project_id, limit=50) == "covers m55..m104"
@@ -0,0 +1,55 @@
+import pytest
+
+import chat_tools
+from context_builder import HISTORY_DROP_BLOCK
+from memory import create_project, flush_messages, get_connection, get_history_window, update_project_summary
+
+TURNS = 30
+
+def turns(prompt: list) -> list:
+    return [(message["role"], message["content"]) for message in prompt]
+
+@pytest.fixture
+def project(database, ollama_backend, monkeypatch):
+    # Summaries are refreshed explicitly in these tests
+    monkeypatch.setattr(chat_tools, "should_update_summary", lambda project_id: False)
+    return create_project("Long chat", "", "")
+
+def test_consecutive_prompts_share_the_history_prefix(project, fake_ollama):
+    for turn in range(TURNS):
+        chat_tools.run_chat_message(f"question number {turn}", project)
+    prompts = [turns(prompt) for prompt in fake_ollama.prompts]
+    assert len(prompts) == TURNS
+
+    moved = []
+    for turn in range(1, TURNS):
+        previous, current = prompts[turn - 1], prompts[turn]
+        # Everything before the per-turn note and the question, then last turn's exchange
+        stable = previous[:-2] + [previous[-1], current[-3]]
+        assert current[-3][0] == "assistant"
+        if current[:len(stable)] != stable:
+            moved.append(turn)
+        assert current[0] == previous[0]  # The system prompt never changes
+
+    # Two messages per turn: the window first moves once it holds CONTEXT_HISTORY_LIMIT
+    # messages, then once per block rather than on every turn
+    first = chat_tools.CONTEXT_HISTORY_LIMIT // 2
+    assert moved == list(range(first, TURNS, HISTORY_DROP_BLOCK // 2))
+
+def test_window_starts_after_the_summarized_messages(project):
+    for turn in range(6):
+        chat_tools.log_message("user", f"message {turn}", project)
+    flush_messages()
+    with get_connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM messages WHERE project_id = ? ORDER BY id", (project,))]
+    update_project_summary(project, "• earlier messages", last_message_id=ids[3])
+    assert get_history_window(project) == [{"role": "user", "content": "message 4"},
+                                           {"role": "user", "content": "message 5"}]
+
+def test_window_drops_whole_blocks_once_over_the_limit(project):
+    for turn in range(25):
+        chat_tools.log_message("user", f"message {turn}", project)
+    window = get_history_window(project, limit=20, block=10)
+    assert [message["content"] for message in window] == [f"message {turn}" for turn in range(10, 25)]
+    chat_tools.log_message("user", "message 25", project)
+    assert get_history_window(project, limit=20, block=10)[0]["content"] == "message 10"
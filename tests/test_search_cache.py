@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import search_providers
+from search_cache import SearchCache, normalize_query, search_key
+from search_providers import SerpAPIProvider
+from utils import create_async_http_client
+
+def test_filler_words_case_and_punctuation_share_a_key():
+    assert normalize_query("What is the Krebs cycle?") == normalize_query("krebs  cycle") == "krebs cycle"
+    assert search_key("Krebs cycle", "United States") == search_key("krebs cycle!", "united  states")
+
+def test_direction_words_keep_queries_apart():
+    there = search_key("flights from paris to london", "")
+    back = search_key("flights to paris from london", "")
+    assert there != back
+    assert normalize_query("flights from paris to london") == "flights from paris to london"
+    assert normalize_query("weather in paris") != normalize_query("weather paris")
+
+def test_query_of_only_stop_words_is_kept():
+    assert normalize_query("Who are you?") == "who are you"
+
+class StandInGoogleSearch:
+    """Local stand-in for serpapi.GoogleSearch: fixed latency, counts billed requests."""
+
+    latency = 0.3
+    fail = False
+
+    def __init__(self, params: dict):
+        self.params = params
+
+    def get_dict(self) -> dict:
+        with StandInGoogleSearch.lock:
+            StandInGoogleSearch.queries.append(self.params["q"])
+        time.sleep(StandInGoogleSearch.latency)
+        if StandInGoogleSearch.fail:
+            raise ConnectionError("SerpAPI unreachable")
+        return serpapi_response(self.params["q"])
+
+def serpapi_response(query: str) -> dict:
+    return {
+        "search_metadata": {"status": "Success"},
+        "organic_results": [{"position": i, "title": f"{query} - result {i}", "link": f"https://example.edu/{i}",
+                             "snippet": f"All about {query}.", "displayed_link": "example.edu"}
+                            for i in range(1, 4)],
+    }
+
+@pytest.fixture
+def serpapi(database, monkeypatch):
+    monkeypatch.setenv("SERPAPI_KEY", "local-stand-in")
+    monkeypatch.setattr(search_providers, "GoogleSearch", StandInGoogleSearch)
+    monkeypatch.setattr(StandInGoogleSearch, "queries", [], raising=False)
+    monkeypatch.setattr(StandInGoogleSearch, "lock", threading.Lock(), raising=False)
+    return StandInGoogleSearch
+
+def test_identical_concurrent_searches_share_one_paid_request(serpapi):
+    provider = SerpAPIProvider(SearchCache(monthly_quota=0))
+    phrasings = ["krebs cycle", "What is the krebs cycle?", "Krebs cycle!", "the krebs cycle"] * 2
+    start = threading.Barrier(len(phrasings))
+
+    def search(query):
+        start.wait()
+        return provider.search(query, "United States")
+
+    with ThreadPoolExecutor(max_workers=len(phrasings)) as executor:
+        results = list(executor.map(search, phrasings))
+
+    assert len(serpapi.queries) == 1
+    assert all(result == results[0] for result in results)
+    assert results[0][1] is None
+    assert [r["title"] for r in results[0][0]["organic_results"]][0].endswith("result 1")
+    assert "displayed_link" not in results[0][0]["organic_results"][0]
+    stats = provider.cache.stats()
+    assert stats["requests"] == 1
+    assert stats["coalesced"] + stats["hits"] == len(phrasings) - 1
+
+def test_monthly_quota_refuses_paid_requests(serpapi):
+    provider = SerpAPIProvider(SearchCache(monthly_quota=2))
+    for topic in ("krebs cycle", "photosynthesis", "mitosis"):
+        results, notice = provider.search(topic, "United States")
+    assert results == {"error": "Monthly web search quota (2) used up"}
+    assert notice is None
+    assert serpapi.queries == ["krebs cycle", "photosynthesis"]
+    assert provider.cache.usage() == 2
+    assert provider.cache.stats()["quota_remaining"] == 0
+
+def test_expired_result_is_served_when_the_quota_is_used_up(serpapi):
+    cache = SearchCache(ttl=0, monthly_quota=1)
+    provider = SerpAPIProvider(cache)
+    fresh, _ = provider.search("krebs cycle", "United States")
+    stale, notice = provider.search("What is the krebs cycle?", "United States")
+    assert stale == fresh
+    assert notice.startswith("⚠️ Monthly web search quota (1) used up; showing results cached on")
+    assert len(serpapi.queries) == 1
+    assert cache.stats()["stale_served"] == 1
+
+def test_expired_result_is_served_when_the_search_api_fails(serpapi, monkeypatch):
+    provider = SerpAPIProvider(SearchCache(ttl=0, monthly_quota=0))
+    fresh, _ = provider.search("krebs cycle", "United States")
+    monkeypatch.setattr(serpapi, "fail", True)
+    stale, notice = provider.search("krebs cycle", "United States")
+    assert stale == fresh
+    assert "Web search failed (SerpAPI unreachable)" in notice
+    with pytest.raises(ConnectionError):
+        provider.search("photosynthesis", "United States")
+
+def test_async_searches_share_one_request_to_serpapi(database, stub_server, monkeypatch):
+    monkeypatch.setenv("SERPAPI_KEY", "local-stand-in")
+    monkeypatch.setattr(search_providers, "SERPAPI_URL", f"{stub_server.url}/search")
+
+    def respond(handler):
+        time.sleep(0.3)
+        return 200, {}, serpapi_response(parse_qs(urlparse(handler.path).query)["q"][0])
+
+    stub_server.respond = respond
+
+    async def main():
+        client = create_async_http_client()
+        provider = SerpAPIProvider(SearchCache(monthly_quota=0), async_client=lambda: client)
+        try:
+            return await asyncio.gather(*(provider.asearch(query, "United States")
+                                          for query in ["dna replication", "What is DNA replication?"] * 3))
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(main())
+    assert len(stub_server.requests) == 1
+    assert "api_key=local-stand-in" in stub_server.requests[0].path
+    assert all(result == results[0] for result in results)
+    assert results[0][0]["organic_results"][0]["title"] == "dna replication - result 1"
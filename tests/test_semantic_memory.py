@@ -0,0 +1,73 @@
+import pytest
+
+import semantic_memory
+from memory import clear_history, create_project, flush_messages, log_message, search_memory
+from semantic_memory import (HashingEmbedder, _matrix_cache, hybrid_search, index_pending_messages,
+                             semantic_search, set_embedder)
+
+MESSAGES = [
+    "The krebs cycle produces ATP and NADH inside the mitochondria",
+    "My history essay on the french revolution is due friday",
+    "Binary search trees keep keys sorted for fast lookup",
+    "Photosynthesis turns light energy into glucose in chloroplasts",
+]
+
+class FailingEmbedder:
+    """Embedder whose model can't be loaded, like the ONNX model without a network."""
+
+    name = "failing"
+
+    def embed(self, texts):
+        raise OSError("could not download model")
+
+@pytest.fixture
+def project(database):
+    set_embedder(HashingEmbedder())
+    project_id = create_project("Biology", "", "")
+    for content in MESSAGES:
+        log_message("user", content, project_id)
+    flush_messages()
+    while index_pending_messages():
+        pass
+    yield project_id
+    set_embedder(None)
+
+def test_semantic_search_ranks_word_overlap_first(project):
+    hits = semantic_search("mitochondria ATP krebs", limit=2, project_id=project)
+    assert len(hits) == 2
+    assert hits[0][1] > hits[1][1]
+    assert hybrid_search("mitochondria ATP krebs", limit=1, project_id=project)[0][1] == MESSAGES[0]
+
+def test_hybrid_search_combines_keyword_and_vector_ranking(project):
+    results = hybrid_search("french revolution essay", limit=3, project_id=project)
+    assert results[0][1] == MESSAGES[1]
+    assert len(results) <= 3
+
+def test_hybrid_search_falls_back_to_keywords_when_embedding_fails(project):
+    set_embedder(FailingEmbedder())
+    results = hybrid_search("binary search", limit=5, project_id=project)
+    assert results == search_memory("binary search", limit=5, project_id=project)
+    assert results[0][1] == MESSAGES[2]
+
+def test_hybrid_search_without_embedder_uses_keywords(project, monkeypatch):
+    monkeypatch.setattr(semantic_memory, "get_embedder", lambda: None)
+    assert hybrid_search("photosynthesis", project_id=project)[0][1] == MESSAGES[3]
+
+def test_clearing_history_drops_cached_vectors(project):
+    assert semantic_search("krebs", project_id=project)
+    assert (HashingEmbedder().name, project) in _matrix_cache
+    clear_history(project)
+    assert (HashingEmbedder().name, project) not in _matrix_cache
+    assert semantic_search("krebs", project_id=project) == []
+
+def test_matrix_read_during_invalidation_is_not_cached(project, monkeypatch):
+    real_connection = semantic_memory.get_connection
+
+    def invalidating_connection():
+        # The indexer stores new vectors while the matrix is being read
+        semantic_memory.invalidate_matrix_cache(project)
+        return real_connection()
+
+    monkeypatch.setattr(semantic_memory, "get_connection", invalidating_connection)
+    assert semantic_search("krebs", project_id=project)
+    assert (HashingEmbedder().name, project) not in _matrix_cache
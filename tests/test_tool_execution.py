@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from ollama import Message
+
+import canvas_tools
+import chat_tools
+from canvas_tools import CanvasCache
+
+def tool_call(name: str, **arguments) -> Message.ToolCall:
+    return Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments=arguments))
+
+@pytest.fixture
+def tools(monkeypatch):
+    """Stand-in tools that sleep for their 'seconds' argument; 'hung' ignores its timeout."""
+    monkeypatch.setattr(chat_tools, "TOOL_TIMEOUTS", {"hung": 0.3, "quick": 0.3})
+    monkeypatch.setattr(chat_tools, "TOOL_TIMEOUT_MARGIN", 0.05)
+    calls = []
+
+    def run_tool(tool_name, tool_args, project_id=None, timeout=None):
+        calls.append((tool_name, timeout))
+        time.sleep(tool_args.get("seconds", 0))
+        if tool_name == "broken":
+            raise ValueError("bad arguments")
+        return f"{tool_name}:{tool_args.get('seconds', 0)}"
+
+    monkeypatch.setattr(chat_tools, "run_tool", run_tool)
+    return calls
+
+def contents(results):
+    return [result["content"] for result in results]
+
+def test_results_keep_call_order_and_tools_run_in_parallel(tools):
+    start = time.perf_counter()
+    results, timings = chat_tools.execute_tool_calls(
+        [tool_call("slow", seconds=0.3), tool_call("fast"), tool_call("mid", seconds=0.15),
+         tool_call("slow", seconds=0.3)])
+    assert time.perf_counter() - start < 0.55
+    assert contents(results) == ["slow:0.3", "fast:0", "mid:0.15", "slow:0.3"]
+    assert [name for name, _ in timings] == ["slow", "fast", "mid", "slow"]
+
+def test_hung_tool_times_out_and_others_still_answer(tools):
+    start = time.perf_counter()
+    results, timings = chat_tools.execute_tool_calls(
+        [tool_call("hung", seconds=1.0), tool_call("broken"), tool_call("fast")])
+    assert time.perf_counter() - start < 0.6
+    assert contents(results) == ["⏰ hung timed out after 0.3s", "❌ broken failed: bad arguments", "fast:0"]
+    assert timings[0] == ("hung", 0.3)
+    # Tools are told how long they have, so they can stop their own requests
+    assert ("hung", pytest.approx(0.25)) in tools
+
+def test_deadline_starts_when_the_tool_starts_running(tools, monkeypatch):
+    # One worker: the second call waits 0.2s in the queue, then runs 0.2s of its 0.3s
+    monkeypatch.setattr(chat_tools, "_tool_executor", ThreadPoolExecutor(max_workers=1))
+    results, _ = chat_tools.execute_tool_calls([tool_call("quick", seconds=0.2), tool_call("quick", seconds=0.2)])
+    assert contents(results) == ["quick:0.2", "quick:0.2"]
+
+def test_call_still_queued_after_its_allowance_is_cancelled(tools, monkeypatch):
+    monkeypatch.setattr(chat_tools, "_tool_executor", ThreadPoolExecutor(max_workers=1))
+    results, _ = chat_tools.execute_tool_calls([tool_call("hung", seconds=0.8), tool_call("quick")])
+    assert contents(results) == ["⏰ hung timed out after 0.3s", "⏰ quick didn't start within 0.3s (tool pool busy)"]
+    assert [name for name, _ in tools] == ["hung"]
+
+def test_async_execution_has_the_same_order_and_deadlines(tools):
+    start = time.perf_counter()
+    results, _ = asyncio.run(chat_tools.aexecute_tool_calls(
+        [tool_call("hung", seconds=1.0), tool_call("mid", seconds=0.15), tool_call("fast")]))
+    assert time.perf_counter() - start < 0.6
+    assert contents(results) == ["⏰ hung timed out after 0.3s", "mid:0.15", "fast:0"]
+
+def test_canvas_tool_stops_its_requests_at_the_timeout(stub_server, monkeypatch):
+    monkeypatch.setattr(canvas_tools, "CANVAS_TOKEN", "test-token")
+    monkeypatch.setattr(canvas_tools, "CANVAS_BASE_URL", stub_server.url)
+    monkeypatch.setattr(canvas_tools, "_cache", CanvasCache())
+    release = threading.Event()
+
+    def respond(handler):
+        release.wait(5)
+        return 200, {}, [{"name": "Biology", "course_code": "BIO101"}]
+
+    stub_server.respond = respond
+    start = time.perf_counter()
+    try:
+        result = canvas_tools.get_courses(timeout=0.3)
+    finally:
+        release.set()
+    assert time.perf_counter() - start < 2
+    assert result == "Canvas API request timed out"
@@ -0,0 +1,49 @@
+import pytest
+
+from tool_router import ExampleClassifier, ToolRouter, match_rules
+
+# Tool words outside a Canvas context: left to the model
+NOT_CANVAS = [
+    "What events led to World War 1?",
+    "What's the schedule for the Olympics?",
+    "any events in Paris this weekend?",
+    "When is the deadline for filing taxes?",
+    "What is due process?",
+    "what classes of drugs treat hypertension?",
+    "are courses on Coursera worth it?",
+    "Is there any news from Ukraine?",
+    "Google Docs won't open my file",
+    "google stock price",
+    "Is my homework answer x=5 right?",
+    "What did my teacher mean by the homework question 3?",
+    "what are the events in my novel",
+    "Explain why my assignments are graded on a curve",
+]
+
+@pytest.mark.parametrize("message", NOT_CANVAS)
+def test_tool_words_without_canvas_context_are_not_routed(message):
+    assert match_rules(message) is None
+    assert ExampleClassifier().classify(message) is None
+
+@pytest.mark.parametrize("message, calls", [
+    ("What assignments do I have due this week?", [("get_assignments", {"due_date": "this_week"})]),
+    ("what's due tomorrow", [("get_assignments", {"due_date": "tomorrow"})]),
+    ("Do I have any overdue assignments?", [("get_assignments", {"status": "overdue"})]),
+    ("list my classes", [("get_courses", {})]),
+    ("What's on my calendar tomorrow?", [("get_calendar_events", {"start_date": "tomorrow"})]),
+    ("any new announcements on canvas", [("get_announcements", {"unread_only": True})]),
+    ("What's due today and any new announcements?",
+     [("get_assignments", {"due_date": "today"}), ("get_announcements", {"unread_only": True})]),
+    ("Search the web for krebs cycle diagram", [("search_web", {"query": "krebs cycle diagram"})]),
+])
+def test_canvas_requests_are_routed(message, calls):
+    assert match_rules(message).calls == calls
+
+def test_classifier_mode_routes_what_the_rules_leave_out():
+    assert match_rules("Any new announcements?") is None
+    router = ToolRouter("classifier")
+    route = router.route("Any new announcements?")
+    assert route.calls == [("get_announcements", {"unread_only": True})]
+    assert router.route("What events led to World War 1?") is None
+    assert router.stats()["by_rule"] == {"classifier:announcements": 1}
+    assert ToolRouter("off").route("list my classes") is None
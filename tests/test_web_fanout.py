@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+import chat_tools
+from page_cache import PageCache
+
+ARTICLE = "<p>" + "Mitochondria produce most of the cell's ATP through oxidative phosphorylation. " * 6 + "</p>"
+PAGE = f"<html><body><article>{ARTICLE}</article></body></html>"
+
+@pytest.fixture
+def site(database, stub_server, monkeypatch):
+    """Stub site where /slow/... pages hang until the test ends."""
+    monkeypatch.setattr(chat_tools, "_page_cache", PageCache())
+    release = threading.Event()
+
+    def respond(handler):
+        if handler.path.startswith("/slow"):
+            release.wait(5)
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, PAGE
+
+    stub_server.respond = respond
+    yield stub_server
+    release.set()
+
+def pages(site, paths):
+    return [(idx, f"Page {idx}", f"{site.url}{path}") for idx, path in enumerate(paths, 1)]
+
+def test_slow_pages_are_cancelled_at_the_deadline(site):
+    start = time.perf_counter()
+    summaries = chat_tools.process_urls_concurrently(pages(site, ["/fast/1", "/slow/2", "/fast/3"]), deadline=0.5)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5
+    assert summaries[0::2] == ["**1. Page 1**", "**2. Page 2**", "**3. Page 3**"]
+    assert "oxidative phosphorylation" in summaries[1]
+    assert summaries[3] == "❌ Timeout processing Page 2\n"
+    assert "oxidative phosphorylation" in summaries[5]
+
+def test_fast_pages_return_without_waiting_for_the_deadline(site):
+    start = time.perf_counter()
+    summaries = chat_tools.process_urls_concurrently(pages(site, ["/a", "/b", "/c", "/d"]), deadline=5)
+    assert time.perf_counter() - start < 2
+    assert all(summary.startswith("📄") for summary in summaries[1::2])
+
+def test_pages_are_fetched_concurrently(site):
+    start = time.perf_counter()
+    summaries = chat_tools.process_urls_concurrently(pages(site, [f"/slow/{i}" for i in range(4)]), deadline=0.5)
+    # Four hanging pages share one deadline instead of timing out one after another
+    assert time.perf_counter() - start < 1.5
+    assert all(summary.startswith("❌ Timeout") for summary in summaries[1::2])
+    assert len(site.requests) == 4
@@ -0,0 +1,264 @@
+# tool_router.py
+
+import os
+import re
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from ollama import Message
+
+from semantic_memory import HashingEmbedder
+
+# off: the model always picks tools; rules: obvious Canvas/web requests run their tool
+# without asking the model first; classifier: rules, then a nearest-example classifier
+TOOL_ROUTING = os.getenv("TOOL_ROUTING", "rules")
+ROUTER_MAX_WORDS = 16             # Longer messages are left to the model
+CLASSIFIER_THRESHOLD = 0.75       # Cosine similarity to an example needed to route
+TOOL_CHOICE_EWMA_WEIGHT = 0.2     # Weight of the newest measured tool-choice call in the estimate
+
+# A message asking for a list rather than help with one item
+_LIST_REQUEST = re.compile(
+    r"^(what|whats|what's|which|any|anything|show|list|get|check|do i have|have i got|when|is|are|"
+    r"tell me|give me|my|upcoming|today|tomorrow)\b"
+)
+# The tool nouns are common words ("events", "classes", "due"), so the rules only fire when the
+# message is about the student's own Canvas; everything else goes to the classifier or the model
+_CANVAS_ANCHOR = re.compile(
+    r"\b(canvas|do i have|have i got|i have|am i|i'm|i am)\b|"
+    r"\b(overdue|due (today|tonight|tomorrow|this week|next week|soon))\b"
+)
+# "my" alone is a weak anchor ("what are the events in my novel"): it also needs a list or time cue
+_MY = re.compile(r"\bmy\b")
+_LIST_OR_TIME_CUE = re.compile(
+    r"\b(any|all|list|show|upcoming|coming up|new|unread|latest|recent|today|tonight|tomorrow|"
+    r"this week|next week|overdue|late|due)\b"
+)
+# Questions about the content of one item ("is my homework answer right?") need the model
+_CONTENT_QUESTION = re.compile(r"\b(answers?|mean|meant|right|correct|wrong|questions?)\b")
+_ASSIGNMENTS = re.compile(r"\b(assignments?|homework|hw|deadlines?|due(?! to\b))\b")
+_COURSES = re.compile(r"\b(courses|classes|enrolled)\b")
+_ANNOUNCEMENTS = re.compile(r"\bannouncements?\b")
+_CALENDAR = re.compile(r"\b(calendar|events?|schedule)\b")
+# Asking for help or an explanation needs the model's judgement, even when a tool word appears
+_NEEDS_MODEL = re.compile(r"\b(why|explain|help|write|should|essay|solve|summari[sz]e)\b")
+_WEB_SEARCH = re.compile(
+    r"^(?:please\s+)?(?:search\s+(?:the\s+)?(?:web|internet|online)\s+for|search\s+online\s+for|"
+    r"web\s+search:?|search\s+google\s+for|look\s+online\s+for)\s+(.+)$",
+    re.I
+)
+
+# Example requests for the optional classifier (Canvas tools only; their arguments come from the rules' date parsing)
+CLASSIFIER_EXAMPLES = {
+    "get_assignments": [
+        "what homework do i have", "what is due this week", "assignments due tomorrow", "anything due today",
+        "what do i need to turn in", "what should i submit tonight", "pending assignments", "late work",
+    ],
+    "get_courses": [
+        "what courses am i taking", "list my classes", "which classes am i enrolled in", "my courses this semester",
+    ],
+    "get_announcements": [
+        "any new announcements", "what did my professors post", "latest course news", "unread announcements",
+    ],
+    "get_calendar_events": [
+        "what is on my calendar", "events today", "my schedule tomorrow", "what is happening this week",
+    ],
+}
+
+class Route:
+    """Tool calls decided for a message without asking the model."""
+
+    def __init__(self, calls: List[Tuple[str, dict]], rule: str):
+        self.calls = calls
+        self.rule = rule
+
+    @property
+    def tool_calls(self) -> List[Message.ToolCall]:
+        """The calls in the shape the model's tool calls have."""
+        return [Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments=arguments))
+                for name, arguments in self.calls]
+
+    def describe(self) -> str:
+        return ", ".join(f"{name}({', '.join(f'{k}={v}' for k, v in args.items())})" for name, args in self.calls)
+
+def _normalize(message: str) -> str:
+    return " ".join(message.lower().replace("’", "'").strip(" ?!.").split())
+
+def _assignment_args(text: str) -> dict:
+    if re.search(r"\b(overdue|late|missed|missing)\b", text):
+        return {"status": "overdue"}
+    if re.search(r"\b(today|tonight)\b", text):
+        return {"due_date": "today"}
+    if re.search(r"\btomorrow\b", text):
+        return {"due_date": "tomorrow"}
+    if re.search(r"\bthis week\b", text):
+        return {"due_date": "this_week"}
+    if re.search(r"\b(upcoming|coming up|next)\b", text):
+        return {"status": "upcoming"}
+    return {}
+
+def _calendar_args(text: str) -> dict:
+    if re.search(r"\btomorrow\b", text):
+        return {"start_date": "tomorrow"}
+    if re.search(r"\b(this|next) week\b", text):
+        start = date.today() + timedelta(days=7 if "next week" in text else 0)
+        return {"start_date": start.isoformat(), "end_date": (start + timedelta(days=6)).isoformat()}
+    return {"start_date": "today"}
+
+def _tool_args(tool: str, text: str) -> dict:
+    if tool == "get_assignments":
+        return _assignment_args(text)
+    if tool == "get_calendar_events":
+        return _calendar_args(text)
+    if tool == "get_announcements":
+        return {"unread_only": True} if re.search(r"\b(unread|new)\b", text) else {}
+    return {}
+
+def _has_canvas_anchor(text: str) -> bool:
+    return bool(_CANVAS_ANCHOR.search(text) or (_MY.search(text) and _LIST_OR_TIME_CUE.search(text)))
+
+def match_rules(message: str) -> Optional[Route]:
+    """Rule-based intent detection for obvious tool requests.
+
+    Web searches need an explicit "search the web for ..." style request.
+    Canvas tools need their noun plus a sign the message is about the
+    student's own courses ("canvas", "do I have", "due this week", or
+    "my" with a list or time cue such as "any" or "today"), so "What
+    events led to World War 1?" and "Is my homework answer right?" are
+    left to the model.
+
+    Args:
+        message: The user's message
+
+    Returns:
+        Route with one call per requested tool, or None if the message isn't an obvious request
+    """
+    web = _WEB_SEARCH.match(message.strip().rstrip("?!."))
+    if web:
+        return Route([("search_web", {"query": web.group(1).strip()})], "web_search")
+
+    text = _normalize(message)
+    if (len(text.split()) > ROUTER_MAX_WORDS or not _LIST_REQUEST.search(text) or _NEEDS_MODEL.search(text)
+            or _CONTENT_QUESTION.search(text) or not _has_canvas_anchor(text)):
+        return None
+    calls, rules = [], []
+    for tool, pattern in (("get_assignments", _ASSIGNMENTS), ("get_courses", _COURSES),
+                          ("get_announcements", _ANNOUNCEMENTS), ("get_calendar_events", _CALENDAR)):
+        if pattern.search(text):
+            calls.append((tool, _tool_args(tool, text)))
+            rules.append(tool.replace("get_", ""))
+    return Route(calls, "+".join(rules)) if calls else None
+
+class ExampleClassifier:
+    """Nearest-example intent classifier for phrasings the rules miss.
+
+    Messages and CLASSIFIER_EXAMPLES are embedded with the hashing
+    embedder (no model download); a message is routed to the tool of its
+    most similar example when the cosine similarity passes the threshold.
+    """
+
+    def __init__(self, examples: Dict[str, List[str]] = None, threshold: float = CLASSIFIER_THRESHOLD):
+        examples = examples or CLASSIFIER_EXAMPLES
+        self.threshold = threshold
+        self.embedder = HashingEmbedder(dim=512)
+        self.labels = [tool for tool, phrases in examples.items() for _ in phrases]
+        self.matrix = self._unit(self.embedder.embed([p for phrases in examples.values() for p in phrases]))
+
+    @staticmethod
+    def _unit(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def classify(self, message: str) -> Optional[Route]:
+        text = _normalize(message)
+        if len(text.split()) > ROUTER_MAX_WORDS or _NEEDS_MODEL.search(text) or _CONTENT_QUESTION.search(text):
+            return None
+        scores = self.matrix @ self._unit(self.embedder.embed([text]))[0]
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        tool = self.labels[best]
+        return Route([(tool, _tool_args(tool, text))], f"classifier:{tool.replace('get_', '')}")
+
+class ToolRouter:
+    """Decides tool calls for obvious requests so a turn needs one model call instead of two.
+
+    Routed turns run their tools first and make a single chat call with the
+    results in context (the model can still ask for more tools). The time
+    saved is estimated from the measured duration of the model's own
+    tool-choice calls on turns that weren't routed.
+    """
+
+    def __init__(self, mode: str = TOOL_ROUTING):
+        self.mode = mode
+        self.classifier = ExampleClassifier() if mode == "classifier" else None
+        self._lock = threading.Lock()
+        self.routed: Dict[str, int] = {}
+        self.not_routed = 0
+        self.model_tool_choices = 0
+        self.extra_tool_calls = 0
+        self.tool_choice_seconds: Optional[float] = None
+        self.saved_seconds = 0.0
+
+    def route(self, message: str) -> Optional[Route]:
+        """Route a message, logging the decision.
+
+        Args:
+            message: The user's message
+
+        Returns:
+            Route to run before the model call, or None to let the model choose
+        """
+        if self.mode == "off":
+            return None
+        start = time.perf_counter()
+        route = match_rules(message)
+        if route is None and self.classifier is not None:
+            route = self.classifier.classify(message)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            if route is None:
+                self.not_routed += 1
+                return None
+            self.routed[route.rule] = self.routed.get(route.rule, 0) + 1
+            estimate = self.tool_choice_seconds
+            if estimate is not None:
+                self.saved_seconds += estimate
+        saved = f"~{estimate:.2f}s saved" if estimate is not None else "no estimate yet"
+        print(f"🧭 Routed by {route.rule} in {elapsed_ms:.1f}ms: {route.describe()} (skipped tool-choice call, {saved})")
+        return route
+
+    def record_tool_choice(self, seconds: float) -> None:
+        """Record how long the model took to pick tools on a turn that wasn't routed."""
+        with self._lock:
+            self.model_tool_choices += 1
+            if self.tool_choice_seconds is None:
+                self.tool_choice_seconds = seconds
+            else:
+                self.tool_choice_seconds += TOOL_CHOICE_EWMA_WEIGHT * (seconds - self.tool_choice_seconds)
+
+    def record_extra_tools(self, route: Route, tool_calls: list) -> None:
+        """Note a routed turn where the model still asked for tools (the route was incomplete)."""
+        with self._lock:
+            self.extra_tool_calls += 1
+        print(f"🧭 Route {route.rule} was incomplete; model also called "
+              + ", ".join(call.function.name for call in tool_calls))
+
+    def stats(self) -> dict:
+        with self._lock:
+            routed = sum(self.routed.values())
+            return {
+                "mode": self.mode,
+                "routed": routed,
+                "not_routed": self.not_routed,
+                "by_rule": dict(self.routed),
+                "extra_tool_calls": self.extra_tool_calls,
+                "model_tool_choices": self.model_tool_choices,
+                "tool_choice_seconds": round(self.tool_choice_seconds, 3) if self.tool_choice_seconds else None,
+                "saved_seconds": round(self.saved_seconds, 2),
+            }
+
+tool_router = ToolRouter()
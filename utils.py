@@ -1,7 +1,17 @@
 # utils.py
 
+import asyncio
+import os
 import sys
 import select
+import threading
+from concurrent.futures import TimeoutError
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 def get_user_input(timeout=60):
     """Get user input with timeout support"""
@@ -23,3 +33,119 @@ def get_user_input(timeout=60):
 def notify_user(message: str):
     print(f"🤖 Assistant: {message}")
     print()  # Add blank line for better readability
+
+
+def create_http_session(pool_size: int = 10, max_hosts: int = 10, retries: int = 3,
+                        backoff: float = 0.5, headers: dict = None) -> requests.Session:
+    """Create a keep-alive HTTP session with connection pooling and retries.
+    
+    Args:
+        pool_size: Maximum open connections per host (callers wait for a free one)
+        max_hosts: Number of per-host connection pools to keep
+        retries: Retries for connection errors and 429/5xx responses
+        backoff: Exponential backoff factor between retries, in seconds
+        headers: Default headers for every request
+        
+    Returns:
+        Configured requests.Session, safe to share between threads for GETs
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+    
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def create_async_http_client(pool_size: int = 10, retries: int = 1, timeout: float = 10.0,
+                             headers: dict = None) -> httpx.AsyncClient:
+    """Create a keep-alive async HTTP client for the ASGI serving path.
+    
+    Must be created (and used) inside the event loop that will run it.
+    
+    Args:
+        pool_size: Maximum keep-alive connections
+        retries: Retries for connection errors
+        timeout: Default request timeout in seconds
+        headers: Default headers for every request
+        
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    transport = httpx.AsyncHTTPTransport(
+        retries=retries,
+        limits=httpx.Limits(max_connections=pool_size * 4, max_keepalive_connections=pool_size),
+    )
+    return httpx.AsyncClient(transport=transport, timeout=timeout, headers=headers, follow_redirects=True)
+
+class BackgroundEventLoop:
+    """An asyncio event loop running in a daemon thread.
+
+    Lets synchronous code run coroutines (and keep async clients alive
+    between calls) without starting a new loop each time. The loop starts
+    on first use, and again in a forked worker process.
+    """
+
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A loop inherited through fork() has no thread running it
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._loop
+
+    def run(self, coro: Awaitable, timeout: float = None):
+        """Run a coroutine on the loop and wait for its result.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait; on timeout the coroutine is cancelled
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            TimeoutError: If the coroutine didn't finish within timeout
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, cleanup: Callable[[], Awaitable] = None, timeout: float = 5) -> None:
+        """Stop the loop, first awaiting cleanup() on it (e.g. closing clients). Safe to call more than once."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = None
+        try:
+            if cleanup is not None:
+                asyncio.run_coroutine_threadsafe(cleanup(), loop).result(timeout)
+        except Exception as e:
+            print(f"⚠️ {self.name} cleanup failed: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()